@@ -61,7 +61,7 @@ fig, ax = sheet_view(sheet, mode="2D")
 fig.set_size_inches(8, 8)
 
 from tyssue.dynamics.planar_vertex_model import PlanarModel as smodel
-from tyssue.solvers import QSSolver
+from newton_solver import newton_energy_min
 from pprint import pprint
 
 specs = {
@@ -91,8 +91,9 @@ specs = {
 sheet.update_specs(specs)
 
 # Check the tissue is at its equilibrium
-solver = QSSolver()
-res = solver.find_energy_min(sheet, sgeom, smodel)
+# Iterations and time of every energy minimization.
+solver_log = []
+res = newton_energy_min(sheet, sgeom, smodel, log=solver_log)
 # Visualisation of the tissue
 fig, ax = sheet_view(sheet, mode="2D")
 
@@ -175,7 +176,7 @@ while manager.current and t < stop:
     t += 1
     sheet.reset_index(order=True)
     # Find energy min
-    res = solver.find_energy_min(sheet, sgeom, smodel)
+    res = newton_energy_min(sheet, sgeom, smodel, log=solver_log)
     history.record()
     fig, ax = sheet_view(sheet, mode = 'quick')
     # Switch event list from the next list to the current list
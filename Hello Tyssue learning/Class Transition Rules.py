@@ -1,105 +1,71 @@
 """
 This script contains the functions that describes the transition between cell classes.
+
+The transitions are declared as a table of rules (see transition_rules.py in the
+"Model with multiple cell class" folder), and one call of apply_rules evaluates
+all of them on all the cells, so adding a class only adds a line to the table.
 """
+import numpy as np
 
+# import my own functions
+import my_headers as mh
+from transition_rules import transition_rule, apply_rules
 
-# Now we write a function that for an input of a cell dataframe, it changes
-# 10% of its "S" cells to "G1" class, and doubles the target area of new G1 cells.
-def select_S_to_G1(face_df, rng, percentage=0.1):
-    """Converts 10% of 'S' cells to 'G1' and doubles their target area.
 
-    Parameters:
-        face_df (DataFrame): DataFrame containing cell properties.
-        rng (np.random.Generator): Random number generator for reproducibility.
-        percentage (float): Probability of conversion (default 10%).
-    """
+def double_target_area(sheet, cells):
+    """Doubles the target area of the cells."""
+    sheet.face_df.loc[cells, 'prefered_area'] *= 2
 
-    s_cells = face_df['cell_class'] == "S"
-    s_indices = face_df.index[s_cells]  # Get indices of the S cells.
-    number_to_change = int(len(s_indices) * percentage)
 
-    if number_to_change > 0:
-        # Using RNG, we pick the indices of the cells that will change class.
-        selected_indices = rng.choice(s_indices, size=number_to_change, replace=False)
-        face_df.loc[selected_indices, 'cell_class'] = 'G1'  # Update selected cells.
-        face_df.loc[selected_indices, 'prefered_area'] *= 2  # Double the target area.
+def reached_target_area(sheet):
+    """True for the cells that reach 97% of their target area (as an approximation of full size)."""
+    return (sheet.face_df['area'] >= 0.97 * sheet.face_df['prefered_area']).to_numpy()
 
 
-# Now, we need to have a function that converts all "G1" cells that reach 97%
-# of their target area (as an approximation of full size) to be "M" class.
-def select_G1_to_M(face_df):
-    """Converts all 'G1' cells to 'M' when they reach 97% of their target area.
-
-    Parameters:
-        face_df (DataFrame): DataFrame containing cell properties.
-    """
+# (1) 10% of the "S" cells change to "G1" class, and the target area of the new G1 cells is doubled.
+# (2) All "G1" cells that reach 97% of their target area become "M" class.
+# (3) All "G2" cells become "S" class when they reach 97% of their target area.
+# (4) 10% of the "S" cells that have at least one neighbouring "STB" cell become "F" cells.
+CT_RULES = [
+    transition_rule('S', 'G1', fraction=0.1, action=double_target_area),
+    transition_rule('G1', 'M', condition=reached_target_area),
+    transition_rule('G2', 'S', condition=reached_target_area),
+    transition_rule('S', 'F', fraction=0.1, touches='STB'),
+]
 
-    for i in face_df.index:
-        if face_df.loc[i, 'class'] == "G1" and face_df.loc[i, 'area'] >= 0.97 * face_df.loc[i, 'prefered_area']:
-            face_df.loc[i, 'class'] = "M"
 
-        # Now, we write a function that performs cell division on all "M" cells.
-
-
-def divide_cells_in_M(face_df):
+def divide_cells_in_M(sheet, rng):
     """Divides all 'M' cells and assigns both parent and daughter to 'G2'.
 
     Parameters:
-        face_df (DataFrame): DataFrame containing cell properties.
+        sheet: The tissue sheet object.
+        rng (np.random.Generator): Random number generator for reproducibility.
     """
-
-    M_cells = face_df[face_df["class"] == "M"].index.tolist()
-
-    for cell_id in M_cells:
-        # Perform cell division and get the new daughter cell ID
-        daughter_id = cell_division(face_df, cell_id, geom)
-
-        # Reset properties for both parent and daughter
-        face_df.loc[[cell_id, daughter_id], "prefered_area"] = 1.0
-        face_df.loc[[cell_id, daughter_id], "class"] = "G2"  # Set both to "G2"
-
+    M_cells = sheet.face_df.index[sheet.face_df['cell_class'] == 'M']
+    if not len(M_cells):
+        return {}
+    # Perform cell division on all of them together, get the new daughter cell IDs.
+    centre_data = sheet.edge_df.drop_duplicates(subset='face')[['face', 'fx', 'fy']]
+    daughters = mh.divide_cells(sheet, rng, centre_data, M_cells)
+
+    # Reset properties for both parent and daughter
+    both = np.concatenate([list(daughters.keys()), list(daughters.values())]).astype(int)
+    sheet.face_df.loc[both, 'prefered_area'] = 1.0
+    sheet.face_df.loc[both, 'cell_class'] = 'G2'  # Set both to "G2"
+    for cell_id, daughter_id in daughters.items():
         print(f"Cell {cell_id} divided into {daughter_id} and both are now G2")
+    return daughters
 
 
-# Now, we write a function that converts all "G2" cells to "S" class when their
-# area is 97% of the target area.
-def select_G2_to_S(face_df):
-    """Converts all 'G2' cells to 'S' when they reach 97% of their target area.
-
-    Parameters:
-        face_df (DataFrame): DataFrame containing cell properties.
-    """
-
-    for i in face_df.index:
-        if face_df.loc[i, 'class'] == "G2" and face_df.loc[i, 'area'] >= 0.97 * face_df.loc[i, 'prefered_area']:
-            face_df.loc[i, 'class'] = "S"
-
-        # Now, we write a function that converts an "S" cell to an "F" cell with 10%
-
-
-# probability, if it has at least one neighboring "STB" cell.
-def select_S_to_F(face_df, sheet, rng, percentage=0.1):
-    """Converts 10% of 'S' cells to 'F' if they have an 'STB' neighbor.
+def class_transitions(sheet, rng):
+    """Applies all the class transition rules to the cells, then divides the 'M' cells.
 
     Parameters:
-        face_df (DataFrame): DataFrame containing cell properties.
-        sheet: The tissue sheet object (to get neighbors).
+        sheet: The tissue sheet object.
         rng (np.random.Generator): Random number generator for reproducibility.
-        percentage (float): Probability of conversion (default 10%).
     """
-
-    s_cells = face_df["class"] == "S"
-    s_indices = face_df.index[s_cells]  # Get indices of the S cells
-
-    # Filter only those with at least one 'STB' neighbor
-    valid_indices = [i for i in s_indices if any(face_df.loc[n, "class"] == "STB" for n in sheet.get_neighbours(i))]
-
-    number_to_change = int(len(valid_indices) * percentage)
-
-    if number_to_change > 0:
-        # Randomly select which 'S' cells will turn into 'F'
-        selected_indices = rng.choice(valid_indices, size=number_to_change, replace=False)
-        face_df.loc[selected_indices, "class"] = "F"  # Update selected cells
+    apply_rules(sheet, rng, CT_RULES)
+    return divide_cells_in_M(sheet, rng)
 
 
 """ This is the end of the script."""
@@ -45,7 +45,7 @@ from tyssue.draw import sheet_view, highlight_cells
 from tyssue.draw.plt_draw import plot_forces, plot_forces2
 from tyssue.config.draw import sheet_spec
 # import my own functions
-from my_headers import delete_face, lateral_split, time_step_bot
+from my_headers import delete_face, lateral_split, time_step_bot, T1_sweep
 
 rng = np.random.default_rng(70)
 
@@ -76,17 +76,8 @@ num_ct = num_x
 sheet.face_df.loc[0:num_ct-1, "cell_type"] = 'CT'
 sheet.face_df.loc[num_ct:, "cell_type"] = 'ST'
 
-# Then update the edge data frame via 'face' column.
-
-sheet.edge_df['cell_type'] = 'to be set'
-
-for i in list(range(len(sheet.edge_df))):
-    sheet.edge_df.loc[i, 'cell_type'] = sheet.face_df.loc[sheet.edge_df.loc[i,'face'],'cell_type']
-
-sheet.edge_df['cell_type'] = 'to be set'
-
-for i in list(range(len(sheet.edge_df))):
-    sheet.edge_df.loc[i, 'cell_type'] = sheet.face_df.loc[sheet.edge_df.loc[i,'face'],'cell_type']
+# The edges are not given a cell type, it is read from their face when
+# needed, with face_to_edge(sheet, 'cell_type').
 
 
 sheet.face_df['division_status'] = 'ready'
@@ -196,8 +187,9 @@ def division_stb(sheet, cell_id, division_threshold, division_rate, growth_rate,
         if prob < division_rate:
             sheet.face_df.loc[face_id,'prefered_area'] = 1
             daughter = lateral_split(sheet, mother = cell_id)
-            print(f"cell n°{daughter} is born")
-            geom.update_all(sheet)
+            if daughter is not None:
+                print(f"cell n°{daughter} is born")
+                geom.update_all(sheet)
 
     elif sheet.face_df.loc[cell_id, "cell_type"] == 'CT' and sheet.face_df.loc[cell_id, 'area'] < division_threshold :
         sheet.face_df.loc[cell_id,'prefered_area'] = sheet.face_df.loc[cell_id,'area'] + dt*growth_rate
@@ -227,21 +219,8 @@ while t <= t_end:
 
     # Mesh restructure check
     # T1 transition, edge rearrangment check
-    while True:
-    # Check for any edge below the threshold, starting from index 0 upwards
-        edge_to_process = None
-        for index in sheet.edge_df.index:
-            if sheet.edge_df.loc[index, 'length'] < t1_threshold:
-                edge_to_process = index
-                edge_length = sheet.edge_df.loc[edge_to_process,'length']
-                print(f'Edge {edge_to_process} is too short: {edge_length}')
-                # Process the identified edge with T1 transition
-                type1_transition(sheet, edge_to_process,remove_tri_faces=False, multiplier=1.5)
-                break  
-        # Exit the loop if no edges are below the threshold
-        if edge_to_process is None:
-            break
-    geom.update_all(sheet)
+    # All the short edges that do not share a face are transitioned together.
+    T1_sweep(sheet, t1_threshold, multiplier=1.5)
 
     # T2 transition check.
     tri_faces = sheet.face_df[(sheet.face_df["num_sides"] < 4) & 
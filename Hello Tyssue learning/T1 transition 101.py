@@ -110,12 +110,10 @@ sheet.vert_df['viscosity'] = 1.0
 sheet.update_specs(specs, reset = True)
 geom.update_all(sheet)
 
-# Adjust for cell-boundary adhesion force.
-for i in sheet.edge_df.index:
-    if sheet.edge_df.loc[i, 'opposite'] == -1:
-        sheet.edge_df.loc[i, 'line_tension'] *=2
-    else:
-        continue
+# Adjust for cell-boundary adhesion force: the boundary edges have twice the
+# line tension, they are applied again after the topology changes below.
+sheet.settings['param_rules'] = [{'column': 'line_tension', 'factor': 2, 'where': 'boundary'}]
+apply_param_rules(sheet)
 geom.update_all(sheet)
 
 fig, ax = plot_forces(sheet, geom, model, ['x', 'y'], scaling=0.1)
@@ -144,6 +142,9 @@ while t <0.1:
             break
     geom.update_all(sheet)
     
+    # The topology may have changed above, apply the parameter rules again.
+    apply_param_rules(sheet)
+
     # Force computing and updating positions.
     valid_active_verts = sheet.active_verts[sheet.active_verts.isin(sheet.vert_df.index)]
     pos = sheet.vert_df.loc[valid_active_verts, sheet.coords].values
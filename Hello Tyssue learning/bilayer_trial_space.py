@@ -33,7 +33,9 @@ from tyssue.topology import condition_4i, condition_4ii
 
 ## model and solver
 from tyssue.dynamics.planar_vertex_model import PlanarModel as smodel
-from tyssue.solvers.quasistatic import QSSolver
+from newton_solver import newton_energy_min
+from local_relax import local_relax
+from adjacency_index import invalidate_adjacency
 from tyssue.generation import extrude
 from tyssue.dynamics import model_factory, effectors
 from tyssue.topology.sheet_topology import remove_face, cell_division
@@ -93,8 +95,9 @@ nondim_specs = config.dynamics.quasistatic_plane_spec()
 bilayer.update_specs(nondim_specs, reset = True)
 
 # Perform energy minimization.
-solver = QSSolver()
-res = solver.find_energy_min(bilayer, geom, smodel)
+# Iterations and time of every energy minimization.
+solver_log = []
+res = newton_energy_min(bilayer, geom, smodel, log=solver_log)
 fig, ax = sheet_view(bilayer)
 
 
@@ -106,7 +109,7 @@ bilayer.vert_df.loc[2,['y','x']] = 10,7
 geom.update_all(bilayer)
 sheet_view(bilayer)
 
-res = solver.find_energy_min(bilayer, geom, smodel)
+res = newton_energy_min(bilayer, geom, smodel, log=solver_log)
 fig, ax = sheet_view(bilayer)
 fig.set_size_inches(12, 5)
 
@@ -143,18 +146,19 @@ Perform cell division, without using event manager
 
 # Generate a daughter cell.
 daughter = cell_division(bilayer, 7, geom, angle=np.pi/2)
-geom.update_all(bilayer)
+# cell_division updated the geometry, but not the adjacency index.
+invalidate_adjacency(bilayer)
 sheet_view(bilayer)
 
-# Perform energy minimisation.
-res = solver.find_energy_min(bilayer, geom, smodel)
+# Perform energy minimisation, only around the two daughter cells.
+res = local_relax(bilayer, geom, faces=[7, daughter], log=solver_log)
 fig, ax = sheet_view(bilayer)
 fig.set_size_inches(12, 5)
 
 for i in list(range(3,30,4)):
 	sub = cell_division(bilayer,i, geom, angle=np.pi*np.random.rand(1).item())
-	geom.update_all(bilayer)
-	res=solver.find_energy_min(bilayer, geom, smodel)
+	invalidate_adjacency(bilayer)
+	res=local_relax(bilayer, geom, faces=[i, sub], log=solver_log)
 fig, ax = sheet_view(bilayer)
 fig.set_size_inches(12,5)
 
@@ -213,13 +217,13 @@ while manager.current and t < stop:
     t += 1
     
     # Find energy min
-    #res = solver.find_energy_min(bilayer, geom, smodel)
+    #res = newton_energy_min(bilayer, geom, smodel, log=solver_log)
     history.record()
 
     # Switch event list from the next list to the current list
     manager.update()
 
-res = solver.find_energy_min(bilayer, geom, smodel)
+res = newton_energy_min(bilayer, geom, smodel, log=solver_log)
 fig, ax = sheet_view(bilayer, mode="2D")
 
 
@@ -227,7 +231,7 @@ fig, ax = sheet_view(bilayer, mode="2D")
 from tyssue.topology.base_topology import remove_face
 
 remove_face(bilayer, 1)
-res = solver.find_energy_min(bilayer, geom, smodel)
+res = newton_energy_min(bilayer, geom, smodel, log=solver_log)
 sheet_view(bilayer, mode = '2D')
 
 
@@ -249,7 +253,7 @@ Collapses edge and merges it's vertices, creating (or increasing the rank of)
 from tyssue.topology.base_topology import collapse_edge
 
 collapse_edge(bilayer, 3)
-res = solver.find_energy_min(bilayer, geom, smodel)
+res = newton_energy_min(bilayer, geom, smodel, log=solver_log)
 sheet_view(bilayer, mode = '2D')
 
 
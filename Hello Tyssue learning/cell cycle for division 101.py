@@ -87,12 +87,10 @@ sheet.vert_df['viscosity'] = 1.0
 sheet.update_specs(specs, reset = True)
 geom.update_all(sheet)
 
-# Adjust for cell-boundary adhesion force.
-for i in sheet.edge_df.index:
-    if sheet.edge_df.loc[i, 'opposite'] == -1:
-        sheet.edge_df.loc[i, 'line_tension'] *=2
-    else:
-        continue
+# Adjust for cell-boundary adhesion force: the boundary edges have twice the
+# line tension, they are applied again after the topology changes below.
+sheet.settings['param_rules'] = [{'column': 'line_tension', 'factor': 2, 'where': 'boundary'}]
+apply_param_rules(sheet)
 geom.update_all(sheet)
 
 fig, ax = plot_forces(sheet, geom, smodel, ['x', 'y'], scaling=0.1)
@@ -127,21 +125,8 @@ while t <= t_end:
 
     # Mesh restructure check
     # T1 transition, edge rearrangment check
-    while True:
-    # Check for any edge below the threshold, starting from index 0 upwards
-        edge_to_process = None
-        for index in sheet.edge_df.index:
-            if sheet.edge_df.loc[index, 'length'] < t1_threshold:
-                edge_to_process = index
-                edge_length = sheet.edge_df.loc[edge_to_process,'length']
-                print(f'Edge {edge_to_process} is too short: {edge_length}')
-                # Process the identified edge with T1 transition
-                type1_transition(sheet, edge_to_process,remove_tri_faces=False, multiplier=1.5)
-                break  
-        # Exit the loop if no edges are below the threshold
-        if edge_to_process is None:
-            break
-    geom.update_all(sheet)
+    # All the short edges that do not share a face are transitioned together.
+    T1_sweep(sheet, t1_threshold, multiplier=1.5)
 
     # T2 transition check.
     tri_faces = sheet.face_df[(sheet.face_df["num_sides"] < 4) & 
@@ -156,6 +141,9 @@ while t <= t_end:
     
     # T3 transition.
     while True:
+        # The adjacency index is built again after the tyssue changes above
+        # and the reset_index below.
+        invalidate_adjacency(sheet)
         T3_collision = None
         boundary_vert, boundary_edge = find_boundary(sheet)
         if not boundary_edge:  # Exit if no boundary edges are found
@@ -201,6 +189,9 @@ while t <= t_end:
     sheet.reset_index(order = True)
     geom.update_all(sheet)
 
+    # The topology may have changed above, apply the parameter rules again.
+    apply_param_rules(sheet)
+
     # Force computing and updating positions.
     valid_active_verts = sheet.active_verts[sheet.active_verts.isin(sheet.vert_df.index)]
     pos = sheet.vert_df.loc[valid_active_verts, sheet.coords].values
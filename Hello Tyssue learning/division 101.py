@@ -41,7 +41,7 @@ from tyssue.draw import sheet_view, highlight_cells
 from tyssue.draw.plt_draw import plot_forces
 
 # import my own functions
-from my_headers import delete_face, xprod_2d, put_vert, lateral_split, divisibility_check
+from my_headers import delete_face, xprod_2d, put_vert, lateral_split, divisibility_check, apply_param_rules
 
 
 
@@ -95,12 +95,10 @@ sheet.vert_df['viscosity'] = 1.0
 sheet.update_specs(specs, reset = True)
 geom.update_all(sheet)
 
-# Adjust for cell-boundary adhesion force.
-for i in sheet.edge_df.index:
-    if sheet.edge_df.loc[i, 'opposite'] == -1:
-        sheet.edge_df.loc[i, 'line_tension'] *=2
-    else:
-        continue
+# Adjust for cell-boundary adhesion force: the boundary edges have twice the
+# line tension, they are applied again after the topology changes below.
+sheet.settings['param_rules'] = [{'column': 'line_tension', 'factor': 2, 'where': 'boundary'}]
+apply_param_rules(sheet)
 geom.update_all(sheet)
 fig, ax = plot_forces(sheet, geom, smodel, ['x', 'y'], scaling=0.1)
 
@@ -414,6 +412,9 @@ for t in time_points:
     sheet.reset_index()
     geom.update_all(sheet)
     
+    # The topology may have changed above, apply the parameter rules again.
+    apply_param_rules(sheet)
+
     # Force computing and updating positions.
     valid_active_verts = sheet.active_verts[sheet.active_verts.isin(sheet.vert_df.index)]
     pos = sheet.vert_df.loc[valid_active_verts, sheet.coords].values
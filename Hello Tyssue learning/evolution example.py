@@ -32,7 +32,7 @@ from tyssue.topology import condition_4i, condition_4ii
 
 ## model and solver
 from tyssue.dynamics.planar_vertex_model import PlanarModel as smodel
-from tyssue.solvers.quasistatic import QSSolver
+from newton_solver import newton_energy_min
 from tyssue.generation import extrude
 from tyssue.dynamics import model_factory, effectors
 from tyssue.topology.sheet_topology import remove_face, cell_division, face_division
@@ -76,12 +76,8 @@ num_ct = num_x
 sheet.face_df.loc[0:num_ct-1, "cell_type"] = 'CT'
 sheet.face_df.loc[num_ct:, "cell_type"] = 'ST'
 
-# Then update the edge data frame via 'face' column.
-
-sheet.edge_df['cell_type'] = 'to be set'
-
-for i in list(range(len(sheet.edge_df))):
-    sheet.edge_df.loc[i, 'cell_type'] = sheet.face_df.loc[sheet.edge_df.loc[i,'face'],'cell_type']
+# The edges are not given a cell type, it is read from their face when
+# needed, with face_to_edge(sheet, 'cell_type').
 
 
 """ Add another column for division status """
@@ -122,19 +118,18 @@ specs = {
 sheet.update_specs(specs, reset = True)
 
 
-# Adjust for cell-boundary adhesion force.
-for i in sheet.edge_df.index:
-    if sheet.edge_df.loc[i, 'opposite'] == -1:
-        sheet.edge_df.loc[i, 'line_tension'] *=2
-    else:
-        continue
+# Adjust for cell-boundary adhesion force: the boundary edges have twice the
+# line tension, they are applied again after the divisions below.
+sheet.settings['param_rules'] = [{'column': 'line_tension', 'factor': 2, 'where': 'boundary'}]
+apply_param_rules(sheet)
 geom.update_all(sheet)
 
 fig, ax = plot_forces(sheet, geom, smodel, ['x', 'y'], scaling=0.1)
 
 
-solver = QSSolver()
-res = solver.find_energy_min(sheet, geom, smodel)
+# Iterations and time of every energy minimization.
+solver_log = []
+res = newton_energy_min(sheet, geom, smodel, log=solver_log)
 sheet_view(sheet) 
 
 fig,ax = sheet_view(sheet)
@@ -167,8 +162,10 @@ while manager.current and t < stop:
         print(f'we are at time step {t}, cell {i} is being checked.')
         manager.append(lateral_division, cell_id = i, division_rate = 0.03)
         manager.execute(sheet)
+        # The divisions created new edges, apply the parameter rules again.
+        apply_param_rules(sheet)
         # Find energy min state and record.
-        res = solver.find_energy_min(sheet, geom, smodel)
+        res = newton_energy_min(sheet, geom, smodel, log=solver_log)
         history.record()
         # Switch event list from the next list to the current list
         manager.update()
@@ -67,10 +67,8 @@ sheet.face_df.loc[0, "cell_type"] = 'CT'
 sheet.face_df.loc[1, "cell_type"] = 'ST'
 
 
-sheet.edge_df['cell_type'] = 'to be set'
-
-for i in list(range(len(sheet.edge_df))):
-    sheet.edge_df.loc[i, 'cell_type'] = sheet.face_df.loc[sheet.edge_df.loc[i,'face'],'cell_type']
+# The edges are not given a cell type, it is read from their face when
+# needed, with face_to_edge(sheet, 'cell_type').
 
 
 
@@ -80,19 +78,17 @@ sheet.edge_df.keys()
 sheet.face_df.keys()
 
 
-fusing_edge = neighbour_edge(sheet, 0, 1)
-smaller_id = edge_remover(sheet, fusing_edge)
-
+# Cell 0 (CT) fuses into cell 1 (ST), the cell types are updated too.
+fuse_cells(sheet, [(0, 1)])
+sheet.reset_index(order=True)
 geom.update_all(sheet)
 
-update_cell_type(sheet, smaller_id)
-
 fig, ax = sheet_view(sheet, edge = {'head_width':0.1})
 for face, data in sheet.face_df.iterrows():
     ax.text(data.x, data.y, face)
 
 # Then update the properties of newly fused cell to be the same as ST.
-sheet.edge_df.loc[:,'cell_type']
+face_to_edge(sheet, 'cell_type')
 
 
 
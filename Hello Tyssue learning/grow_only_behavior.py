@@ -32,7 +32,7 @@ from tyssue.topology import condition_4i, condition_4ii
 
 ## model and solver
 from tyssue.dynamics.planar_vertex_model import PlanarModel as smodel
-from tyssue.solvers.quasistatic import QSSolver
+from newton_solver import newton_energy_min
 from tyssue.generation import extrude
 from tyssue.dynamics import model_factory, effectors
 from tyssue.topology.sheet_topology import remove_face, cell_division
@@ -79,12 +79,8 @@ num_ct = num_x
 sheet.face_df.loc[0:num_ct-1, "cell_type"] = 'CT'
 sheet.face_df.loc[num_ct:, "cell_type"] = 'ST'
 
-# Then update the edge data frame via 'face' column.
-
-sheet.edge_df['cell_type'] = 'to be set'
-
-for i in list(range(len(sheet.edge_df))):
-    sheet.edge_df.loc[i, 'cell_type'] = sheet.face_df.loc[sheet.edge_df.loc[i,'face'],'cell_type']
+# The edges are not given a cell type, it is read from their face when
+# needed, with face_to_edge(sheet, 'cell_type').
 
 
             
@@ -114,8 +110,9 @@ sheet.update_specs(specs, reset = True)
 geom.update_all(sheet)
 
 # Minimize the potential engery
-solver = QSSolver()
-res = solver.find_energy_min(sheet, geom, smodel)
+# Iterations and time of every energy minimization.
+solver_log = []
+res = newton_energy_min(sheet, geom, smodel, log=solver_log)
 
 # Visualize the sheet.
 fig, ax = sheet_view(sheet,  mode = '2D')
@@ -159,7 +156,7 @@ while manager.current and t < stop:
         manager.append(grow_only, cell_id = i, growth_speed = 0.5)
         manager.execute(sheet)
         # Find energy min.
-        res = solver.find_energy_min(sheet, geom, smodel)
+        res = newton_energy_min(sheet, geom, smodel, log=solver_log)
     # Record the step.
         sim_recorder.record()
 	# Switch event list from the next list to the current list.
@@ -42,7 +42,7 @@ from tyssue.dynamics import model_factory, effectors
 from tyssue.draw import sheet_view
 from tyssue.draw.plt_draw import plot_forces
 
-from my_headers import delete_face, xprod_2d, put_vert, T1_check, my_ode, type1_transition_custom, find_boundary, are_vertices_in_same_face, vector, pnt2line, edge_extension, adjacent_vert
+from my_headers import delete_face, xprod_2d, put_vert, T1_check, my_ode, type1_transition_custom, find_boundary, are_vertices_in_same_face, vector, pnt2line, edge_extension, adjacent_vert, T1_sweep, division_cuts, apply_param_rules
 
 
 """ start the project. """
@@ -109,43 +109,21 @@ def division_1(sheet, cent_data, cell_id, crit_area, growth_rate, dt):
         c0y = float(cent_data.loc[cent_data['face']==cell_id, ['fy']].values[0])
         c0 = [c0x, c0y]
 
+        # The division line goes from the middle of the chosen edge through
+        # the centroid, find the edge it crosses on the other side.
+        p0 = sheet.vert_df.loc[sheet.edge_df.loc[chosen_index, ['srce', 'trgt']], ['x', 'y']].mean().to_numpy()
+        cuts = division_cuts(sheet, [cell_id], [p0], [c0], skip_edges=[chosen_index])
+
         # Add a vertex in the middle of the chosen edge.
         new_mid_index = add_vert(sheet, edge = chosen_index)[0]
-        # Extract for source vertex coordinates of the newly added vertex.
-        p0x = sheet.vert_df.loc[new_mid_index,'x']
-        p0y = sheet.vert_df.loc[new_mid_index,'y']
-        p0 = [p0x, p0y]
-
-        # Compute the directional vector from new_mid_point to centroid.
-        rx = c0x - p0x
-        ry = c0y - p0y
-        r  = [rx, ry]   # use the line in opposite direction.
-        # We need to use iterrows to iterate over rows in pandas df
-        # The iteration has the form of (index, series)
-        # The series can be sliced.
-        for index, row in edge_in_cell.iterrows():
-            s0x = row['sx']
-            s0y = row['sy']
-            t0x = row['tx']
-            t0y = row['ty']
-            v1 = [s0x-p0x,s0y-p0y]
-            v2 = [t0x-p0x,t0y-p0y]
-            # if the xprod_2d returns negative, then line intersects the line segment.
-            if xprod_2d(r, v1)*xprod_2d(r, v2) < 0 and index !=chosen_index :
-                dx = row['dx']
-                dy = row['dy']
-                c1 = dx*ry-dy*rx
-                c2 = s0y*rx-p0y*rx - s0x*ry + p0x*ry
-                k=c2/c1
-                intersection = [s0x+k*dx, s0y+k*dy]
-                oppo_index = put_vert(sheet, index, intersection)[0]
-                # Split the cell with a line.
-                new_face_index = face_division(sheet, mother = cell_id, vert_a = new_mid_index , vert_b = oppo_index )
-                # Put a vertex at the centroid, on the newly formed edge (last row in df).
-                cent_index = put_vert(sheet, edge = sheet.edge_df.index[-1], coord_put = c0)[0]
-                return new_face_index
-            else:
-                continue
+        if cell_id in cuts.index:
+            intersection = cuts.loc[cell_id, ['x', 'y']].to_numpy(dtype=float)
+            oppo_index = put_vert(sheet, cuts.loc[cell_id, 'edge'], intersection)[0]
+            # Split the cell with a line.
+            new_face_index = face_division(sheet, mother = cell_id, vert_a = new_mid_index , vert_b = oppo_index )
+            # Put a vertex at the centroid, on the newly formed edge (last row in df).
+            cent_index = put_vert(sheet, edge = sheet.edge_df.index[-1], coord_put = c0)[0]
+            return new_face_index
     # if the cell area is less than the threshold, update the area by growth.
     else:
         sheet.face_df.loc[cell_id, "prefered_area"] *= (1 + dt * growth_rate)
@@ -268,12 +246,10 @@ sheet.vert_df['viscosity'] = 1.0
 sheet.update_specs(specs, reset = True)
 geom.update_all(sheet)
 
-# Adjust for cell-boundary adhesion force.
-for i in sheet.edge_df.index:
-    if sheet.edge_df.loc[i, 'opposite'] == -1:
-        sheet.edge_df.loc[i, 'line_tension'] *=2
-    else:
-        continue
+# Adjust for cell-boundary adhesion force: the boundary edges have twice the
+# line tension, they are applied again after the topology changes below.
+sheet.settings['param_rules'] = [{'column': 'line_tension', 'factor': 2, 'where': 'boundary'}]
+apply_param_rules(sheet)
 geom.update_all(sheet)
 
 fig, ax = plot_forces(sheet, geom, smodel, ['x', 'y'], scaling=0.1)
@@ -297,21 +273,8 @@ for t in time_points:
     
     # Mesh restructure check
     # T1 transition, edge rearrangment check
-    while True:
-    # Check for any edge below the threshold, starting from index 0 upwards
-        edge_to_process = None
-        for index in sheet.edge_df.index:
-            if sheet.edge_df.loc[index, 'length'] < t1_threshold:
-                edge_to_process = index
-                edge_length = sheet.edge_df.loc[edge_to_process,'length']
-                print(f'Edge {edge_to_process} is too short: {edge_length}')
-                # Process the identified edge with T1 transition
-                type1_transition(sheet, edge_to_process,remove_tri_faces=False, multiplier=1.5)
-                break  
-        # Exit the loop if no edges are below the threshold
-        if edge_to_process is None:
-            break
-    geom.update_all(sheet)
+    # All the short edges that do not share a face are transitioned together.
+    T1_sweep(sheet, t1_threshold, multiplier=1.5)
 
     # T2 transition check.
     tri_faces = sheet.face_df[(sheet.face_df["num_sides"] < 4) & 
@@ -453,6 +416,9 @@ for t in time_points:
     sheet.reset_index(order = True)
     geom.update_all(sheet)
     
+    # The topology may have changed above, apply the parameter rules again.
+    apply_param_rules(sheet)
+
     # Force computing and updating positions.
     valid_active_verts = sheet.active_verts[sheet.active_verts.isin(sheet.vert_df.index)]
     pos = sheet.vert_df.loc[valid_active_verts, sheet.coords].values
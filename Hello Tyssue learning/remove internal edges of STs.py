@@ -77,24 +77,12 @@ num_ct = num_x
 sheet.face_df.loc[0:num_ct-1, "cell_type"] = 'CT'
 sheet.face_df.loc[num_ct:, "cell_type"] = 'ST'
 
-# Then update the edge data frame via 'face' column.
-
-sheet.edge_df['cell_type'] = 'to be set'
-
-for i in list(range(len(sheet.edge_df))):
-    sheet.edge_df.loc[i, 'cell_type'] = sheet.face_df.loc[sheet.edge_df.loc[i,'face'],'cell_type']
-
-sheet.get_opposite()
-
-# First, filter rows where 'cell_type' is 'ST' and 'opposite' is not -1
-rows_to_drop = []
-for i in range(len(sheet.edge_df)):
-    if (sheet.edge_df['cell_type'].iloc[i] == 'ST') and (sheet.edge_df['opposite'].iloc[i] != -1):
-        rows_to_drop.append(i)
-
-# Drop all selected rows at once
-sheet.edge_df.drop(rows_to_drop, inplace=True)
+# The edges are not given a cell type, it is read from their face when
+# needed, with face_to_edge(sheet, 'cell_type').
 
+# Dissolve all the internal edges of the ST cells, they become one ST cell.
+dissolve_syncytium(sheet, sheet.face_df.index[sheet.face_df['cell_type'] == 'ST'])
+sheet.reset_index()
 geom.update_all(sheet)
 sheet_view(sheet)
 
@@ -114,20 +102,6 @@ ax.yaxis.set_visible(False)
 plt.show()
 
 
-fig, ax = sheet_view(sheet, edge = {'head_width':0.1})
-for face, data in sheet.vert_df.iterrows():
-    ax.text(data.x, data.y, face)
-    
-edge = sheet.edge_df[(sheet.edge_df['srce'] == 12)].index
-sheet.edge_df.loc[edge, 'srce'] = 13
-geom.update_all(sheet)
-fig, ax = sheet_view(sheet, edge = {'head_width':0.1})
-for face, data in sheet.vert_df.iterrows():
-    ax.text(data.x, data.y, face)
-
-edge2 = sheet.edge_df[(sheet.edge_df['trgt'] == 12)].index
-sheet.edge_df.loc[edge2, 'trgt'] = 30
-geom.update_all(sheet)
 fig, ax = sheet_view(sheet, edge = {'head_width':0.1})
 for face, data in sheet.vert_df.iterrows():
     ax.text(data.x, data.y, face)
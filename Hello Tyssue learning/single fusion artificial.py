@@ -87,12 +87,8 @@ num_ct = num_x
 sheet.face_df.loc[0:num_ct-1, "cell_type"] = 'CT'
 sheet.face_df.loc[num_ct:, "cell_type"] = 'ST'
 
-# Then update the edge data frame via 'face' column.
-
-sheet.edge_df['cell_type'] = 'to be set'
-
-for i in list(range(len(sheet.edge_df))):
-    sheet.edge_df.loc[i, 'cell_type'] = sheet.face_df.loc[sheet.edge_df.loc[i,'face'],'cell_type']
+# The edges are not given a cell type, it is read from their face when
+# needed, with face_to_edge(sheet, 'cell_type').
 
 # First, we need a way to compute the energy, then use gradient descent.
 specs = {
@@ -123,14 +119,11 @@ geom.update_all(sheet)
 sheet.get_opposite()
 
 # Fuse cell 9 and 29
-fusing_edge = neighbour_edge(sheet, 9, 29)
-
-new_id = edge_remover(sheet, fusing_edge)
-
+fuse_cells(sheet, [(9, 29)])
+# Face 9 is removed, so the indices above 9 go down by one after the reset.
+sheet.reset_index(order=True)
 geom.update_all(sheet)
 
-update_cell_type(sheet, new_id)
-
 fig, ax = sheet_view(sheet, edge = {'head_width':0.1})
 for face, data in sheet.face_df.iterrows():
     ax.text(data.x, data.y, face)
@@ -138,7 +131,7 @@ for face, data in sheet.face_df.iterrows():
 
 
 # Define the list of faces to check
-target_faces = [0, 19, 20, 39]
+target_faces = [0, 18, 19, 38]
 
 # Step 1: Identify edges associated with target faces
 edges_with_target_faces = sheet.edge_df[sheet.edge_df['face'].isin(target_faces)]
@@ -151,18 +144,14 @@ vertices_to_deactivate = pd.concat([edges_with_target_faces['srce'],
 sheet.vert_df.loc[sheet.vert_df.index.isin(vertices_to_deactivate), 'is_active'] = 0
 
 
-# Adjust for cell-boundary adhesion force.
-for i in sheet.edge_df.index:
-    if sheet.edge_df.loc[i, 'opposite'] == -1:
-        sheet.edge_df.loc[i, 'line_tension'] *=2
-    else:
-        continue
-
-for i in sheet.edge_df.index:
-    if sheet.edge_df.loc[i, 'cell_type'] == 'ST':
-        sheet.edge_df.loc[i, 'line_tension'] *=0.04
-    else:
-        continue
+# Adjust for cell-boundary adhesion force: the boundary edges have twice the
+# line tension and the ST edges 0.04 times, they are applied again after the
+# topology changes below.
+sheet.settings['param_rules'] = [
+    {'column': 'line_tension', 'factor': 2, 'where': 'boundary'},
+    {'column': 'line_tension', 'factor': 0.04, 'where': ('cell_type', 'ST')},
+]
+apply_param_rules(sheet)
 
 
 geom.update_all(sheet)
@@ -175,7 +164,7 @@ t2_threshold = sheet.face_df.loc[:,'area'].mean()/10
 division_threshold = sheet.face_df.loc[:,'area'].mean()*1.5
 growth_speed = sheet.face_df.loc[:,'area'].mean() *0.8
 max_movement = t1_threshold/2
-daughter = lateral_split(sheet, mother = 10)
+daughter = lateral_split(sheet, mother = 9)
 geom.update_all(sheet)
 sheet_view(sheet)
 # Now assume we want to go from t = 0 to t= 0.2, dt = 0.1
@@ -191,21 +180,8 @@ for t in time_points:
     
     # Mesh restructure check
     # T1 transition, edge rearrangment check
-    while True:
-    # Check for any edge below the threshold, starting from index 0 upwards
-        edge_to_process = None
-        for index in sheet.edge_df.index:
-            if sheet.edge_df.loc[index, 'length'] < t1_threshold:
-                edge_to_process = index
-                edge_length = sheet.edge_df.loc[edge_to_process,'length']
-                print(f'Edge {edge_to_process} is too short: {edge_length}')
-                # Process the identified edge with T1 transition
-                type1_transition(sheet, edge_to_process,remove_tri_faces=False, multiplier=1.5)
-                break  
-        # Exit the loop if no edges are below the threshold
-        if edge_to_process is None:
-            break
-    geom.update_all(sheet)
+    # All the short edges that do not share a face are transitioned together.
+    T1_sweep(sheet, t1_threshold, multiplier=1.5)
 
     # T2 transition check.
     tri_faces = sheet.face_df[(sheet.face_df["num_sides"] < 4) & 
@@ -219,6 +195,9 @@ for t in time_points:
     geom.update_all(sheet)
 
     
+    # The topology may have changed above, apply the parameter rules again.
+    apply_param_rules(sheet)
+
     # Force computing and updating positions.
     valid_active_verts = sheet.active_verts[sheet.active_verts.isin(sheet.vert_df.index)]
     pos = sheet.vert_df.loc[valid_active_verts, sheet.coords].values
@@ -7,11 +7,15 @@ Then I assemble them into a complete T3 transition main function.
 
 import numpy as np
 import pandas as pd
+from scipy.spatial import cKDTree
 
 from tyssue.topology.base_topology import collapse_edge, merge_vertices
 from tyssue import PlanarGeometry as geom
 
-from my_headers import put_vert
+from my_headers import (put_vert, put_verts, point_segment_distance, update_boundary,
+                        update_geometry_local)
+from adjacency_index import (edge_between, half_edge, vert_edges, vert_faces, vert_neighbours,
+                             face_edges, patch_adjacency, invalidate_adjacency)
 
     
 
@@ -42,34 +46,21 @@ def dist_computer(sheet, edge, vert, d_sep):
 
     """
     # Extract the coordinate of the srce and trgt point.
-    edge_end1 = sheet.edge_df.loc[edge,['srce']]
-    edge_end2 = sheet.edge_df.loc[edge,['trgt']]
-    end1_position = sheet.vert_df.loc[edge_end1, ['x','y']].to_numpy(dtype = float).flatten()
-    end2_position = sheet.vert_df.loc[edge_end2, ['x','y']].to_numpy(dtype = float).flatten()
-    # The line is from the end1 to end2.
-    line = np.round(end2_position - end1_position,7)
-    line_length = np.round(np.linalg.norm(line),7)
-    line_unit = line /line_length
-    
+    edge_end1, edge_end2 = sheet.edge_df.loc[edge, ['srce', 'trgt']]
+    end1_position = sheet.vert_df.loc[edge_end1, ['x','y']].to_numpy(dtype = float)
+    end2_position = sheet.vert_df.loc[edge_end2, ['x','y']].to_numpy(dtype = float)
     # Now extract the coordinate of the point.
-    point = sheet.vert_df.loc[vert,['x','y']].to_numpy(dtype=float).flatten()
-    # adjust the coordinate of the point with regards to the srce.
-    # then take the unit vector of it.
-    srce_p = np.round(point-end1_position, 7)
-    srce_p_scaled = srce_p/line_length
-    dot = np.dot(srce_p_scaled, line_unit)
-    if dot <0:
-        distance = np.round(np.linalg.norm(point-end1_position),7)
+    point = sheet.vert_df.loc[vert,['x','y']].to_numpy(dtype=float)
+    distance, t, nearest = point_segment_distance(end1_position, end2_position, point)
+    # If the closest point is one of the endpoints, the nearest point is
+    # moved d_sep inside the edge.
+    line_unit = end2_position - end1_position
+    line_unit = line_unit/np.linalg.norm(line_unit)
+    if t == 0:
         nearest = end1_position + d_sep*line_unit
-        return distance, nearest
-    elif dot >1:
-        distance = np.round(np.linalg.norm(point-end2_position),7)
+    elif t == 1:
         nearest = end2_position - d_sep*line_unit
-        return distance, nearest
-    else:
-        nearest =  end1_position + dot * line_unit
-        distance = np.round(np.linalg.norm(nearest-point),7)
-        return distance, nearest
+    return float(distance), nearest
 
 
 
@@ -83,19 +74,12 @@ def get_edge_id(sheet, vert1, vert2):
     - vert2: ID of the second vertex.
     
     Returns:
-    - The edge ID if an edge exists between the two vertices.
+    - The edge ID if an edge exists between the two vertices, the one going
+      from vert1 to vert2 if there is one.
     - None if no edge exists between vert1 and vert2.
     """
-    # Find the edge where (vert1, vert2) or (vert2, vert1) are the endpoints
-    edge = sheet.edge_df[
-        ((sheet.edge_df['srce'] == vert1) & (sheet.edge_df['trgt'] == vert2)) |
-        ((sheet.edge_df['srce'] == vert2) & (sheet.edge_df['trgt'] == vert1))
-    ]
-    
-    if not edge.empty:
-        return edge.index[0]  # Return the edge ID (index)
-    
-    return None  # Return None if no edge is found
+    # Looked up in the adjacency index, see adjacency_index.py
+    return edge_between(sheet, vert1, vert2)
 
 
 
@@ -108,24 +92,15 @@ def adjacency_check(sheet, edge, vert):
     end2_id = sheet.edge_df.loc[edge, 'trgt']
     
     # Find adjacent edge to end1
-    adjacent_edge_to_end1 = sheet.edge_df[
-        ((sheet.edge_df['srce'] == end1_id) & (sheet.edge_df['trgt'] == vert)) |
-        ((sheet.edge_df['srce'] == vert) & (sheet.edge_df['trgt'] == end1_id))
-    ]
-    
-    if not adjacent_edge_to_end1.empty:
-        return 1, adjacent_edge_to_end1.iloc[0].name
+    adjacent_edge_to_end1 = edge_between(sheet, end1_id, vert)
+    if adjacent_edge_to_end1 is not None:
+        return 1, adjacent_edge_to_end1
     
     # Find adjacent edge to end2
-    adjacent_edge_to_end2 = sheet.edge_df[
-        ((sheet.edge_df['srce'] == end2_id) & (sheet.edge_df['trgt'] == vert)) |
-        ((sheet.edge_df['srce'] == vert) & (sheet.edge_df['trgt'] == end2_id))
-    ]
-    
-    if not adjacent_edge_to_end2.empty:
-        return 2, adjacent_edge_to_end2.iloc[0].name
+    adjacent_edge_to_end2 = edge_between(sheet, end2_id, vert)
+    if adjacent_edge_to_end2 is not None:
+        return 2, adjacent_edge_to_end2
 
-    
     # Return None if no adjacent edge is found
     return None
 
@@ -155,8 +130,10 @@ def merge_unconnected_verts(sheet,vert1, vert2):
     sheet.edge_df.loc[sheet.edge_df.index[-1],'srce'] = vert1
     sheet.edge_df.loc[sheet.edge_df.index[-1],'trgt'] = vert2
     
-    # Collapse the new edge.
-    return collapse_edge(sheet, sheet.edge_df.index[-1], reindex=False, allow_two_sided=True)
+    # Collapse the new edge, collapse_edge is tyssue's.
+    merged = collapse_edge(sheet, sheet.edge_df.index[-1], reindex=False, allow_two_sided=True)
+    invalidate_adjacency(sheet)
+    return merged
     
     # Note: Then need to sheet.reset_index(), then geom.update_all(sheet).
 
@@ -196,13 +173,11 @@ def insert_into_edge(sheet, edge, vert, position):
     cut_vert, cut_edge, cut_op_edge = put_vert(sheet, edge, position)
 
     # Update the edge df entries, replace 'vert' by 'cut_vert'
-    for i in sheet.edge_df.index:
-        if sheet.edge_df.loc[i,'srce'] == vert:
-            sheet.edge_df.loc[i,'srce'] = cut_vert
-        if sheet.edge_df.loc[i, 'trgt'] == vert:
-            sheet.edge_df.loc[i,'trgt'] = cut_vert
-        else:
-            continue
+    edges = list(vert_edges(sheet, vert))
+    for end in ['srce', 'trgt']:
+        column = sheet.edge_df.loc[edges, end]
+        sheet.edge_df.loc[column.index[column == vert], end] = cut_vert
+    patch_adjacency(sheet, edges)
     return cut_vert
     # Need to follow a sheet.reset_index() to remove the old vertex.
 
@@ -226,6 +201,29 @@ def del_iso_vert(sheet):
 
 
 
+def _last_half_edge(sheet, vert1, vert2):
+    """
+    Returns the last of the half-edges between vert1 and vert2 (the largest
+    ID), or None if they are not connected.
+    """
+    edges = [half_edge(sheet, vert1, vert2), half_edge(sheet, vert2, vert1)]
+    edges = [e for e in edges if e is not None]
+    return max(edges) if edges else None
+
+
+def _reconnect(sheet, vert, old_end, new_end):
+    """
+    Moves the end of the edges between vert and old_end from old_end to
+    new_end.
+    """
+    edges = [half_edge(sheet, vert, old_end), half_edge(sheet, old_end, vert)]
+    if edges[0] is not None:
+        sheet.edge_df.loc[edges[0], 'trgt'] = new_end
+    if edges[1] is not None:
+        sheet.edge_df.loc[edges[1], 'srce'] = new_end
+    patch_adjacency(sheet, [e for e in edges if e is not None])
+
+
 def resolve_local(sheet, end1, end2, midvert, d_sep):
     """
     end1, end2, midvert are IDs of vertices. Midvert is the middle vertex that
@@ -246,14 +244,7 @@ def resolve_local(sheet, end1, end2, midvert, d_sep):
 
     """
     # Collect all the vertices that are connected to the vertex.
-    associated_vert = set()
-    for i in sheet.edge_df.index:
-        srce = sheet.edge_df.loc[i, 'srce']
-        trgt = sheet.edge_df.loc[i, 'trgt']
-        if srce == midvert and trgt not in {end1, end2}:
-            associated_vert.add(trgt)
-        elif trgt == midvert and srce not in {end1, end2}:
-            associated_vert.add(srce)
+    associated_vert = vert_neighbours(sheet, midvert) - {end1, end2}
 
     # Use midvert -> end1 to get a principle unit vector.
     end1_coord = sheet.vert_df.loc[end1,['x','y']].to_numpy(dtype=float)
@@ -291,20 +282,9 @@ def resolve_local(sheet, end1, end2, midvert, d_sep):
     the distance between midvert and current element is then d_sep*abs(element_index-mid_index)
     '''
     # First, get the ID of the edge formed by midvert and end1.
-    # Initialize edge1 and edge2 to None, in case they are not found
-    edge1 = None
-    edge2 = None
-    
-    for i in sheet.edge_df.index:
-        # Check for the edge formed by end1 and midvert
-        if (sheet.edge_df.loc[i, 'srce'] == end1 and sheet.edge_df.loc[i, 'trgt'] == midvert) or \
-           (sheet.edge_df.loc[i, 'srce'] == midvert and sheet.edge_df.loc[i, 'trgt'] == end1):
-            edge1 = i
-    
-        # Check for the edge formed by end2 and midvert
-        if (sheet.edge_df.loc[i, 'srce'] == end2 and sheet.edge_df.loc[i, 'trgt'] == midvert) or \
-             (sheet.edge_df.loc[i, 'srce'] == midvert and sheet.edge_df.loc[i, 'trgt'] == end2):
-            edge2 = i
+    # If both half-edges exist, the last one in edge_df is used.
+    edge1 = _last_half_edge(sheet, end1, midvert)
+    edge2 = _last_half_edge(sheet, end2, midvert)
     
     # Ensure both edges are found before proceeding
     if edge1 is None or edge2 is None:
@@ -314,6 +294,9 @@ def resolve_local(sheet, end1, end2, midvert, d_sep):
     print(f'middle index is: {middle_index}')
     
     
+    # The positions of the new vertices, on edge1 before the middle index
+    # and on edge2 after it. They are all put with one put_verts.
+    moved, edges, positions = [], [], []
     for element_index, vertex_id in enumerate(sorted_keys):
         print(f'Now resolving vert {vertex_id}')
         if element_index == middle_index:
@@ -321,28 +304,19 @@ def resolve_local(sheet, end1, end2, midvert, d_sep):
 
         if element_index < middle_index:
             print(f'element index: {element_index} < middle index')
-            edge_consider = edge1
-            position = mid_coord + d_sep * abs(middle_index - element_index) * principle_unit
-            # Put the new vertex on the edge and update edge_df
-            new_vert = put_vert(sheet, edge_consider, position)[0]
-            print(f'put a new vertex: {new_vert}')
-            for e_id in sheet.edge_df.index:
-                if sheet.edge_df.loc[e_id, 'srce'] == vertex_id and sheet.edge_df.loc[e_id,'trgt'] == midvert:
-                    sheet.edge_df.loc[e_id, 'trgt'] = new_vert
-                if sheet.edge_df.loc[e_id, 'trgt'] == vertex_id and sheet.edge_df.loc[e_id, 'srce'] == midvert:
-                    sheet.edge_df.loc[e_id, 'srce'] = new_vert
+            edges.append(edge1)
+            positions.append(mid_coord + d_sep * abs(middle_index - element_index) * principle_unit)
         if element_index > middle_index:
             print(f'element index: {element_index} > middle index')
-            edge_consider = edge2
-            position = mid_coord - d_sep * abs(element_index - middle_index) * principle_unit
-            # Put the new vertex on the edge and update edge_df
-            new_vert = put_vert(sheet, edge_consider, position)[0]
-            print(f'put a new vertex: {new_vert}')
-            for e_id in sheet.edge_df.index:
-                if sheet.edge_df.loc[e_id, 'srce'] == vertex_id and sheet.edge_df.loc[e_id,'trgt'] == midvert:
-                    sheet.edge_df.loc[e_id, 'trgt'] = new_vert
-                if sheet.edge_df.loc[e_id, 'trgt'] == vertex_id and sheet.edge_df.loc[e_id, 'srce'] == midvert:
-                    sheet.edge_df.loc[e_id, 'srce'] = new_vert
+            edges.append(edge2)
+            positions.append(mid_coord - d_sep * abs(element_index - middle_index) * principle_unit)
+        moved.append(vertex_id)
+    if not moved:
+        return
+    new_verts = put_verts(sheet, edges, positions)[0]
+    for vertex_id, new_vert in zip(moved, new_verts):
+        print(f'put a new vertex: {new_vert}')
+        _reconnect(sheet, vertex_id, midvert, new_vert)
     
     # Then need to:
         # sheet.reset_index()
@@ -364,14 +338,7 @@ def resolve_local_adj(sheet, merged_vert, old_vert, d_sep):
     
     """
     # Collect all the vertices that are connected to the vertex.
-    associated_vert = set()
-    for i in sheet.edge_df.index:
-        srce = sheet.edge_df.loc[i, 'srce']
-        trgt = sheet.edge_df.loc[i, 'trgt']
-        if srce == merged_vert and trgt != old_vert:
-            associated_vert.add(trgt)
-        elif trgt == merged_vert and srce != old_vert:
-            associated_vert.add(srce)
+    associated_vert = vert_neighbours(sheet, merged_vert) - {old_vert}
 
     # Use to get a principle unit vector, arrow from merged_vert to old_vert.
     old_coord = sheet.vert_df.loc[old_vert,['x','y']].to_numpy(dtype=float)
@@ -401,16 +368,15 @@ def resolve_local_adj(sheet, merged_vert, old_vert, d_sep):
     # [len(sorted_keys)-1-element_index] * d_sep.
     
     # First, we need to know which edge is connecting id_kept and the old_vert.
-    edge_between = get_edge_id(sheet, merged_vert , old_vert )
-    for element_index, vertex_id in enumerate(sorted_keys):
-        # Put the new vertex on the edge and update edge_df
-        position = merged_coord + principle_unit*d_sep*(len(sorted_keys) -1 -element_index )
-        new_vert = put_vert(sheet, edge_between, position)[0]
-        for e_id in sheet.edge_df.index:
-            if sheet.edge_df.loc[e_id, 'srce'] == vertex_id and sheet.edge_df.loc[e_id,'trgt'] == merged_vert:
-                sheet.edge_df.loc[e_id, 'trgt'] = new_vert
-            if sheet.edge_df.loc[e_id, 'trgt'] == vertex_id and sheet.edge_df.loc[e_id,'srce'] == merged_vert :
-                sheet.edge_df.loc[e_id, 'srce'] = new_vert
+    edge_shared = get_edge_id(sheet, merged_vert , old_vert )
+    if not sorted_keys:
+        return
+    # Put all the new vertices on the edge with one put_verts.
+    positions = [merged_coord + principle_unit*d_sep*(len(sorted_keys) -1 -element_index )
+                 for element_index in range(len(sorted_keys))]
+    new_verts = put_verts(sheet, [edge_shared]*len(sorted_keys), positions)[0]
+    for vertex_id, new_vert in zip(sorted_keys, new_verts):
+        _reconnect(sheet, vertex_id, merged_vert, new_vert)
 
 
 
@@ -436,7 +402,15 @@ def T3_swap(sheet, edge_collide, vert_incoming, nearest_coord, d_sep):
                     insert_into_edge(sheet, edge, incoming vert, position = nearest)
                     resolve_local
 
+    Returns
+    -------
+    The IDs of the vertices added by the swap. The sheet is not reindexed
+    and its geometry is not updated.
+
     """
+    # Store the vertices involved, for the boundary tracking.
+    last_vert = sheet.vert_df.index.max()
+    involved = [vert_incoming, *sheet.edge_df.loc[edge_collide, ['srce', 'trgt']]]
     # First, determine the adjacency.
     result = adjacency_check(sheet, edge_collide, vert_incoming)
     if result is None:
@@ -465,7 +439,7 @@ def T3_swap(sheet, edge_collide, vert_incoming, nearest_coord, d_sep):
             print(f'changed position of vert {ep2}')
             # The id of the vertex after collapse is the smaller id of the vertices.
             id_kept = min(sheet.edge_df.loc[edge_connection,['srce','trgt']] )
-            collapse_edge(sheet, edge_connection, reindex=False, allow_two_sided=False)
+            _collapse_patched(sheet, edge_connection)
             # The new edge is formed by id_kept and ep1.
             edge_new = get_edge_id(sheet, id_kept, ep1)
             #resolve_local_adj(sheet, id_kept, ep1, d_sep)
@@ -475,14 +449,274 @@ def T3_swap(sheet, edge_collide, vert_incoming, nearest_coord, d_sep):
             sheet.vert_df.loc[ep1, 'y'] = nearest_coord[1]
             print(f'changed position of vert {ep1}')
             id_kept = min(sheet.edge_df.loc[edge_connection,['srce','trgt']] )
-            collapse_edge(sheet, edge_connection, reindex=False, allow_two_sided=False)
+            _collapse_patched(sheet, edge_connection)
             # The new edge is formed by id_kept and ep2.
             edge_new = get_edge_id(sheet, id_kept, ep2)
             # Then resolve local.
             #resolve_local_adj(sheet, id_kept, ep2,  d_sep)
 
-    # sheet.reset_index()
-    # geom.update_all(sheet)
+    # Update the boundary around the swap, including the new vertices.
+    new_verts = [v for v in range(last_vert + 1, sheet.vert_df.index.max() + 1)
+                 if v in sheet.vert_df.index]
+    update_boundary(sheet, [*involved, *new_verts])
+    return new_verts
+
+
+def _collapse_patched(sheet, edge):
+    """
+    tyssue's collapse_edge, without reindex, then the adjacency index is
+    patched: the edges it rewires or drops (with the two sided faces) all
+    start or end at one of the ends of edge.
+    """
+    srce, trgt = sheet.edge_df.loc[edge, ['srce', 'trgt']]
+    changed = vert_edges(sheet, srce) | vert_edges(sheet, trgt)
+    collapse_edge(sheet, edge, reindex=False, allow_two_sided=False)
+    patch_adjacency(sheet, changed)
+
+
+
+def _boundary_mask(edge_df):
+    """ The boundary edges of edge_df, tracked or from 'opposite'. """
+    if 'is_boundary' in edge_df.columns:
+        return edge_df['is_boundary'].to_numpy(dtype=bool)
+    return edge_df['opposite'].to_numpy() == -1
+
+
+def boundary_tree(sheet):
+    """
+    Returns a KD-tree of the boundary vertices of the sheet, for
+    find_T3_collisions, with the ids of the vertices and the length of the
+    longest boundary edge.
+
+    It is built once per T3_sweep. The vertices changed since are passed to
+    find_T3_collisions as stale, the others are where the tree has them.
+    """
+    edge_df = sheet.edge_df
+    boundary = edge_df[_boundary_mask(edge_df)]
+    verts = np.unique(np.concatenate([boundary['srce'].to_numpy(), boundary['trgt'].to_numpy()]))
+    xy = sheet.vert_df[['x', 'y']].to_numpy(dtype=float)
+    index = sheet.vert_df.index
+    length = np.linalg.norm(xy[index.get_indexer(boundary['trgt'])]
+                            - xy[index.get_indexer(boundary['srce'])], axis=1)
+    return {'tree': cKDTree(xy[index.get_indexer(verts)].reshape(-1, 2)), 'verts': verts,
+            'max_length': length.max(initial=0)}
+
+
+def find_T3_collisions(sheet, d_min, d_sep, verts=None, tree=None, stale=()):
+    """
+    Finds all the boundary vertices that are closer than d_min to a boundary
+    edge they do not belong to, in one query.
+
+    The boundary vertices are stored in a KD-tree. Every boundary edge is
+    enclosed by a ball centred at its mid point, with radius half of its length
+    plus d_min, so only the vertices inside this ball need a distance check.
+    This replaces the loop over every boundary edge / boundary vertex pair.
+
+    Parameters
+    ----------
+    sheet : Eptm instance
+
+    d_min : float
+        Threshold distance for a T3 transition.
+    d_sep : float
+        Separation used for the nearest point when the closest point is one of
+        the endpoints of the edge, same as in dist_computer().
+    verts : iterable, optional
+        If given, only the collisions where the vertex or one of the
+        endpoints of the edge is in verts are returned, and only the
+        neighbourhood of verts is searched. Used to re-check the
+        neighbourhood of a swap only.
+    tree : dict, optional
+        from boundary_tree, built from the sheet if not given.
+    stale : iterable, optional
+        the vertices added, removed or moved since tree was built, they are
+        read from the sheet instead of the tree. They must include verts.
+
+    Returns
+    -------
+    A DataFrame with columns 'edge', 'vert', 'distance', 'nearest_x' and
+    'nearest_y', one row per collision, sorted by distance.
+
+    """
+    if tree is None:
+        tree = boundary_tree(sheet)
+    if verts is None:
+        edges, candidates = _all_candidates(sheet, d_min, tree)
+    else:
+        edges, candidates = _local_candidates(sheet, d_min, tree, verts, stale)
+    return _collisions(sheet, edges, candidates, d_min, d_sep)
+
+
+def _all_candidates(sheet, d_min, tree):
+    """ The (edge, vertex) pairs of the whole boundary that can collide. """
+    edge_df = sheet.edge_df
+    boundary = edge_df[_boundary_mask(edge_df)]
+    if boundary.empty:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    xy = sheet.vert_df[['x', 'y']].to_numpy(dtype=float)
+    index = sheet.vert_df.index
+    srce_pos = xy[index.get_indexer(boundary['srce'])]
+    trgt_pos = xy[index.get_indexer(boundary['trgt'])]
+    # Query the tree once with all the edge balls.
+    hits = tree['tree'].query_ball_point((srce_pos + trgt_pos) / 2,
+                                         r=np.linalg.norm(trgt_pos - srce_pos, axis=1) / 2 + d_min)
+    counts = np.array([len(h) for h in hits], dtype=int)
+    edges = np.repeat(boundary.index.to_numpy(), counts)
+    vert_loc = np.fromiter((v for h in hits for v in h), dtype=int, count=counts.sum())
+    return edges, tree['verts'][vert_loc]
+
+
+def _local_candidates(sheet, d_min, tree, verts, stale):
+    """
+    The (edge, vertex) pairs that can collide, where the vertex or an end of
+    the edge is in verts. Only the tree vertices near verts are looked at.
+    """
+    vert_df, edge_df = sheet.vert_df, sheet.edge_df
+    # The removed vertices stay in changed, so that the tree doesn't give them.
+    changed = np.asarray(sorted(set(stale) | set(verts)), dtype=int)
+    stale = {v for v in changed.tolist() if v in vert_df.index}
+    verts = {v for v in verts if v in vert_df.index}
+
+    def boundary_edges(around):
+        edges = sorted(set().union(*(vert_edges(sheet, v) for v in around)))
+        return np.asarray(edges, dtype=int)[_boundary_mask(edge_df.loc[edges])]
+
+    local_edges = boundary_edges(verts)
+    if not local_edges.size:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    local_ends = edge_df.loc[local_edges, ['srce', 'trgt']].to_numpy()
+    local_verts = np.intersect1d(local_ends, sorted(verts))
+    stale_verts = np.asarray(sorted(stale), dtype=int)
+    stale_edges = boundary_edges(stale)
+    stale_verts = np.intersect1d(stale_verts, edge_df.loc[stale_edges, ['srce', 'trgt']].to_numpy())
+    xy = vert_df[['x', 'y']].to_numpy(dtype=float)
+    index = vert_df.index
+
+    def far(hits):
+        # The tree vertices that were not changed since it was built.
+        found = tree['verts'][np.fromiter((v for h in hits for v in h), dtype=int)]
+        return np.setdiff1d(found, changed)
+
+    # The vertices near the local edges.
+    ends = xy[index.get_indexer(local_ends.ravel())].reshape(-1, 2, 2)
+    hits = tree['tree'].query_ball_point(ends.mean(axis=1),
+                                         r=np.linalg.norm(ends[:, 1] - ends[:, 0], axis=1) / 2 + d_min)
+    near_verts = np.union1d(far(hits), stale_verts)
+    pairs = [(np.repeat(local_edges, near_verts.size), np.tile(near_verts, local_edges.size))]
+
+    # The edges near the local vertices: an edge closer than d_min to a
+    # vertex has an end closer than its length plus d_min.
+    if local_verts.size:
+        hits = tree['tree'].query_ball_point(xy[index.get_indexer(local_verts)],
+                                             r=tree['max_length'] + d_min)
+        near_edges = np.union1d(boundary_edges(far(hits).tolist()), stale_edges)
+        pairs.append((np.repeat(near_edges, local_verts.size), np.tile(local_verts, near_edges.size)))
+
+    edges = np.concatenate([p[0] for p in pairs])
+    candidates = np.concatenate([p[1] for p in pairs])
+    # The two searches can find the same pair.
+    unique = np.unique(np.column_stack([edges, candidates]), axis=0)
+    return unique[:, 0], unique[:, 1]
+
+
+def _collisions(sheet, edges, candidates, d_min, d_sep):
+    """ The distance check of the candidate pairs, see find_T3_collisions. """
+    columns = ['edge', 'vert', 'distance', 'nearest_x', 'nearest_y']
+    ends = sheet.edge_df.loc[edges, ['srce', 'trgt']].to_numpy().reshape(-1, 2)
+    # A vertex does not collide with its own edge.
+    keep = (candidates != ends[:, 0]) & (candidates != ends[:, 1])
+    edges, candidates, ends = edges[keep], candidates[keep], ends[keep]
+    if not edges.size:
+        return pd.DataFrame(columns=columns)
+    xy = sheet.vert_df[['x', 'y']].to_numpy(dtype=float)
+    index = sheet.vert_df.index
+    srce_pos, trgt_pos = xy[index.get_indexer(ends[:, 0])], xy[index.get_indexer(ends[:, 1])]
+
+    # Clamped projection of every candidate vertex onto its edge.
+    distance, t, nearest = point_segment_distance(srce_pos, trgt_pos, xy[index.get_indexer(candidates)])
+    # Same convention as dist_computer(): when the nearest point is an
+    # endpoint, it is moved d_sep inside the edge.
+    line = trgt_pos - srce_pos
+    line_unit = line / np.linalg.norm(line, axis=1)[:, None]
+    nearest[t == 0] += d_sep * line_unit[t == 0]
+    nearest[t == 1] -= d_sep * line_unit[t == 1]
+
+    close = distance < d_min
+    collisions = pd.DataFrame({
+        'edge': edges[close],
+        'vert': candidates[close],
+        'distance': distance[close],
+        'nearest_x': nearest[close, 0],
+        'nearest_y': nearest[close, 1],
+    }, columns=columns)
+    return collisions.sort_values(['distance', 'edge', 'vert'], ignore_index=True)
+
+
+
+def T3_sweep(sheet, d_min, d_sep):
+    """
+    Detects and resolves all the T3 transitions of the sheet.
+
+    Logic:
+        1) find_T3_collisions() returns all the collisions at once.
+        2) Go through the collisions from the closest. A collision is skipped
+        if any of its vertices, or their neighbours, has been touched by a
+        swap of this round. The IDs don't change during the sweep, only the
+        geometry of the faces around each swap is updated.
+        3) Only the neighbourhood of the swaps is checked again, with the
+        KD-tree of the start of the sweep, until no more collisions are found.
+        4) The sheet is reindexed once at the end, if there was a swap.
+
+    Returns
+    -------
+    swaps : list of the (edge, vert) ID pairs of the swaps, with the IDs as
+        they were before the sweep.
+    touched : Index of the vertices around the swaps, with the IDs after the
+        sweep, e.g. for apply_param_rules.
+
+    """
+    swaps = []
+    tree = boundary_tree(sheet)
+    # All the vertices changed since the tree was built.
+    stale = set()
+    collisions = find_T3_collisions(sheet, d_min, d_sep, tree=tree)
+    while len(collisions):
+        touched = set()
+        for row in collisions.itertuples(index=False):
+            if row.edge not in sheet.edge_df.index or row.vert not in sheet.vert_df.index:
+                continue
+            srce, trgt = sheet.edge_df.loc[row.edge, ['srce', 'trgt']]
+            involved = {row.vert, srce, trgt}
+            if involved & touched:
+                continue
+            # Mark the 1-ring of the swap as touched before it is changed.
+            ring = set(involved)
+            for vert in involved:
+                ring |= vert_neighbours(sheet, vert)
+
+            print(f'Found incoming vertex: {row.vert} and colliding edge: {row.edge}')
+            ring |= set(T3_swap(sheet, row.edge, row.vert, [row.nearest_x, row.nearest_y], d_sep))
+            # ring keeps the vertices removed by the swap, for the tree.
+            faces = set().union(*(vert_faces(sheet, vert) for vert in ring))
+            update_geometry_local(sheet, faces, sorted(set().union(*(face_edges(sheet, f) for f in faces))))
+            touched |= ring
+            swaps.append((row.edge, row.vert))
+
+        # Check again around the swaps only.
+        stale |= touched
+        collisions = find_T3_collisions(sheet, d_min, d_sep, verts=touched, tree=tree, stale=stale)
+
+    if not swaps:
+        return swaps, sheet.vert_df.index[:0]
+    # One reindex for the whole sweep, the vertices left without edges by
+    # insert_into_edge are dropped.
+    sheet.vert_df['_T3_touched'] = sheet.vert_df.index.isin(list(stale))
+    sheet.reset_index(order=False)
+    invalidate_adjacency(sheet)
+    sheet.get_extra_indices()
+    touched = sheet.vert_df.index[sheet.vert_df['_T3_touched'].to_numpy(dtype=bool)]
+    sheet.vert_df.drop(columns='_T3_touched', inplace=True)
+    return swaps, touched
 
 
 
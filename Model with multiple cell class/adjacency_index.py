@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Hash index of the half-edges of a sheet, to answer "which edge connects u
+and v", "which edges/faces contain v" and "which edges make face f" with
+dictionary lookups instead of boolean masks over the whole edge_df.
+
+The index is built once, the first time it is asked for, and stored on the
+sheet with the edge_df it was read from and its index (the objects, not
+copies). If either was replaced since, e.g. by sheet.reset_index() or a
+concatenation, the index is built again at the next query. Rows or ids
+changed in place are not seen: the functions that change the topology
+tell the index which edges they changed. The ones in this repo (put_verts,
+the divisions, fuse_cells, edge_remover, collapse_edge, the T1, T2 and T3
+sweeps) do it with patch_adjacency, which only reads these edges again.
+After other in place changes of srce, trgt or face (e.g. tyssue's
+type1_transition with reindex=False) call invalidate_adjacency.
+"""
+import numpy as np
+
+
+def adjacency(sheet):
+    """
+    Returns the adjacency index of the sheet, built from edge_df if there is
+    none.
+
+    The index is a dictionary with:
+        'pair': {(srce, trgt): edge}
+        'vert': {vertex: set of the edges that start or end at the vertex}
+        'face': {face: set of the edges of the face}
+        'edge': {edge: (srce, trgt, face)}
+        'changed': set of the faces whose edges were patched since the index
+            was built, for face_adjacency, which empties it.
+    """
+    index = getattr(sheet, '_adjacency', None)
+    if index is None or not _is_current(sheet):
+        index = {'pair': {}, 'vert': {}, 'face': {}, 'edge': {}}
+        edge_df = sheet.edge_df
+        rows = np.column_stack([edge_df[c].to_numpy() for c in ('srce', 'trgt', 'face')]).tolist()
+        for edge, row in zip(edge_df.index.tolist(), rows):
+            _add(index, edge, *row)
+        index['changed'] = set()
+        sheet._adjacency = index
+        sheet._adjacency_key = (edge_df, edge_df.index)
+    return index
+
+
+def _is_current(sheet):
+    """ Whether edge_df and its index are the ones the index was read from. """
+    key = getattr(sheet, '_adjacency_key', None)
+    return key is not None and key[0] is sheet.edge_df and key[1] is sheet.edge_df.index
+
+
+def patch_adjacency(sheet, edges):
+    """
+    Reads the edges again from edge_df after they were changed, added or
+    dropped, the other edges of the index are not looked at. Does nothing
+    if the index is not built yet. The index is then taken to match the
+    current edge_df, so all the changes made since the last patch must be
+    among these edges.
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    edges : iterable of int, the ids of the edges
+    """
+    index = getattr(sheet, '_adjacency', None)
+    if index is None:
+        return
+    edges = np.unique(np.asarray(list(edges), dtype=int))
+    for edge in edges.tolist():
+        old = index['edge'].get(edge)
+        if old is not None:
+            _remove(index, edge, *old)
+            index['changed'].add(old[2])
+    # The dropped edges are not added back.
+    edge_df = sheet.edge_df
+    rows = edge_df.index.get_indexer(edges)
+    edges, rows = edges[rows >= 0], rows[rows >= 0]
+    if edges.size:
+        rows = np.column_stack([edge_df[c].to_numpy()[rows] for c in ('srce', 'trgt', 'face')]).tolist()
+        for edge, row in zip(edges.tolist(), rows):
+            _add(index, edge, *row)
+            index['changed'].add(row[2])
+    sheet._adjacency_key = (edge_df, edge_df.index)
+
+
+def invalidate_adjacency(sheet):
+    """
+    Drops the index of the sheet, e.g. after srce, trgt or face were
+    changed in place by a function that does not patch it.
+    """
+    sheet._adjacency = None
+    sheet._adjacency_key = None
+
+
+def _add(index, edge, srce, trgt, face):
+    index['pair'][(srce, trgt)] = edge
+    index['vert'].setdefault(srce, set()).add(edge)
+    index['vert'].setdefault(trgt, set()).add(edge)
+    index['face'].setdefault(face, set()).add(edge)
+    index['edge'][edge] = (srce, trgt, face)
+
+
+def _remove(index, edge, srce, trgt, face):
+    if index['pair'].get((srce, trgt)) == edge:
+        del index['pair'][(srce, trgt)]
+    for key, elem in (('vert', srce), ('vert', trgt), ('face', face)):
+        edges = index[key].get(elem)
+        if edges is not None:
+            edges.discard(edge)
+            if not edges:
+                del index[key][elem]
+    index['edge'].pop(edge, None)
+
+
+def edge_between(sheet, vert1, vert2):
+    """
+    Returns the ID of a half-edge connecting vert1 and vert2, the one going
+    from vert1 to vert2 if there is one, or None if they are not connected.
+    """
+    pair = adjacency(sheet)['pair']
+    edge = pair.get((vert1, vert2))
+    if edge is None:
+        edge = pair.get((vert2, vert1))
+    return edge
+
+
+def half_edge(sheet, srce, trgt):
+    """
+    Returns the ID of the half-edge going from srce to trgt, or None.
+    """
+    return adjacency(sheet)['pair'].get((srce, trgt))
+
+
+def vert_edges(sheet, vert):
+    """
+    Returns the set of the half-edges that start or end at vert.
+    """
+    return set(adjacency(sheet)['vert'].get(vert, ()))
+
+
+def vert_faces(sheet, vert):
+    """
+    Returns the set of the faces that contain vert.
+    """
+    index = adjacency(sheet)
+    return {index['edge'][e][2] for e in index['vert'].get(vert, ())}
+
+
+def face_edges(sheet, face):
+    """
+    Returns the set of the half-edges of face.
+    """
+    return set(adjacency(sheet)['face'].get(face, ()))
+
+
+def vert_neighbours(sheet, vert):
+    """
+    Returns the set of the vertices connected to vert by an edge.
+    """
+    index = adjacency(sheet)
+    ends = set()
+    for e in index['vert'].get(vert, ()):
+        ends.update(index['edge'][e][:2])
+    ends.discard(vert)
+    return ends
@@ -16,13 +16,15 @@ import matplotlib.pyplot as plt
 from tyssue import Sheet
 from tyssue import PlanarGeometry as geom #for simple 2d geometry
 from tyssue.dynamics import effectors, model_factory
+from tyssue.topology.sheet_topology import cell_division
 
 # 2D plotting
 from tyssue.draw import sheet_view
-from tyssue.topology.sheet_topology import cell_division
 
 # import my own functions
 import my_headers as mh
+from cell_cycle import set_cell_classes, time_driven_cycle_step
+from incremental_geometry import update_geometry
 
 rng = np.random.default_rng(70)    # Seed the random number generator.
 
@@ -60,16 +62,11 @@ print('Initial geometry plot generated. \n')
 
 
 # Add a new attribute to the face_df, called "cell class"
-sheet.face_df['cell_class'] = 'default'
-sheet.face_df['timer'] = 'NA'
 total_cell_num = len(sheet.face_df)
+# The bottom layer (indices 0 to num_x-3) is "S", the top layer is "STB".
+set_cell_classes(sheet, ['S']*(num_x-2) + ['STB']*(total_cell_num-num_x+2))
 
 print('New attributes: cell_class; timer created for all cells. \n ')
-for i in range(0,num_x-2):  # These are the indices of bottom layer.
-    sheet.face_df.loc[i,'cell_class'] = 'S'
-
-for i in range(num_x-2,len(sheet.face_df)):     # These are the indices of top layer.
-    sheet.face_df.loc[i,'cell_class'] = 'STB'
 
 print(f'There are {total_cell_num} total cells; equally split into "S" and "STB" classes. ')
 
@@ -94,56 +91,33 @@ t = t_0
 cell1_class = sheet.face_df.loc[1,'cell_class']
 print(f'Cell 1 is in class: "{cell1_class}" at t=0.')
 
+
+def divide_M_cells(sheet, cells):
+    """
+    Divides the cells in "M" with tyssue's cell_division, with no orientation preference.
+
+    Not with my_headers.divide_cells: cell_division cuts along a random
+    direction through the centroid, divide_cells cuts from the middle of a
+    random edge and adds a vertex at the centroid, so the divisions of this
+    model would change. There are only a few "M" cells per step.
+    """
+    daughters = {}
+    for cell in cells:
+        daughter = cell_division(sheet, cell, geom)
+        if daughter is not None:
+            daughters[cell] = daughter
+    return daughters
+
+
 while t <= t_end:
-    # Select all mature "S" cells.
-    S_cells = sheet.face_df.index[sheet.face_df['cell_class'] == 'S'].tolist()
-
-    for cell in S_cells:
-        # Use rng to randomly generate a number between 1 and 10, this will determine the fate of the mature CT.
-        cell_fate_roulette = rng.random()
-        if cell_fate_roulette <= 0.1:
-            sheet.face_df.loc[cell, 'cell_class'] = 'G2'
-            if cell == 1:
-                print(f'Cell 1 enter "G2" at time {t}. ')
-            # Add a timer for each cell enters "G2".
-            sheet.face_df.loc[cell, 'timer'] = 0.4
-        else:
-            continue
-    geom.update_all(sheet)
-
-    # At the end of the timer, "G2" becomes "M".
-    G2_cells = sheet.face_df.index[sheet.face_df['cell_class'] == 'G2'].tolist()
-    for cell in G2_cells:
-        if sheet.face_df.loc[cell, 'timer'] < 0:
-            sheet.face_df.loc[cell, 'cell_class'] = 'M'
-            if cell == 1:
-                print(f'Cell 1 enter "M" at time {t}. ')
-        else:
-            sheet.face_df.loc[cell, 'timer'] -= dt
-
-# For all cells in "M", divide the cell with no orientation preference. Then cells becomes "G1".
-    M_cells = sheet.face_df.index[sheet.face_df['cell_class'] == 'M'].tolist()
-    for cell in M_cells:
-        daugther = cell_division(sheet, cell, geom)
-        sheet.face_df.loc[cell, 'cell_class'] = 'G1'
-        sheet.face_df.loc[daugther, 'cell_class'] = 'G1'
-        if cell == 1:
-            print(f'Cell 1 enter "G1" at time {t}. ')
-        # Add a timer for each cell enters "G1".
-        sheet.face_df.loc[cell, 'timer'] = 0.11
-        sheet.face_df.loc[daugther, 'timer'] = 0.11
-
-    geom.update_all(sheet)
-
-    # At the end of the timer, "G1" class becomes "S".
-    G1_cells = sheet.face_df.index[sheet.face_df['cell_class'] == 'G1'].tolist()
-    for cell in G1_cells:
-        if sheet.face_df.loc[cell, 'timer'] < 0:
-            sheet.face_df.loc[cell, 'cell_class'] = 'S'
-            if cell == 1:
-                print(f'Cell 1 enter "S" at time {t}. ')
-        else:
-            sheet.face_df.loc[cell, 'timer'] -= dt
+    # "S" -> "G2" with probability 0.1, "G2" -> "M" at the end of the timer,
+    # "M" cells divide and become "G1", "G1" -> "S" at the end of the timer.
+    entered = time_driven_cycle_step(sheet, rng, dt, divide_M_cells, p_G2=0.1,
+                                     G2_duration=0.4, G1_duration=0.11)
+    for cell_class in ('G2', 'M', 'G1', 'S'):
+        if 1 in entered[cell_class]:
+            print(f'Cell 1 enter "{cell_class}" at time {t}. ')
+    update_geometry(sheet)
 
     # Force computing and updating positions.
     valid_active_verts = sheet.active_verts[sheet.active_verts.isin(sheet.vert_df.index)]
@@ -154,7 +128,7 @@ while t <= t_end:
     # Save the new positions back to `vert_df`
     sheet.vert_df.loc[valid_active_verts, sheet.coords] = new_pos
     # Update the position of vertices.
-    geom.update_all(sheet)
+    update_geometry(sheet)
 
     # Update time.
     t += dt
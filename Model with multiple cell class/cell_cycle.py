@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+The cell cycle clock: every cell has a timer face_df['T_cycle'] that counts
+down the time left in its mitosis cycle, a cell with T_cycle == 0 has
+completed its cycle (and can divide).
+
+The timers are counted down in integer ticks of the simulation clock (see
+sim_clock.py), in face_df['T_cycle_ticks'], so they don't drift, and
+T_cycle is written back as ticks * tick. The values written in T_cycle by
+other functions (e.g. the durations drawn at a division) are converted to
+ticks at the next step. All the cells are updated with one array operation
+per step.
+
+The cell classes (face_df['cell_class']) are stored as a categorical column
+with the categories in CELL_CLASSES, so the class transitions are computed
+on integer codes, for all the cells at once.
+"""
+import numpy as np
+import pandas as pd
+
+
+# STB for resting STB; STB-Ex for extruding stb; S for mature CT, G1 for
+# growing for division CT; M for CT undergoing division; G2 for CT growing
+# for maturity and F for fusing CT.
+CELL_CLASSES = ['default', 'STB', 'STB-Ex', 'S', 'G1', 'M', 'G2', 'F']
+
+
+def start_cell_cycle(sheet, durations=0.0):
+    """
+    Creates (or resets) the T_cycle column, as float64.
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    durations : float or array_like, optional
+        the starting value of the timers, default 0 (cycle completed).
+    """
+    sheet.face_df['T_cycle'] = np.broadcast_to(
+        np.asarray(durations, dtype=float), (sheet.Nf,)).copy()
+
+
+def draw_cycle_durations(rng, size):
+    """
+    Draws mitosis cycle durations, uniform in [10, 15] with 3 decimals.
+
+    Parameters
+    ----------
+    rng : numpy random generator
+    size : int or tuple of ints
+        the shape of the returned array
+
+    Returns
+    -------
+    ndarray of float64
+    """
+    return rng.integers(10000, 15000, size=size) / 1000
+
+
+def cycle_ticks(sheet, tick):
+    """
+    Returns the timers of all the cells in ticks, as int64.
+
+    T_cycle_ticks is created, and updated for the cells whose T_cycle was
+    written since the last call (it is no longer ticks * tick), by rounding
+    to the nearest tick.
+    """
+    face_df = sheet.face_df
+    timer = face_df['T_cycle'].to_numpy(dtype=float)
+    if 'T_cycle_ticks' in face_df.columns:
+        ticks = face_df['T_cycle_ticks'].to_numpy(dtype=np.int64).copy()
+        written = timer != ticks * tick
+    else:
+        ticks = np.zeros(timer.size, dtype=np.int64)
+        written = np.ones(timer.size, dtype=bool)
+    ticks[written] = np.rint(timer[written] / tick)
+    face_df['T_cycle_ticks'] = ticks
+    return ticks
+
+
+def advance_cell_cycle(sheet, dt_ticks, tick):
+    """
+    Counts the timers of all the running cells down by dt_ticks. The timers
+    that reach zero or below are set to zero.
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    dt_ticks : int
+        the time step, in ticks
+    tick : float
+        the length of a tick, see sim_clock.clock_ticks
+
+    Returns
+    -------
+    expired : Index, the cells whose cycle completed during this step.
+    """
+    ticks = cycle_ticks(sheet, tick)
+    running = ticks > 0
+    ticks = np.where(running, ticks - int(dt_ticks), 0)
+    expired = running & (ticks <= 0)
+    ticks[expired] = 0
+    sheet.face_df['T_cycle_ticks'] = ticks
+    sheet.face_df['T_cycle'] = ticks * tick
+    return sheet.face_df.index[expired]
+
+
+def cycle_completed(sheet):
+    """
+    Returns the index of the cells that have completed their cycle.
+    """
+    return sheet.face_df.index[sheet.face_df['T_cycle'].to_numpy(dtype=float) == 0]
+
+
+def set_cell_classes(sheet, classes='default'):
+    """
+    Creates (or resets) the categorical 'cell_class' column, and the float
+    'timer' column used by the time driven cycle (NaN for no timer).
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    classes : str or list of str, optional
+        the class of every cell, default 'default'.
+    """
+    classes = np.broadcast_to(np.asarray(classes, dtype=object), (sheet.Nf,))
+    sheet.face_df['cell_class'] = pd.Categorical(classes, categories=CELL_CLASSES)
+    sheet.face_df['timer'] = np.nan
+
+
+def _class_code(name):
+    return CELL_CLASSES.index(name)
+
+
+def _class_codes(face_df):
+    # The divide function may have added the daughters as plain objects.
+    return pd.Categorical(face_df['cell_class'], categories=CELL_CLASSES).codes.copy()
+
+
+def time_driven_cycle_step(sheet, rng, dt, divide, p_G2=0.1,
+                           G2_duration=0.4, G1_duration=0.11):
+    """
+    One time step of the time driven cell cycle S -> G2 -> M -> G1 -> S:
+        (1) every "S" cell enters "G2" with probability p_G2, with a timer
+            of G2_duration;
+        (2) the "G2" cells whose timer is below zero become "M", the timer of
+            the others goes down by dt;
+        (3) all the "M" cells are divided by divide, both cells become "G1"
+            with a timer of G1_duration. The "M" cells that divide could not
+            split go back to "G2" with a timer of G2_duration, and try again
+            when it ends;
+        (4) the "G1" cells whose timer is below zero become "S", the timer of
+            the others goes down by dt.
+    Each step is a few array operations on the class codes, with one random
+    draw for all the "S" cells.
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object, with the columns from set_cell_classes
+    rng : numpy random generator
+    dt : float
+        the time step
+    divide : function
+        divide(sheet, cells) divides the cells, and returns a dictionary
+        {mother: daughter} of the cells it divided, e.g.
+        my_headers.divide_cells.
+
+    Returns
+    -------
+    A dictionary {class: Index of the cells that entered the class}.
+    """
+    S, G2, M, G1 = (_class_code(c) for c in ('S', 'G2', 'M', 'G1'))
+    face_df = sheet.face_df
+    codes = _class_codes(face_df)
+    timer = face_df['timer'].to_numpy(dtype=float).copy()
+
+    # (1) S -> G2 with probability p_G2.
+    is_S = np.flatnonzero(codes == S)
+    to_G2 = is_S[rng.random(is_S.size) <= p_G2]
+    codes[to_G2] = G2
+    timer[to_G2] = G2_duration
+
+    # (2) G2 -> M at the end of the timer.
+    is_G2 = codes == G2
+    to_M = is_G2 & (timer < 0)
+    codes[to_M] = M
+    timer[is_G2 & ~to_M] -= dt
+    face_df['cell_class'] = pd.Categorical.from_codes(codes, categories=CELL_CLASSES)
+    face_df['timer'] = timer
+    entered = {'G2': face_df.index[to_G2], 'M': face_df.index[to_M]}
+
+    # (3) M cells divide, the mothers and daughters become G1.
+    M_cells = face_df.index[codes == M]
+    daughters = divide(sheet, M_cells) if len(M_cells) else {}
+    face_df = sheet.face_df
+    to_G1 = np.concatenate([list(daughters.keys()), list(daughters.values())]).astype(int)
+    codes = _class_codes(face_df)
+    timer = face_df['timer'].to_numpy(dtype=float).copy()
+    rows = face_df.index.get_indexer(to_G1)
+    codes[rows] = G1
+    timer[rows] = G1_duration
+    entered['G1'] = face_df.index[rows]
+    # The M cells that were not divided go back to G2.
+    back = face_df.index.get_indexer(M_cells.difference(list(daughters.keys())))
+    codes[back] = G2
+    timer[back] = G2_duration
+
+    # (4) G1 -> S at the end of the timer.
+    is_G1 = codes == G1
+    to_S = is_G1 & (timer < 0)
+    codes[to_S] = S
+    timer[is_G1 & ~to_S] -= dt
+    face_df['cell_class'] = pd.Categorical.from_codes(codes, categories=CELL_CLASSES)
+    face_df['timer'] = timer
+    entered['S'] = face_df.index[to_S]
+    return entered
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+A small planar sheet made of plain DataFrames, for the tests of the energy,
+gradient, Hessian, integrators and Newton solver, which only read the
+vertex, edge and face tables.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class PlainSheet(SimpleNamespace):
+    """ The tables of a Sheet, its active_verts and Nf. """
+
+    @property
+    def active_verts(self):
+        return self.vert_df.index[self.vert_df['is_active'].astype(bool)]
+
+    @property
+    def Nf(self):
+        return self.face_df.shape[0]
+
+
+def plain_sheet(n=4, seed=0):
+    """
+    Returns an n x n grid of squares with jittered vertices, counterclockwise
+    faces, and parameters that differ from face to face. The vertex and face
+    ids don't start at 0, so that positions and ids can't be mixed up.
+    """
+    rng = np.random.default_rng(seed)
+    xy = np.array([(i, j) for i in range(n + 1) for j in range(n + 1)], dtype=float)
+    xy += rng.normal(0, 0.1, xy.shape)
+    verts = np.arange(xy.shape[0]) + 10
+    vert_df = pd.DataFrame(xy, columns=['x', 'y'], index=pd.Index(verts, name='vert'))
+    vert_df['is_active'] = 1
+    vert_df['viscosity'] = rng.uniform(0.5, 2, xy.shape[0])
+
+    edges = []
+    for i in range(n):
+        for j in range(n):
+            corners = [(i, j), (i + 1, j), (i + 1, j + 1), (i, j + 1)]
+            corners = [verts[a * (n + 1) + b] for a, b in corners]
+            edges += [(corners[k], corners[(k + 1) % 4], 100 + i * n + j) for k in range(4)]
+    edge_df = pd.DataFrame(edges, columns=['srce', 'trgt', 'face'],
+                           index=pd.Index(np.arange(len(edges)), name='edge'))
+    pair = {(s, t): e for e, (s, t, _) in enumerate(edges)}
+    edge_df['opposite'] = [pair.get((t, s), -1) for s, t, _ in edges]
+    edge_df['line_tension'] = rng.uniform(-0.1, 0.2, len(edges))
+    edge_df['is_active'] = 1
+
+    faces = pd.Index(100 + np.arange(n * n), name='face')
+    face_df = pd.DataFrame({'contractility': rng.uniform(0.01, 0.1, n * n),
+                            'area_elasticity': rng.uniform(0.5, 1.5, n * n),
+                            'prefered_area': rng.uniform(0.8, 1.2, n * n),
+                            'perimeter_elasticity': rng.uniform(0, 0.2, n * n),
+                            'prefered_perimeter': rng.uniform(3.5, 4.5, n * n),
+                            'is_alive': 1}, index=faces)
+    return PlainSheet(vert_df=vert_df, edge_df=edge_df, face_df=face_df,
+                      specs={'settings': {'nrj_norm_factor': 2.0}})
+
+
+def as_tyssue(plain):
+    """
+    Returns the tables of a plain sheet in a tyssue Sheet, with the opposite
+    edges found again and contiguous ids, as tyssue's geometry needs them.
+    The tests that use it need tyssue.
+    """
+    from tyssue import Sheet, config, PlanarGeometry as geom
+
+    sheet = Sheet('plain', {'vert': plain.vert_df.copy(), 'edge': plain.edge_df.copy(),
+                            'face': plain.face_df.copy()},
+                  config.geometry.planar_spec(), coords=['x', 'y'])
+    sheet.reset_index()
+    sheet.get_opposite()
+    geom.update_all(sheet)
+    return sheet
+
+
+def drop_faces(plain, faces):
+    """ Removes faces and their edges from a plain sheet, and the vertices left alone. """
+    edge_df = plain.edge_df[~plain.edge_df['face'].isin(faces)]
+    verts = np.union1d(edge_df['srce'], edge_df['trgt'])
+    return PlainSheet(vert_df=plain.vert_df.loc[verts], edge_df=edge_df,
+                      face_df=plain.face_df.drop(faces), specs=plain.specs)
+
+
+@pytest.fixture
+def planar_sheet():
+    return plain_sheet()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Face-face adjacency of a sheet as a sparse (CSR) matrix, so that neighbour
+queries over all the cells are sparse products, e.g. the number of CT
+neighbours of every cell is face_adjacency(sheet) @ is_CT.
+
+Rows and columns follow the order of face_df, A[i, j] = 1 if the faces i and
+j share at least one edge. The matrix is cached on the sheet with the
+adjacency index it was read from (see adjacency_index.py). The topology
+functions patch that index and it records the faces whose edges changed,
+so only the rows and columns of these faces are read again, from the index.
+The matrix is built again in one vectorized pass when the index itself was
+built again (e.g. after sheet.reset_index()).
+"""
+import numpy as np
+from scipy import sparse
+
+from adjacency_index import adjacency
+from my_headers import _opposite_edges
+
+
+def face_adjacency(sheet):
+    """
+    Returns the face adjacency matrix of the sheet, up to date with edge_df.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix of int, shape (Nf, Nf), in the order of face_df.
+    """
+    index = adjacency(sheet)
+    faces = sheet.face_df.index
+    cache = getattr(sheet, '_face_adjacency', None)
+    if cache is None or cache['index'] is not index:
+        matrix = _build(sheet)
+    elif index['changed'] or not faces.equals(cache['faces']):
+        matrix = _patch(cache['matrix'], cache['faces'], faces, index)
+    else:
+        return cache['matrix']
+    index['changed'].clear()
+    sheet._face_adjacency = {'index': index, 'faces': faces, 'matrix': matrix}
+    return matrix
+
+
+def _build(sheet):
+    """
+    Builds the adjacency matrix from the opposite half-edges.
+    """
+    edge_df = sheet.edge_df
+    opposite = _opposite_edges(edge_df)
+    inside = opposite >= 0
+    face_pos = sheet.face_df.index.get_indexer(edge_df['face'].to_numpy())
+    rows = face_pos[inside]
+    cols = face_pos[edge_df.index.get_indexer(opposite[inside])]
+    keep = (rows >= 0) & (cols >= 0)
+    return _matrix(rows[keep], cols[keep], sheet.face_df.shape[0])
+
+
+def _patch(matrix, old_faces, faces, index):
+    """
+    Moves the rows and columns of the faces that are still there to their new
+    positions, and reads the rows and columns of the changed faces again from
+    the index.
+    """
+    n = len(faces)
+    old_pos = old_faces.get_indexer(faces)
+    kept = old_pos >= 0
+    # select[new, old] = 1 for the faces that are kept.
+    select = sparse.csr_matrix((np.ones(int(kept.sum()), dtype=int),
+                                (np.flatnonzero(kept), old_pos[kept])), shape=(n, len(old_faces)))
+    # The new faces are changed faces, their edges were patched.
+    changed = faces.get_indexer(list(index['changed']))
+    changed = changed[changed >= 0]
+    unchanged = np.ones(n, dtype=int)
+    unchanged[changed] = 0
+    unchanged = sparse.diags(unchanged)
+    matrix = unchanged @ (select @ matrix @ select.T) @ unchanged
+
+    # The neighbours of the changed faces, through the opposite of each of
+    # their edges.
+    pairs = []
+    for face in faces[changed].tolist():
+        for edge in index['face'].get(face, ()):
+            srce, trgt, _ = index['edge'][edge]
+            opposite = index['pair'].get((trgt, srce))
+            if opposite is not None:
+                pairs.append((face, index['edge'][opposite][2]))
+    pairs = np.array(pairs, dtype=int).reshape(-1, 2)
+    rows, cols = faces.get_indexer(pairs[:, 0]), faces.get_indexer(pairs[:, 1])
+    keep = (rows >= 0) & (cols >= 0)
+    rows, cols = rows[keep], cols[keep]
+    new = _matrix(np.concatenate([rows, cols]), np.concatenate([cols, rows]), n)
+    return _matrix(*(matrix + new).nonzero(), n)
+
+
+def _matrix(rows, cols, n):
+    matrix = sparse.csr_matrix((np.ones(rows.size, dtype=int), (rows, cols)), shape=(n, n))
+    # Two faces can share more than one edge, count them as neighbours once.
+    matrix.data[:] = 1
+    return matrix
+
+
+def neighbour_count(sheet, mask=None):
+    """
+    Returns the number of neighbours of every face, as an array in the order
+    of face_df.
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    mask : boolean array_like over face_df, optional
+        only the neighbours where mask is True are counted, e.g.
+        face_df['cell_class'] == 'STB'.
+    """
+    matrix = face_adjacency(sheet)
+    if mask is None:
+        return np.diff(matrix.indptr)
+    return matrix @ np.asarray(mask, dtype=int)
+
+
+def face_neighbours(sheet, face):
+    """
+    Returns the Index of the faces that share an edge with face, in the
+    order of face_df. They are read from the adjacency index, the matrix is
+    not needed.
+    """
+    index = adjacency(sheet)
+    neighbours = set()
+    for edge in index['face'].get(face, ()):
+        srce, trgt, _ = index['edge'][edge]
+        opposite = index['pair'].get((trgt, srce))
+        if opposite is not None:
+            neighbours.add(index['edge'][opposite][2])
+    pos = sheet.face_df.index.get_indexer(list(neighbours))
+    return sheet.face_df.index[np.sort(pos[pos >= 0])]
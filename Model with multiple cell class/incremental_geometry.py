@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental version of geom.update_all: the sheet keeps a copy of the vertex
+positions and of the edge topology from the last update, and the next update
+only recomputes the faces around the vertices that moved and the edges that
+changed since then. A call with nothing changed does nothing, so it can be
+called after every step of the model without cost.
+"""
+import numpy as np
+
+from tyssue import PlanarGeometry as geom
+
+from my_headers import update_geometry_local
+
+
+def update_geometry(sheet, full_fraction=0.3):
+    """
+    Same as geom.update_all(sheet), only for what changed since the last call.
+
+    Vertices and edges are compared with the copy kept at the last call: the
+    edge columns are recomputed for all the faces that have a moved vertex, a
+    new or changed edge, or are new. If the rows were dropped or reordered
+    (e.g. by sheet.reset_index after a T2) or if more than full_fraction of the
+    faces changed, geom.update_all is used instead.
+
+    Returns
+    -------
+    The number of faces that were updated.
+    """
+    coords = sheet.vert_df[sheet.coords].to_numpy(dtype=float)
+    vert_ids = sheet.vert_df.index.to_numpy()
+    edge_ids = sheet.edge_df.index.to_numpy()
+    topo = np.column_stack([sheet.edge_df[c].to_numpy() for c in ('srce', 'trgt', 'face')])
+    face_ids = sheet.face_df.index.to_numpy()
+    state = getattr(sheet, '_geometry_state', None)
+
+    dirty = None
+    if state is not None and 'length' in sheet.edge_df.columns:
+        dirty = _dirty_faces(state, coords, vert_ids, edge_ids, topo, face_ids)
+    if dirty is None or dirty.size > full_fraction * face_ids.size:
+        geom.update_all(sheet)
+        # update_all computes the unit vectors before the new lengths, a
+        # second update_all used to fix them.
+        geom.update_ucoords(sheet)
+        updated = face_ids.size
+    elif dirty.size:
+        update_geometry_local(sheet, dirty)
+        updated = dirty.size
+    else:
+        updated = 0
+    sheet._geometry_state = {'coords': coords, 'vert_ids': vert_ids,
+                             'edge_ids': edge_ids, 'topo': topo, 'face_ids': face_ids}
+    return updated
+
+
+def _appended(old, new):
+    """ True if new is old with rows added at the end. """
+    return new.size >= old.size and np.array_equal(new[:old.size], old)
+
+
+def _dirty_faces(state, coords, vert_ids, edge_ids, topo, face_ids):
+    """
+    Returns the faces to update, or None if the rows can't be matched with
+    the last update (dropped or reordered).
+    """
+    if not (_appended(state['vert_ids'], vert_ids) and _appended(state['edge_ids'], edge_ids)
+            and _appended(state['face_ids'], face_ids)):
+        return None
+    n_vert, n_edge, n_face = (state[k].shape[0] for k in ('coords', 'topo', 'face_ids'))
+
+    moved = np.ones(vert_ids.size, dtype=bool)
+    moved[:n_vert] = (coords[:n_vert] != state['coords']).any(axis=1)
+    changed = np.ones(edge_ids.size, dtype=bool)
+    changed[:n_edge] = (topo[:n_edge] != state['topo']).any(axis=1)
+
+    moved_ids = vert_ids[moved]
+    touched = changed | np.isin(topo[:, 0], moved_ids) | np.isin(topo[:, 1], moved_ids)
+    old_faces = state['topo'][changed[:n_edge], 2]
+    return np.unique(np.concatenate([topo[touched, 2], old_faces, face_ids[n_face:]]))
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive time stepping for the overdamped vertex model, dr/dt = -grad U / viscosity.
+
+time_step_bot starts every step from the same dt and halves it until no
+vertex moves more than the allowed distance, so after a division the same
+halvings (and gradient evaluations) are done again at every step. Here the
+integrator keeps its time step from one step to the next in a dict (see
+make_integrator): it is shrunk when the error estimate of the step or the
+largest displacement is too large, and it grows again, step by step, when
+the tissue is calm.
+
+Methods
+-------
+'euler' : explicit Euler, one gradient per step, only the displacement cap.
+'heun' : Heun's method with Euler as the embedded error estimate, two
+    gradients per step.
+'rk23' : Bogacki-Shampine 3(2), four gradients per step.
+'semi_implicit' : (viscosity/dt + H) dr = -grad U, with H the full Hessian
+    from planar_hessian(sheet): backward Euler linearised at the start of
+    the step (one Newton iteration). One gradient, one Hessian and one
+    sparse solve per step, the step is only limited by the displacement
+    cap. For a long step H can make the matrix singular or indefinite, the
+    step is then taken again with a shorter time step.
+"""
+import numpy as np
+from scipy.sparse import diags as sparse_diag
+from scipy.sparse.linalg import spsolve
+
+from planar_gradient import planar_gradient
+from planar_hessian import planar_hessian
+
+
+# Butcher tables: stage coefficients, weights of the solution and of the
+# embedded lower order solution (None: no error estimate), order.
+METHODS = {
+    'euler': {'a': [[]], 'b': [1.0], 'b_low': None, 'order': 1},
+    'heun': {'a': [[], [1.0]], 'b': [0.5, 0.5], 'b_low': [1.0, 0.0], 'order': 2},
+    'rk23': {'a': [[], [0.5], [0.0, 0.75], [2/9, 1/3, 4/9]],
+             'b': [2/9, 1/3, 4/9, 0.0], 'b_low': [7/24, 1/4, 1/3, 1/8], 'order': 3},
+    'semi_implicit': {'implicit': True, 'b_low': None, 'order': 1},
+}
+
+
+def make_integrator(method='heun', max_dist=0.005, tol=None, dt_max=0.001,
+                    dt_min=None, tick=None, grow=2.0):
+    """
+    Returns the state of an adaptive integrator, to pass to adaptive_step.
+
+    Parameters
+    ----------
+    method : str, one of 'euler', 'heun', 'rk23', 'semi_implicit'
+    max_dist : float
+        no vertex moves more than max_dist in one step, e.g. t1_threshold/2
+        so that the edges don't jump past the T1 threshold.
+    tol : float, optional
+        largest error allowed on the displacement of a vertex in one step,
+        default max_dist/10.
+    dt_max : float
+        the largest time step, also the first one tried.
+    dt_min : float, optional
+        the smallest time step, taken even if it is too large for max_dist
+        or tol. Default one tick, or dt_max/1024 without a clock.
+    tick : float, optional
+        length of a tick of the simulation clock (see sim_clock.py), the
+        time steps are then whole numbers of ticks.
+    grow : float
+        the largest factor between two time steps.
+    """
+    if method not in METHODS:
+        raise ValueError(f'Unknown method "{method}", use one of {list(METHODS)}.')
+    if dt_min is None:
+        dt_min = tick if tick is not None else dt_max / 1024
+    return {'method': method, 'max_dist': max_dist,
+            'tol': tol if tol is not None else max_dist / 10,
+            'dt': dt_max, 'dt_max': dt_max, 'dt_min': dt_min, 'tick': tick,
+            'grow': grow, 'n_steps': 0, 'n_rejected': 0, 'n_gradients': 0}
+
+
+def _round_dt(integrator, dt):
+    """ Clips dt between dt_min and dt_max, and rounds it down to whole ticks. """
+    dt = min(max(dt, integrator['dt_min']), integrator['dt_max'])
+    tick = integrator['tick']
+    if tick is not None:
+        dt = max(int(dt / tick + 1e-9), 1) * tick
+    return dt
+
+
+def adaptive_step(sheet, integrator, dt_limit=None):
+    """
+    Computes one accepted step of the vertex positions, the sheet is not
+    changed.
+
+    The step starts from the time step kept in integrator. If the error
+    estimate is above tol or a vertex moves more than max_dist, the step is
+    done again with a smaller time step, computed from how far off it was.
+    The time step proposed for the next call grows by at most grow.
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    integrator : dict, from make_integrator
+    dt_limit : float, optional
+        the step is not longer than dt_limit, e.g. the time to the end of the
+        next cell cycle. The proposed time step is kept for the next call.
+
+    Returns
+    -------
+    dt : float, the time step that was taken (a whole number of ticks with
+        a clock)
+    movement : ndarray, the displacement of the active vertices, in the
+        order of my_ode
+    """
+    table = METHODS[integrator['method']]
+    order, b_low = table['order'], table['b_low']
+
+    valid_active_verts = sheet.active_verts[sheet.active_verts.isin(sheet.vert_df.index)]
+    rows = sheet.vert_df.index.get_indexer(valid_active_verts)
+    inv_viscosity = 1 / sheet.vert_df.loc[valid_active_verts, 'viscosity'].to_numpy(dtype=float)
+    pos = sheet.vert_df[['x', 'y']].to_numpy(dtype=float)
+
+    def velocity(stage_pos):
+        # Only the active vertices move, the others keep their position.
+        integrator['n_gradients'] += 1
+        return -planar_gradient(sheet, stage_pos)[rows] * inv_viscosity[:, None]
+
+    if table.get('implicit'):
+        # The gradient and the Hessian at the start of the step are the same
+        # for all the time steps tried.
+        integrator['n_gradients'] += 1
+        gradient = planar_gradient(sheet)[rows].ravel()
+        coords = np.column_stack([2 * rows, 2 * rows + 1]).ravel()
+        hessian = planar_hessian(sheet)[coords][:, coords]
+        viscosity = sparse_diag(np.repeat(1 / inv_viscosity, 2))
+
+    proposed = integrator['dt']
+    dt = proposed if dt_limit is None else min(proposed, dt_limit)
+    limited = dt < proposed
+    while True:
+        dt = _round_dt(integrator, dt)
+        if table.get('implicit'):
+            movement = spsolve((viscosity / dt + hessian).tocsc(), -gradient).reshape(-1, 2)
+        else:
+            k = []
+            for a in table['a']:
+                stage_pos = pos
+                if a:
+                    stage_pos = pos.copy()
+                    stage_pos[rows] += dt * sum(c * k_i for c, k_i in zip(a, k))
+                k.append(velocity(stage_pos))
+            k = np.array(k)
+            movement = dt * np.tensordot(table['b'], k, axes=1)
+        dist = np.linalg.norm(movement, axis=1).max(initial=0)
+
+        # Factor between this time step and the next one to try.
+        factor = integrator['grow']
+        accepted = True
+        if not np.isfinite(dist):
+            # A singular system, only with the implicit step.
+            dist, factor, accepted = 0, 0.5, False
+        if b_low is not None:
+            error = dt * np.tensordot(np.subtract(table['b'], b_low), k, axes=1)
+            error = np.linalg.norm(error, axis=1).max(initial=0) / integrator['tol']
+            if error > 0:
+                factor = min(factor, 0.9 * error**(-1/order))
+            accepted = error <= 1
+        if dist > 0:
+            factor = min(factor, 0.9 * integrator['max_dist'] / dist)
+            accepted = accepted and dist <= integrator['max_dist']
+        if accepted or dt <= integrator['dt_min']:
+            break
+        integrator['n_rejected'] += 1
+        limited = False
+        # Shrink by at least a half, or rounding to ticks could try dt again.
+        dt *= min(factor, 0.5)
+
+    integrator['n_steps'] += 1
+    proposed = max(dt * factor, proposed) if limited else dt * factor
+    integrator['dt'] = min(max(proposed, integrator['dt_min']), integrator['dt_max'])
+    return dt, movement
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Energy relaxation of the neighbourhood of a cell division only, instead of
+the whole sheet (see bilayer_trial_space.py).
+
+The patch is the faces within k rings (neighbours of neighbours) of the
+faces around the modified vertices. The vertices of the patch that are also
+on a face outside of it are frozen, as single fusion artificial.py does by
+hand with is_active; the others move. No face outside the patch has a moving
+vertex, so the energy, gradient and Hessian products are computed on the
+rows of the patch only. The patch, its edges and its frozen vertices are
+found with the adjacency index, so the bookkeeping also grows with the size
+of the patch, not of the tissue, as long as the index is up to date (after
+tyssue's cell_division, call invalidate_adjacency first).
+"""
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from adjacency_index import adjacency
+from my_headers import update_geometry_local
+from newton_solver import _newton_min, _finish, newton_energy_min
+
+
+def event_patch(sheet, verts=(), faces=(), rings=2):
+    """
+    Returns the sorted ids of the faces within rings of the faces that
+    contain one of verts, or are in faces.
+    """
+    index = adjacency(sheet)
+    patch = set(faces)
+    for v in verts:
+        patch.update(index['edge'][e][2] for e in index['vert'].get(v, ()))
+    ring = patch
+    for _ in range(rings):
+        ring = _face_ring(index, ring) - patch
+        patch |= ring
+    return np.array(sorted(patch), dtype=int)
+
+
+def _face_ring(index, faces):
+    """ Returns the faces that share an edge with one of faces. """
+    ring = set()
+    for f in faces:
+        for e in index['face'].get(f, ()):
+            srce, trgt, _ = index['edge'][e]
+            opposite = index['pair'].get((trgt, srce))
+            if opposite is not None:
+                ring.add(index['edge'][opposite][2])
+    return ring
+
+
+def local_relax(sheet, geom, verts=(), faces=(), rings=2, sweep=0, log=None, **options):
+    """
+    Relaxes the energy around a topological event, then optionally does a
+    few Newton iterations on the whole sheet.
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    geom : the geometry class, e.g. PlanarGeometry, for the global sweep
+    verts, faces : the vertices and faces changed by the event, e.g. the
+        mother and the daughter of a division.
+    rings : int
+        the number of rings of neighbours around them that can move.
+    sweep : int
+        the number of Newton iterations on the whole sheet afterwards, none
+        by default.
+    log : list, optional
+        see newton_solver.newton_energy_min, one entry for the patch and one
+        for the sweep.
+    **options : passed to Newton-CG, and gtol, as in newton_energy_min.
+
+    Returns
+    -------
+    res : scipy.optimize.OptimizeResult of the patch, with res.patch the
+        ids of its faces
+    """
+    gtol = options.pop('gtol', 1e-6)
+    start = time.perf_counter()
+    patch = event_patch(sheet, verts, faces, rings)
+    index = adjacency(sheet)
+    in_patch = set(patch.tolist())
+    patch_edges = sorted(e for f in in_patch for e in index['face'].get(f, ()))
+    patch_verts = sorted({index['edge'][e][0] for e in patch_edges})
+    # A vertex that is also on a face outside of the patch doesn't move.
+    free = [v for v in patch_verts
+            if all(index['edge'][e][2] in in_patch for e in index['vert'][v])]
+    moving = np.array(free, dtype=int)[sheet.vert_df.loc[free, 'is_active'].to_numpy(dtype=bool)]
+
+    sub = SimpleNamespace(vert_df=sheet.vert_df.loc[patch_verts], edge_df=sheet.edge_df.loc[patch_edges],
+                          face_df=sheet.face_df.loc[patch], specs=sheet.specs)
+    res = _newton_min(sub, moving, options)
+    sheet.vert_df.loc[moving, ['x', 'y']] = res.x.reshape(-1, 2)
+    update_geometry_local(sheet, patch, patch_edges)
+    res.patch = patch
+    _finish(res, start, log, gtol)
+
+    if sweep:
+        newton_energy_min(sheet, geom, log=log, **{**options, 'gtol': gtol, 'maxiter': sweep})
+    return res
@@ -5,14 +5,20 @@ This script contains all my personal defined functions to be used.
 import numpy as np
 import pandas as pd
 import math
-from decimal import Decimal
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
 
 from tyssue.topology.sheet_topology import type1_transition
-from tyssue.topology.base_topology import add_vert
+from tyssue.topology.base_topology import add_vert, drop_two_sided_faces
 from tyssue.topology.sheet_topology import face_division
 from tyssue import PlanarGeometry as geom
 from tyssue.dynamics.planar_vertex_model import PlanarModel as model
 
+from adjacency_index import (edge_between, vert_faces, vert_edges, patch_adjacency,
+                             invalidate_adjacency)
+from cell_cycle import draw_cycle_durations
+from planar_gradient import planar_gradient
+
 
   
 def dot(v,w):
@@ -70,9 +76,12 @@ def delete_face(sheet_obj, face_deleting):
     # Compute all edges associated with the face, then drop these edges in df.
     associated_edges = sheet_obj.edge_df[sheet_obj.edge_df['face'] == face_deleting]
     sheet_obj.edge_df.drop(associated_edges.index, inplace = True)
+    patch_adjacency(sheet_obj, associated_edges.index)
     
     # All associated edges are removed, now remove the 'empty' face and reindex.
     sheet_obj.face_df.drop(face_deleting , inplace =True)
+    # The opposites of the removed edges are now on the boundary.
+    update_boundary(sheet_obj, associated_edges['srce'])
 
 
 def xprod_2d(vec1, vec2):
@@ -107,14 +116,52 @@ def closest_pair_dist(a,end1, end2):
         a_hat =  a / round(np.linalg.norm(a),4)
         return a_hat
 
+def point_segment_distance(start, end, point):
+    """
+    Computes the distance between points and line segments, for many pairs
+    at once. The inputs are broadcast against each other on all but the last
+    axis, so (n,2) segments and (n,2) points give n pairs, while (n,1,2)
+    segments and (m,2) points give all the n*m pairs.
+
+    Parameters
+    ----------
+    start : array_like, (..., 2)
+        coordinates of the starting points of the line segments
+    end : array_like, (..., 2)
+        coordinates of the end points of the line segments
+    point : array_like, (..., 2)
+        coordinates of the points
+
+    Returns
+    -------
+    dist : ndarray, distance between each point and its line segment
+    t : ndarray, parameter of the nearest point along the segment, clamped
+        to the range 0 to 1 (0 is start, 1 is end)
+    nearest : ndarray (..., 2), coordinates of the nearest points
+
+    """
+    start = np.asarray(start, dtype=float)
+    end = np.asarray(end, dtype=float)
+    point = np.asarray(point, dtype=float)
+    line_vec = end - start
+    pnt_vec = point - start
+    line_len2 = np.einsum('...i,...i->...', line_vec, line_vec)
+    # A segment of length zero is treated as its start point.
+    safe_len2 = np.where(line_len2 > 0, line_len2, 1.0)
+    t = np.einsum('...i,...i->...', pnt_vec, line_vec) / safe_len2
+    t = np.clip(np.where(line_len2 > 0, t, 0.0), 0.0, 1.0)
+    nearest = start + t[..., None] * line_vec
+    dist = np.linalg.norm(point - nearest, axis=-1)
+    return dist, t, nearest
+
 def put_vert(eptm, edge, coord_put):
     """Adds a vertex somewhere in the edge,
 
-    which is split as is its opposite(s)
+    which is split as is its opposite
 
     Parameters
     ----------
-    eptm : a :class:`Epithelium` instance
+    eptm : a :class:`Sheet` instance
     edge : int
     the index of one of the half-edges to split
     coord_put: list
@@ -124,14 +171,10 @@ def put_vert(eptm, edge, coord_put):
     -------
     new_vert : int
     the index to the new vertex
-    new_edges : int or list of ints
-    index to the new edge(s). For a sheet, returns
-    a single index, for a 3D epithelium, returns
-    the list of all the new parallel edges
-    new_opp_edges : int or list of ints
-    index to the new opposite edge(s). For a sheet, returns
-    a single index, for a 3D epithelium, returns
-    the list of all the new parallel edges
+    new_edges : int
+    index to the new edge
+    new_opp_edges : int or None
+    index to the new opposite edge, None if the edge is on the boundary
 
 
     In the simple case whith two half-edge, returns
@@ -150,43 +193,143 @@ def put_vert(eptm, edge, coord_put):
     where "e" is the passed edge as argument, "s" its source "t" its
     target and "oe" its opposite. The returned edges are the ones
     between the new vertex and the input edge's original target.
+    The new opposite edge is the last row of the edge_df.
     """
+    new_verts, new_edges, new_opp_edges = put_verts(eptm, [edge], [coord_put])
+    new_opp_edge = int(new_opp_edges[0]) if new_opp_edges[0] >= 0 else None
+    return int(new_verts[0]), int(new_edges[0]), new_opp_edge
 
-    srce, trgt = eptm.edge_df.loc[edge, ["srce", "trgt"]]
-    opposites = eptm.edge_df[
-        (eptm.edge_df["srce"] == trgt) & (eptm.edge_df["trgt"] == srce)
-    ]
-    parallels = eptm.edge_df[
-        (eptm.edge_df["srce"] == srce) & (eptm.edge_df["trgt"] == trgt)
-    ]
-
-    new_vert = eptm.vert_df.loc[srce:srce]
-    eptm.vert_df = pd.concat([eptm.vert_df, new_vert], ignore_index=True)
-    new_vert = eptm.vert_df.index[-1]
-    eptm.vert_df.loc[new_vert, eptm.coords] = coord_put
-
-    eptm.edge_df.loc[parallels.index,'trgt'] = new_vert
-    eptm.edge_df = pd.concat([eptm.edge_df, parallels], ignore_index=True)
-    new_edges = eptm.edge_df.index[-parallels.index.size :]
-    eptm.edge_df.loc[new_edges,'srce'] = new_vert
-    eptm.edge_df.loc[new_edges,'trgt'] = trgt
-
-    new_oppo_edges = []
-    if len(opposites.index):
-        eptm.edge_df.loc[opposites.index,'srce'] = new_vert
-        eptm.edge_df = pd.concat([eptm.edge_df, opposites], ignore_index=True)
-        new_oppo_edges = eptm.edge_df.index[-opposites.index.size :]
-        eptm.edge_df.loc[new_oppo_edges,'trgt'] = new_vert
-        eptm.edge_df.loc[new_oppo_edges,'srce'] = trgt
-
-    # ## Sheet special case
-    if len(new_edges) == 1:
-        new_edges = new_edges[0]
-    if len(new_oppo_edges) == 1:
-        new_opp_edges = new_oppo_edges[0]
-    else:
-        new_opp_edges = None
-    return new_vert, new_edges, new_opp_edges
+
+def put_verts(eptm, edges, coords):
+    """
+    Same as put_vert, for many points at once: each edge in edges is split
+    by a new vertex at the matching row of coords.
+
+    The new vertices and edges are written with a single concatenation of
+    vert_df and edge_df, so splitting n edges costs about the same as
+    splitting one. The concatenation still copies both tables, so each call
+    costs O(V + E), and callers that put many points should gather them in
+    one call. Filling spare preallocated rows in place would remove that
+    copy, but every reader of vert_df and edge_df would then have to skip
+    the spare rows: this is left as a follow-up.
+    New rows get the indices following the current maximum, the other rows
+    keep their indices. The opposites are read from the
+    'opposite' column when it is there (checked against srce/trgt), and only
+    the edges without a valid entry are searched for.
+
+    An edge can be given several times, its points are then put in order
+    along it, from its source: s -> nv1 -> nv2 -> ... -> t.
+
+    Parameters
+    ----------
+    eptm : a :class:`Sheet` instance
+    edges : list of int
+        the half-edges to split, an edge and its opposite can't both be in
+        the list, split one of them and the other is split as well.
+    coords : array_like, (n, 2)
+        the coordinates of the new vertices
+
+    Returns
+    -------
+    new_verts : ndarray, the indices of the new vertices
+    new_edges : ndarray, the indices of the new edges, from each new vertex
+        to the next vertex along the edge (nv -> t for a single point)
+    new_opp_edges : ndarray, the indices of their opposites (t -> nv), -1 for
+        the edges on the boundary. These are the last rows of edge_df.
+
+    """
+    edges = np.asarray(edges, dtype=int).ravel()
+    coords = np.asarray(coords, dtype=float).reshape(len(edges), -1)
+    edge_df, vert_df = eptm.edge_df, eptm.vert_df
+    split, group = np.unique(edges, return_inverse=True)
+    split_rows = edge_df.loc[split]
+    srce = split_rows['srce'].to_numpy()
+    trgt = split_rows['trgt'].to_numpy()
+    opp = _lookup_opposites(edge_df, split_rows)
+    has_opp = opp >= 0
+    if np.isin(split, opp[has_opp]).any():
+        raise ValueError('An edge and its opposite can not both be split in the same call.')
+
+    # Sort the points by edge, then along the edge.
+    n = edges.size
+    ends = vert_df.loc[np.concatenate([srce, trgt]), eptm.coords].to_numpy(dtype=float)
+    start, direction = ends[:split.size], ends[split.size:] - ends[:split.size]
+    along = np.einsum('ij,ij->i', coords - start[group], direction[group])
+    order = np.lexsort((along, group))
+    group = group[order]
+    first = np.r_[True, group[1:] != group[:-1]]
+    last = np.r_[first[1:], True]
+
+    new_verts = vert_df.index.max() + 1 + np.arange(n)
+    new_edges = edge_df.index.max() + 1 + np.arange(n)
+    point_opp = has_opp[group]
+    new_opp_edges = np.full(n, -1)
+    new_opp_edges[order[point_opp]] = new_edges[-1] + 1 + np.arange(int(point_opp.sum()))
+    # In the order along the edges, the vertex after each new vertex.
+    verts = new_verts[order]
+    following = np.where(last, trgt[group], np.roll(verts, -1))
+
+    # The new vertices are copies of the sources, moved to coords.
+    vert_rows = vert_df.loc[srce[group]].set_axis(
+        pd.Index(verts, name=vert_df.index.name))
+    vert_rows[eptm.coords] = coords[order]
+    if 'is_boundary' in vert_rows.columns:
+        vert_rows['is_boundary'] = ~point_opp
+
+    # e: s -> nv1, ne: nv -> following, oe: nv1 -> s, noe: following -> nv
+    edge_rows = edge_df.loc[split[group]].set_axis(
+        pd.Index(new_edges[order], name=edge_df.index.name))
+    opp_rows = edge_df.loc[opp[group[point_opp]]].set_axis(
+        pd.Index(new_opp_edges[order[point_opp]], name=edge_df.index.name))
+    edge_rows['srce'] = verts
+    edge_rows['trgt'] = following
+    opp_rows['srce'] = following[point_opp]
+    opp_rows['trgt'] = verts[point_opp]
+    if 'opposite' in edge_df.columns:
+        edge_rows['opposite'] = new_opp_edges[order]
+        opp_rows['opposite'] = new_edges[order[point_opp]]
+
+    first_verts = verts[first]
+    edge_df.loc[split, 'trgt'] = first_verts
+    edge_df.loc[opp[has_opp], 'srce'] = first_verts[has_opp]
+    eptm.vert_df = pd.concat([vert_df, vert_rows.sort_index()])
+    eptm.edge_df = pd.concat([edge_df, edge_rows.sort_index(), opp_rows.sort_index()])
+    patch_adjacency(eptm, np.concatenate([split, opp[has_opp], new_edges, new_opp_edges[new_opp_edges >= 0]]))
+    return new_verts, new_edges, new_opp_edges
+
+
+def _lookup_opposites(edge_df, edges):
+    """
+    Returns the opposite of each edge in edges (rows of edge_df), -1 if there
+    is none.
+
+    The 'opposite' column is used when it agrees with srce/trgt. A -1 in it is
+    trusted only while the boundary is tracked (see reset_boundary), the rest
+    is searched among the edges leaving the targets.
+    """
+    srce = edges['srce'].to_numpy()
+    trgt = edges['trgt'].to_numpy()
+    found = np.zeros(len(edges), dtype=bool)
+    opp = np.full(len(edges), -1)
+    if 'opposite' in edge_df.columns:
+        cand = edges['opposite'].fillna(-1).to_numpy(dtype=int)
+        known = np.isin(cand, edge_df.index)
+        if known.any():
+            ends = edge_df.loc[cand[known], ['srce', 'trgt']].to_numpy()
+            found[known] = (ends[:, 0] == trgt[known]) & (ends[:, 1] == srce[known])
+        opp[found] = cand[found]
+        if 'is_boundary' in edge_df.columns:
+            found |= cand == -1
+
+    todo = ~found
+    if todo.any():
+        local = edge_df[edge_df['srce'].isin(trgt[todo])]
+        by_pair = pd.Series(local.index, index=pd.MultiIndex.from_arrays(
+            [local['srce'], local['trgt']]))
+        by_pair = by_pair[~by_pair.index.duplicated()]
+        flipped = pd.MultiIndex.from_arrays([trgt[todo], srce[todo]])
+        opp[todo] = by_pair.reindex(flipped).fillna(-1).to_numpy(dtype=int)
+    return opp
 
 
 def divisibility_check(eptm, cell_id):
@@ -213,6 +356,63 @@ def divisibility_check(eptm, cell_id):
 
 
 
+def division_cuts(sheet, mothers, starts, centroids, skip_edges=()):
+    """
+    Finds where the division lines cross the other side of the mother cells,
+    for a batch of cells at once.
+
+    The division line of a mother cell goes through its start point and its
+    centroid. It crosses an edge of the cell where the two ends of the edge
+    are on opposite sides of the line (the 2D cross products with the line
+    direction have opposite signs). All the edges of all the mothers are
+    tested together, with the geometry stored in edge_df.
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    mothers : list of int
+        the indices of the dividing cells
+    starts : array_like, (n, 2)
+        the start point of the division line of each mother, e.g. the middle
+        point of one of its edges
+    centroids : array_like, (n, 2)
+        the centroid of each mother
+    skip_edges : list of int, optional
+        edges that are not tested, e.g. the edges the start points are on
+
+    Returns
+    -------
+    A DataFrame indexed by mother, with the crossed edge in 'edge' and the
+    crossing point in 'x' and 'y'. If the line crosses several edges, the
+    first one in edge_df is kept, and mothers without crossing are left out.
+
+    """
+    mothers = np.asarray(mothers).ravel()
+    starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+    centroids = np.asarray(centroids, dtype=float).reshape(-1, 2)
+    edges = sheet.edge_df[sheet.edge_df['face'].isin(mothers)]
+    edges = edges[~edges.index.isin(skip_edges)]
+    row = pd.Index(mothers).get_indexer(edges['face'])
+    p0 = starts[row]
+    r = centroids[row] - p0
+    v1 = edges[['sx', 'sy']].to_numpy(dtype=float) - p0
+    v2 = edges[['tx', 'ty']].to_numpy(dtype=float) - p0
+    # Same as xprod_2d(r, v1)*xprod_2d(r, v2) < 0 for every row.
+    cross1 = r[:, 0]*v1[:, 1] - r[:, 1]*v1[:, 0]
+    cross2 = r[:, 0]*v2[:, 1] - r[:, 1]*v2[:, 0]
+    crossing = cross1*cross2 < 0
+
+    d = v2[crossing] - v1[crossing]
+    r = r[crossing]
+    k = (v1[crossing, 1]*r[:, 0] - v1[crossing, 0]*r[:, 1]) / (d[:, 0]*r[:, 1] - d[:, 1]*r[:, 0])
+    intersection = p0[crossing] + v1[crossing] + k[:, None]*d
+    cuts = pd.DataFrame({'edge': edges.index[crossing],
+                         'x': intersection[:, 0],
+                         'y': intersection[:, 1]},
+                        index=pd.Index(edges['face'].to_numpy()[crossing], name='face'))
+    return cuts[~cuts.index.duplicated()]
+
+
 def lateral_split(eptm, mother):
     """
     Split the cell by choosing one of the edges to be a basal edge.
@@ -226,67 +426,48 @@ def lateral_split(eptm, mother):
 
     Returns
     -------
-    daughter: face index of new cell.
+    daughter: face index of new cell, or None if the division line crosses
+        no other edge of the cell (the sheet is then not changed).
 
     """
     edge_in_cell = eptm.edge_df[eptm.edge_df.loc[:,'face'] == mother]
     # Obtain the index for one of the basal edges.
     basal_edges = edge_in_cell[ edge_in_cell.loc[:,'opposite']==-1 ]
     basal_edge_index = basal_edges.index[np.random.randint(0,len(basal_edges))]
-    #get the vertex index of the newly added mid point.
-    basal_mid = add_vert(eptm, edge = basal_edge_index)[0]
-    geom.update_all(eptm)
-
-    # re-rewite the edge_in_cell to include the new vertex.
-    edge_in_cell = eptm.edge_df[eptm.edge_df.loc[:,'face'] == mother]
-    condition = edge_in_cell.loc[:,'srce'] == basal_mid
-    # extract the x-coordiante from array, then convert to a float type.
-    
-    # Extract the centre vertex.
-    c0x = float(edge_in_cell[condition].loc[:,'fx'].values[0])
-    c0y = float(edge_in_cell[condition].loc[:,'fy'].values[0])
-    c0 = [c0x, c0y]
-    cent_dict = {'y': c0y, 'is_active': 1, 'x': c0x}
+    # The geometry of the mother's edges is used by division_cuts.
+    update_geometry_local(eptm, [mother])
+
+    # The middle point of the basal edge.
+    p0 = eptm.vert_df.loc[eptm.edge_df.loc[basal_edge_index, ['srce', 'trgt']], ['x', 'y']].mean().to_numpy()
+    # The centre of the cell once the middle point is added to it, i.e. the
+    # mean of its vertices and p0.
+    cell_verts = eptm.vert_df.loc[edge_in_cell['srce'], ['x', 'y']].to_numpy(dtype=float)
+    c0 = (cell_verts.sum(axis=0) + p0) / (len(cell_verts) + 1)
+
+    # The line goes from the middle point through the centre, find the
+    # edge it crosses on the other side.
+    cuts = division_cuts(eptm, [mother], [p0], [c0], skip_edges=[basal_edge_index])
+    if mother not in cuts.index:
+        return None
+
+    cent_dict = {'y': c0[1], 'is_active': 1, 'x': c0[0]}
     # Convert cent_dict into a DataFrame and concatenate it
     cent_df = pd.DataFrame([cent_dict])
     eptm.vert_df = pd.concat([eptm.vert_df, cent_df], ignore_index=True)
     cent_index = eptm.vert_df.index[-1]
-    
-    # Extract for source vertex coordinates
-    p0x = float(edge_in_cell[condition].loc[:,'sx'].values[0])
-    p0y = float(edge_in_cell[condition].loc[:,'sy'].values[0])
-    p0 = [p0x, p0y]
-
-    # Extract the directional vector.
-    rx = float(edge_in_cell[condition].loc[:,'rx'].values[0])
-    ry = float(edge_in_cell[condition].loc[:,'ry'].values[0])
-    r  = [-rx, -ry]   # use the line in opposite direction.
-    
-    # We need to use iterrows to iterate over rows in pandas df
-    # The iteration has the form of (index, series)
-    # The series can be sliced.
-    for index, row in edge_in_cell.iterrows():
-        s0x = row['sx']
-        s0y = row['sy']
-        t0x = row['tx']
-        t0y = row['ty']
-        v1 = [s0x-p0x,s0y-p0y]
-        v2 = [t0x-p0x,t0y-p0y]
-        # if the xprod_2d returns negative, then line intersects the line segment.
-        if xprod_2d(r, v1)*xprod_2d(r, v2) < 0:
-            #print(f'The edge that is intersecting is: {index}')
-            dx = row['dx']
-            dy = row['dy']
-            c1 = (dx*ry/rx)-dy
-            c2 = s0y-p0y - (s0x*ry/rx) + (p0x*ry/rx)
-            k=c2/c1
-            intersection = [s0x+k*dx, s0y+k*dy]
-            oppo_index = int(put_vert(eptm, index, intersection)[0])
+
+    cut = cuts.loc[mother]
+    # Both vertices are put with one put_verts.
+    basal_mid, oppo_index = put_verts(eptm, [basal_edge_index, cut['edge']],
+                                      [p0, cut[['x', 'y']].to_numpy(dtype=float)])[0]
     # Do face division
     new_face_index = face_division(eptm, mother = mother, vert_a = basal_mid, vert_b = oppo_index )
+    # face_division is tyssue's.
+    invalidate_adjacency(eptm)
     # Put a vertex at the centroid, on the newly formed edge (last row in df).
-    put_vert(eptm, edge = eptm.edge_df.index[-1], coord_put = c0)
+    cent_vert = put_vert(eptm, edge = eptm.edge_df.index[-1], coord_put = c0)[0]
     eptm.update_num_sides()
+    update_boundary(eptm, [basal_mid, oppo_index, cent_index, cent_vert])
     return new_face_index
     #second_half = face_division(eptm, mother = mother, vert_a = oppo_index, vert_b = cent_index)
     #print(f'The new edge has first half as: {first_half} and second half as: {second_half} ')
@@ -318,6 +499,9 @@ def lateral_division(sheet, manager, cell_id, division_rate):
         prob = np.random.uniform(0,1)
         if prob < division_rate:
             daughter = lateral_split(sheet, mother = cell_id)
+            if daughter is None:
+                # No valid cut, the cell stays ready.
+                return
             sheet.face_df.loc[cell_id,'growth_speed'] = (sheet.face_df.loc[cell_id,'prefered_area'] - sheet.face_df.loc[cell_id, 'area'])/5
             sheet.face_df.loc[cell_id, 'division_status'] = 'growing'
             sheet.face_df.loc[daughter,'growth_speed'] = (sheet.face_df.loc[daughter,'prefered_area'] - sheet.face_df.loc[daughter, 'area'])/5
@@ -343,14 +527,273 @@ def T1_check(eptm, threshold, scale):
             print(f'Type 1 transition applied to edge {i} \n')
         else:
             continue
-    
+
+
+def T1_sweep(sheet, threshold, multiplier=1.5):
+    """
+    Performs the type 1 transition on all the edges shorter than threshold.
+
+    Logic:
+        1) Select all the short edges with one mask on the 'length' column.
+        2) From the shortest, keep an edge only if none of the faces around
+        its two vertices is already used by a kept edge. The kept edges do
+        not interfere with each other, so they are all transitioned in one
+        pass. type1_transition reindexes the sheet, so the edges and vertices
+        are tracked through the '_T1_id' column.
+        3) Update the geometry once, then only the edges around the modified
+        vertices (and the skipped edges) are checked again.
+    The modified vertices are flagged in a '_T1_touched' column, which is
+    carried through the reindexing as well.
+
+    Parameters
+    ----------
+    sheet : a `Sheet` instance
+    threshold : float
+        edges shorter than this are transitioned
+    multiplier : float, optional
+        passed to type1_transition, the new edge has length
+        multiplier * sheet.settings['threshold_length']
+
+    Returns
+    -------
+    report : a DataFrame with one row per transition: 'round' of the sweep,
+        'edge' the index of the edge at the start of that round and its
+        'length'.
+    touched : the indices of the vertices of the transitioned edges, after
+        the sweep, e.g. to pass to update_boundary.
+
+    """
+    report = []
+    sweep_round = 0
+    candidates = sheet.edge_df.index[sheet.edge_df['length'] < threshold]
+    sheet.vert_df['_T1_touched'] = False
+    while len(candidates):
+        sheet.edge_df['_T1_id'] = sheet.edge_df.index
+        sheet.vert_df['_T1_id'] = sheet.vert_df.index
+        short = sheet.edge_df.loc[candidates].sort_values('length', kind='stable')
+        # The faces around each vertex of the short edges.
+        ends = np.union1d(short['srce'], short['trgt'])
+        vert_faces = sheet.edge_df[sheet.edge_df['srce'].isin(ends)].groupby('srce')['face'].agg(set)
+
+        used_faces = set()
+        chosen = []
+        for edge, srce, trgt in zip(short.index, short['srce'], short['trgt']):
+            faces = vert_faces.get(srce, set()) | vert_faces.get(trgt, set())
+            if faces & used_faces:
+                continue
+            used_faces |= faces
+            chosen.append((edge, srce, trgt))
+
+        modified = set()
+        for edge, srce, trgt in chosen:
+            current = sheet.edge_df.index[sheet.edge_df['_T1_id'] == edge]
+            edge_length = short.loc[edge, 'length']
+            print(f'Edge {current[0]} is too short: {edge_length}')
+            type1_transition(sheet, current[0], remove_tri_faces=False, multiplier=multiplier)
+            modified |= {srce, trgt}
+            report.append((sweep_round, edge, edge_length))
+        sheet.vert_df.loc[sheet.vert_df['_T1_id'].isin(modified), '_T1_touched'] = True
+
+        # tyssue's type1_transition reindexes the sheet.
+        invalidate_adjacency(sheet)
+        geom.update_all(sheet)
+        # Check again around the modified vertices, the copies made by the
+        # transition carry the same '_T1_id'.
+        skipped = short.index.difference([c[0] for c in chosen])
+        around = (sheet.vert_df['_T1_id'].isin(modified)
+                  | sheet.vert_df['_T1_id'].isin(short.loc[skipped, ['srce', 'trgt']].values.ravel()))
+        around = sheet.vert_df.index[around]
+        local = sheet.edge_df[sheet.edge_df['srce'].isin(around) | sheet.edge_df['trgt'].isin(around)]
+        candidates = local.index[local['length'] < threshold]
+        sweep_round += 1
+
+    touched = sheet.vert_df.index[sheet.vert_df['_T1_touched'].to_numpy(dtype=bool)]
+    sheet.edge_df.drop(columns='_T1_id', inplace=True, errors='ignore')
+    sheet.vert_df.drop(columns=['_T1_id', '_T1_touched'], inplace=True, errors='ignore')
+    return pd.DataFrame(report, columns=['round', 'edge', 'length']), touched
+
+
+def T2_sweep(sheet, threshold):
+    """
+    Removes all the faces with less than 4 sides and an area below threshold.
+
+    Faces that do not share a vertex are removed together in one edit of the
+    dataframes: each face is collapsed onto a new vertex at its centre, as
+    tyssue's remove_face does, but the reindex is done once at the end and
+    the geometry is only recomputed for the faces around the new vertices.
+
+    Returns
+    -------
+    removed : a list of the removed face indices, as they were before the
+        sweep.
+    touched : the indices of the new vertices after the sweep, e.g. to pass
+        to update_boundary.
+
+    """
+    removed = []
+    sheet.vert_df['_T2_new'] = False
+    tri_faces = sheet.face_df[(sheet.face_df["num_sides"] < 4) &
+                              (sheet.face_df["area"] < threshold)]
+    while len(tri_faces):
+        face_edges = sheet.edge_df[sheet.edge_df['face'].isin(tri_faces.index)]
+        face_verts = face_edges.groupby('face')['srce'].agg(set)
+        # Keep the faces that do not share a vertex, from the smallest.
+        used_verts = set()
+        chosen = []
+        for face in tri_faces.sort_values('area').index:
+            if face_verts[face] & used_verts:
+                continue
+            used_verts |= face_verts[face]
+            chosen.append(face)
+
+        # One new vertex per face, at the mean of its vertices.
+        old_verts = face_edges[face_edges['face'].isin(chosen)][['face', 'srce']]
+        centres = sheet.vert_df.loc[old_verts['srce']].groupby(old_verts['face'].values)
+        new_verts = sheet.vert_df.loc[old_verts.groupby('face')['srce'].first()].copy()
+        new_verts[sheet.coords] = centres[sheet.coords].mean().to_numpy()
+        new_verts.index = sheet.vert_df.index.max() + 1 + np.arange(len(chosen))
+        new_verts['_T2_new'] = True
+        sheet.vert_df = pd.concat([sheet.vert_df, new_verts])
+        new_of_face = pd.Series(new_verts.index, index=sorted(chosen))
+        replace = pd.Series(new_of_face[old_verts['face']].to_numpy(), index=old_verts['srce'].to_numpy())
+
+        # Collapse all the vertices of the faces, then drop the collapsed
+        # edges and the faces.
+        for column in ['srce', 'trgt']:
+            moved = sheet.edge_df[column].isin(replace.index)
+            sheet.edge_df.loc[moved, column] = replace[sheet.edge_df.loc[moved, column]].to_numpy()
+        collapsed = ((sheet.edge_df['srce'] == sheet.edge_df['trgt'])
+                     | sheet.edge_df['face'].isin(chosen))
+        sheet.edge_df.drop(sheet.edge_df.index[collapsed], inplace=True)
+        sheet.face_df.drop(chosen, inplace=True)
+        sheet.vert_df.drop(replace.index, inplace=True)
+        drop_two_sided_faces(sheet)
+        invalidate_adjacency(sheet)
+        removed.extend(chosen)
+
+        # Recompute the geometry of the faces around the new vertices only.
+        around = sheet.edge_df[sheet.edge_df['srce'].isin(new_verts.index)]['face'].unique()
+        sheet.update_num_sides()
+        update_geometry_local(sheet, around)
+        tri_faces = sheet.face_df[(sheet.face_df["num_sides"] < 4) &
+                                  (sheet.face_df["area"] < threshold)]
+
+    if removed:
+        sheet.reset_index(order=True)
+        sheet.reset_topo()
+        invalidate_adjacency(sheet)
+    # Some of the new vertices may have been removed with the two sided faces.
+    touched = sheet.vert_df.index[sheet.vert_df['_T2_new'].to_numpy(dtype=bool)]
+    sheet.vert_df.drop(columns='_T2_new', inplace=True)
+    return removed, touched
+
+
+def update_geometry_local(sheet, faces, edges=None):
+    """
+    Same as PlanarGeometry.update_all, but only for the edges of the given
+    faces, the faces themselves and their centroids. All the vertices of
+    these edges must be up to date. If the ids of the edges of the faces are
+    already known, pass them as edges to skip the search over edge_df.
+    """
+    edge_df = sheet.edge_df
+    if edges is None:
+        rows = np.flatnonzero(edge_df['face'].isin(faces).to_numpy())
+    else:
+        rows = edge_df.index.get_indexer(edges)
+    if not rows.size:
+        return
+    xy = sheet.vert_df[['x', 'y']].to_numpy(dtype=float)
+    srce_pos = xy[sheet.vert_df.index.get_indexer(edge_df['srce'].to_numpy()[rows])]
+    trgt_pos = xy[sheet.vert_df.index.get_indexer(edge_df['trgt'].to_numpy()[rows])]
+    d_pos = trgt_pos - srce_pos
+    length = np.linalg.norm(d_pos, axis=1)
+
+    # Face centroids are the mean of their srce vertices.
+    face_ids, inv = np.unique(edge_df['face'].to_numpy()[rows], return_inverse=True)
+    num_edges = np.bincount(inv)
+    face_pos = np.column_stack([np.bincount(inv, srce_pos[:, 0]),
+                                np.bincount(inv, srce_pos[:, 1])]) / num_edges[:, None]
+    f_pos = face_pos[inv]
+    r_pos = srce_pos - f_pos
+    nz = r_pos[:, 0] * d_pos[:, 1] - r_pos[:, 1] * d_pos[:, 0]
+
+    # All the columns are written with one positional assignment per table.
+    _set_block(edge_df, rows, ['sx', 'sy', 'tx', 'ty', 'dx', 'dy', 'length', 'ux', 'uy',
+                               'fx', 'fy', 'rx', 'ry', 'nz', 'sub_area'],
+               np.column_stack([srce_pos, trgt_pos, d_pos, length, d_pos / length[:, None],
+                                f_pos, r_pos, nz, nz / 2]))
+    _set_block(sheet.face_df, sheet.face_df.index.get_indexer(face_ids), ['x', 'y', 'area', 'perimeter'],
+               np.column_stack([face_pos, np.bincount(inv, nz / 2), np.bincount(inv, length)]))
+
+
+def _set_block(df, rows, columns, values):
+    """
+    Writes values (one column per name in columns) into the rows (positions)
+    of df, with one iloc assignment. Missing columns are created.
+    """
+    for column in columns:
+        if column not in df.columns:
+            df[column] = np.nan
+    df.iloc[rows, df.columns.get_indexer(columns)] = values
+
+
 def my_ode(eptm):
     valid_verts = eptm.active_verts[eptm.active_verts.isin(eptm.vert_df.index)]
-    grad_U = model.compute_gradient(eptm).loc[valid_verts]
-    dr_dt = -grad_U.values/eptm.vert_df.loc[valid_verts, 'viscosity'].values[:,None]
+    # Same as model.compute_gradient(eptm), without the intermediate DataFrames.
+    grad_U = planar_gradient(eptm)[eptm.vert_df.index.get_indexer(valid_verts)]
+    dr_dt = -grad_U/eptm.vert_df.loc[valid_verts, 'viscosity'].values[:,None]
     return dr_dt
 
 
+def apply_param_rules(sheet, verts=None):
+    """
+    Sets the edge columns that have parameter rules, from the rules in
+    sheet.settings['param_rules']. A rule is a dictionary:
+        {'column': 'line_tension', 'factor': 2, 'where': 'boundary'}
+    The column of the edges that match 'where' is multiplied by 'factor',
+    'where' is 'boundary' (the edges without opposite) or a pair
+    (face column, value), e.g. ('cell_type', 'ST') for the edges of the ST
+    cells. The column of an edge is set to the value in sheet.specs['edge']
+    times the factors of the rules that match the edge.
+
+    Call it after the setup, then after the topology changes (divisions, T1,
+    T2, T3, fusions) for the edges they created or moved to the boundary.
+    The opposite of an edge is at the same vertices, so with verts only the
+    edges that start or end at verts are read and set, e.g. the vertices
+    returned by T1_sweep. The values of the other edges are kept, also if
+    they were changed by hand.
+    """
+    rules = sheet.specs.get('settings', {}).get('param_rules')
+    if not rules:
+        return
+    edge_df = sheet.edge_df
+    if verts is None:
+        rows = np.arange(len(edge_df))
+    else:
+        rows = edge_df.index.get_indexer(_edges_at(sheet, np.unique(np.asarray(verts, dtype=int))))
+    if not rows.size:
+        return
+    edges = edge_df.iloc[rows]
+
+    values = {}
+    boundary = None
+    for rule in rules:
+        column = rule['column']
+        if column not in values:
+            if column not in sheet.specs.get('edge', {}):
+                raise ValueError(f'The edge column "{column}" has a rule but no value in the specs.')
+            values[column] = np.full(rows.size, float(sheet.specs['edge'][column]))
+        if rule['where'] == 'boundary':
+            if boundary is None:
+                boundary = _opposite_edges(edges) == -1
+            where = boundary
+        else:
+            face_column, value = rule['where']
+            where = sheet.face_df.loc[edges['face'], face_column].to_numpy() == value
+        values[column][where] *= rule['factor']
+    _set_block(edge_df, rows, list(values), np.column_stack(list(values.values())))
+
+
 def collapse_edge(sheet, edge, reindex=True, allow_two_sided=False):
     """Collapses edge and merges it's vertices, creating (or increasing the rank of)
     a rosette structure.
@@ -379,6 +822,7 @@ def collapse_edge(sheet, edge, reindex=True, allow_two_sided=False):
     #     )
     #     return -1
 
+    changed = vert_edges(sheet, srce) | vert_edges(sheet, trgt)
     sheet.vert_df.loc[srce, sheet.coords] = sheet.vert_df.loc[
         [srce, trgt], sheet.coords
     ].mean(axis=0)
@@ -388,6 +832,8 @@ def collapse_edge(sheet, edge, reindex=True, allow_two_sided=False):
     # all the edges parallel to the original
     collapsed = sheet.edge_df.query("srce == trgt")
     sheet.edge_df.drop(collapsed.index, axis=0, inplace=True)
+    patch_adjacency(sheet, changed)
+    update_boundary(sheet, [srce])
     return srce
 
 def split_vert(sheet, vert, face, to_rewire, epsilon, recenter=False):
@@ -431,6 +877,7 @@ def split_vert(sheet, vert, face, to_rewire, epsilon, recenter=False):
     sheet.edge_df.loc[to_rewire.index] = to_rewire.replace(
         {"srce": vert, "trgt": vert}, new_vert
     )
+    patch_adjacency(sheet, to_rewire.index)
 
 
 def type1_transition_custom(sheet, edge01, multiplier=1.5):
@@ -487,7 +934,7 @@ def type1_transition_custom(sheet, edge01, multiplier=1.5):
     # Step 3: Create the new edge using the same index as the original edge01
     sheet.edge_df.loc[edge01, ["srce", "trgt"]] = [vert, new_vert]
     sheet.edge_df.loc[edge01, "length"] = multiplier * sheet.settings.get("threshold_length", 1.0)
-
+    invalidate_adjacency(sheet)
 
     return edge01
 
@@ -508,58 +955,190 @@ def division_mt(sheet, rng, cent_data, cell_id):
     # We need to randomly choose one of the edges in cell 2.
     chosen_index = rng.choice(list(edge_in_cell.index))
     # Extract and store the centroid coordinate.
-    c0x = float(cent_data.loc[cent_data['face']==cell_id, ['fx']].values[0])
-    c0y = float(cent_data.loc[cent_data['face']==cell_id, ['fy']].values[0])
+    c0x = float(cent_data.loc[cent_data['face']==cell_id, 'fx'].values[0])
+    c0y = float(cent_data.loc[cent_data['face']==cell_id, 'fy'].values[0])
     c0 = [c0x, c0y]
 
-    # Add a vertex in the middle of the chosen edge.
-    new_mid_index = add_vert(sheet, edge = chosen_index)[0]
-    # Extract for source vertex coordinates of the newly added vertex.
-    p0x = sheet.vert_df.loc[new_mid_index,'x']
-    p0y = sheet.vert_df.loc[new_mid_index,'y']
-    p0 = [p0x, p0y]
-
-    # Compute the directional vector from new_mid_point to centroid.
-    rx = c0x - p0x
-    ry = c0y - p0y
-    r  = [rx, ry]   # use the line in opposite direction.
-    # We need to use iterrows to iterate over rows in pandas df
-    # The iteration has the form of (index, series)
-    # The series can be sliced.
-    for index, row in edge_in_cell.iterrows():
-        s0x = row['sx']
-        s0y = row['sy']
-        t0x = row['tx']
-        t0y = row['ty']
-        v1 = [s0x-p0x,s0y-p0y]
-        v2 = [t0x-p0x,t0y-p0y]
-        # if the xprod_2d returns negative, then line intersects the line segment.
-        if xprod_2d(r, v1)*xprod_2d(r, v2) < 0 and index !=chosen_index :
-            dx = row['dx']
-            dy = row['dy']
-            c1 = dx*ry-dy*rx
-            c2 = s0y*rx-p0y*rx - s0x*ry + p0x*ry
-            k=c2/c1
-            intersection = [s0x+k*dx, s0y+k*dy]
-            oppo_index = put_vert(sheet, index, intersection)[0]
-            # Split the cell with a line.
-            new_face_index = face_division(sheet, mother = cell_id, vert_a = new_mid_index , vert_b = oppo_index )
-            # Put a vertex at the centroid, on the newly formed edge (last row in df).
-            cent_index = put_vert(sheet, edge = sheet.edge_df.index[-1], coord_put = c0)[0]
-            # Draw two random numbers from uniform distribution [10,15] for mitosis cycle duration.
-            random_int_1 = rng.integers(10000, 15000) / 1000
-            random_int_2 = rng.integers(10000, 15000) / 1000
-            # Assign mitosis cycle duration to the two daughter cells.
-            sheet.face_df.loc[cell_id,'T_cycle'] = Decimal(random_int_1)
-            sheet.face_df.loc[new_face_index,'T_cycle'] = Decimal(random_int_2)
-
-            # Following lines are commented out: Instead of using a new variable, I will minus T_cycle after each dt step by dt.
-            # sheet.face_df.loc[cell_id, 'T_age'] = dt
-            # sheet.face_df.loc[new_face_index,'T_age'] = dt
-            
-            print(f'cell {cell_id} is divided, dauther cell {new_face_index} is created.')
-            return new_face_index
+    # The division line goes from the middle of the chosen edge through the
+    # centroid, find the edge it crosses on the other side.
+    p0 = sheet.vert_df.loc[sheet.edge_df.loc[chosen_index, ['srce', 'trgt']], ['x', 'y']].mean().to_numpy()
+    cuts = division_cuts(sheet, [cell_id], [p0], [c0], skip_edges=[chosen_index])
+    if cell_id not in cuts.index:
+        return None
+
+    # Add a vertex in the middle of the chosen edge, and one where the line
+    # crosses the other side, with one put_verts.
+    intersection = cuts.loc[cell_id, ['x', 'y']].to_numpy(dtype=float)
+    new_mid_index, oppo_index = put_verts(sheet, [chosen_index, cuts.loc[cell_id, 'edge']],
+                                          [p0, intersection])[0]
+    # Split the cell with a line.
+    new_face_index = face_division(sheet, mother = cell_id, vert_a = new_mid_index , vert_b = oppo_index )
+    # face_division is tyssue's.
+    invalidate_adjacency(sheet)
+    # Put a vertex at the centroid, on the newly formed edge (last row in df).
+    cent_index = put_vert(sheet, edge = sheet.edge_df.index[-1], coord_put = c0)[0]
+    # Draw the mitosis cycle duration of the two daughter cells, uniform in [10, 15].
+    durations = draw_cycle_durations(rng, 2)
+    sheet.face_df.loc[cell_id,'T_cycle'] = durations[0]
+    sheet.face_df.loc[new_face_index,'T_cycle'] = durations[1]
+    update_boundary(sheet, [new_mid_index, oppo_index, cent_index])
+
+    # Following lines are commented out: Instead of using a new variable, I will minus T_cycle after each dt step by dt.
+    # sheet.face_df.loc[cell_id, 'T_age'] = dt
+    # sheet.face_df.loc[new_face_index,'T_age'] = dt
+    
+    print(f'cell {cell_id} is divided, dauther cell {new_face_index} is created.')
+    return new_face_index
+
+
 
+def divide_cells(sheet, rng, cent_data, mothers):
+    """
+    Divides all the mother cells in one topology pass, as division_mt does
+    for one cell: the line from the middle of a random edge through the
+    centroid splits the cell, with a vertex at the centroid.
+
+    The cut lines of all the mothers are computed together (see
+    division_cuts) against the current geometry. Then all the edges are
+    split with one put_verts, and the daughter faces, the centre vertices
+    and the new edges are appended with one concatenation per table.
+    Two mothers that would split the same edge can't be divided together,
+    the second one waits for the next round, after a local geometry update
+    (usually there is none, or only a few).
+
+    Parameters
+    ----------
+    sheet: a :class:`Sheet` object
+    rng: numpy random generator
+    cent_data: DataFrame
+        the centroids of the cells, with columns 'face', 'fx' and 'fy'
+    mothers: list of int
+        the indices of the dividing cells
+
+    Returns
+    -------
+    A dictionary {mother: daughter} of the divided cells, the mothers whose
+    division line crosses no edge are left out. If the sheet has a T_cycle
+    column, T_cycle of both cells is drawn again, as in division_mt. The
+    indices are not reset, and the geometry is only up to date around the
+    divisions that had to wait.
+
+    """
+    centres = cent_data.drop_duplicates(subset='face').set_index('face')[['fx', 'fy']]
+    mothers = list(mothers)
+    daughters = {}
+    while mothers:
+        edge_df = sheet.edge_df
+        in_mothers = edge_df[edge_df['face'].isin(mothers)]
+        # Draw the edge the division line starts from for each mother.
+        chosen = np.array([rng.choice(edges) for edges in
+                           in_mothers.groupby('face').groups.values()])
+        chosen_face = edge_df.loc[chosen, 'face'].to_numpy()
+        ends = edge_df.loc[chosen, ['srce', 'trgt']].to_numpy()
+        p0 = (sheet.vert_df.loc[ends[:, 0], ['x', 'y']].to_numpy()
+              + sheet.vert_df.loc[ends[:, 1], ['x', 'y']].to_numpy()) / 2
+        c0 = centres.loc[chosen_face].to_numpy(dtype=float)
+        cuts = division_cuts(sheet, chosen_face, p0, c0, skip_edges=chosen)
+
+        # Only divide together the mothers that split different edges.
+        has_cut = np.isin(chosen_face, cuts.index)
+        cut_edges = np.full(chosen.size, -1)
+        cut_edges[has_cut] = cuts.loc[chosen_face[has_cut], 'edge'].to_numpy()
+        split = np.column_stack([chosen, cut_edges])
+        split_opp = np.full(split.shape, -1)
+        split_opp[has_cut] = _lookup_opposites(
+            edge_df, edge_df.loc[split[has_cut].ravel()]).reshape(-1, 2)
+        used = set()
+        now, later = [], []
+        for i, mother in enumerate(chosen_face):
+            if not has_cut[i]:
+                continue
+            split_i = set(split[i]) | set(split_opp[i])
+            split_i.discard(-1)
+            if split_i & used:
+                later.append(mother)
+            else:
+                used |= split_i
+                now.append(i)
+        if not now:
+            break
+        now = np.array(now)
+        mothers_now = chosen_face[now]
+        new = _divide_now(sheet, mothers_now, chosen[now],
+                          p0[now], cuts.loc[mothers_now, ['edge', 'x', 'y']], c0[now])
+        daughters.update(zip(mothers_now.tolist(), new.tolist()))
+
+        if 'T_cycle' in sheet.face_df.columns:
+            # Draw the mitosis cycle duration of both cells, uniform in [10, 15].
+            durations = draw_cycle_durations(rng, (now.size, 2))
+            sheet.face_df.loc[mothers_now, 'T_cycle'] = durations[:, 0]
+            sheet.face_df.loc[new, 'T_cycle'] = durations[:, 1]
+        for mother, daughter in zip(mothers_now, new):
+            print(f'cell {mother} is divided, dauther cell {daughter} is created.')
+
+        mothers = later
+        if mothers:
+            around = sheet.edge_df[sheet.edge_df['face'].isin(mothers)]
+            update_geometry_local(sheet, around['face'].unique())
+    sheet.reset_topo()
+    return daughters
+
+
+def _divide_now(sheet, mothers, chosen, p0, cuts, c0):
+    """
+    Divides the mothers along the segments from p0 (on the chosen edges) to
+    the cut points, through c0, with the same orientation as tyssue's
+    face_division: the daughter takes the edges from the cut point to p0.
+    The mothers must not split the same edges.
+    """
+    n = len(mothers)
+    cut_points = cuts[['x', 'y']].to_numpy(dtype=float)
+    new_verts = put_verts(sheet, np.concatenate([chosen, cuts['edge'].to_numpy(dtype=int)]),
+                          np.concatenate([p0, cut_points]))[0]
+    vert_a, vert_b = new_verts[:n], new_verts[n:]
+
+    edge_df, vert_df, face_df = sheet.edge_df, sheet.vert_df, sheet.face_df
+    daughters = face_df.index.max() + 1 + np.arange(n)
+    centres = vert_df.index.max() + 1 + np.arange(n)
+
+    # Walk each mother from vert_b to vert_a, these edges go to the daughter.
+    in_mothers = edge_df[edge_df['face'].isin(mothers)]
+    next_edge = dict(zip(zip(in_mothers['face'], in_mothers['srce']),
+                         zip(in_mothers.index, in_mothers['trgt'])))
+    to_daughter = []
+    for mother, daughter, a, b in zip(mothers, daughters, vert_a, vert_b):
+        vert = b
+        while vert != a:
+            edge, vert = next_edge[(mother, vert)]
+            to_daughter.append((edge, daughter))
+    to_daughter = np.array(to_daughter).reshape(-1, 2)
+
+    # New edges, for each mother: b -> c, c -> a in the mother,
+    # a -> c, c -> b in the daughter, copied from the first edge of the mother.
+    template = in_mothers[~in_mothers['face'].duplicated()].set_index('face').loc[mothers]
+    new_edges = edge_df.index.max() + 1 + np.arange(4*n).reshape(4, n)
+    edge_rows = pd.concat([template]*4)
+    edge_rows.index = pd.Index(new_edges.ravel(), name=edge_df.index.name)
+    edge_rows['srce'] = np.concatenate([vert_b, centres, vert_a, centres])
+    edge_rows['trgt'] = np.concatenate([centres, vert_a, centres, vert_b])
+    edge_rows['face'] = np.concatenate([mothers, mothers, daughters, daughters])
+    if 'opposite' in edge_rows.columns:
+        edge_rows['opposite'] = new_edges[[3, 2, 1, 0]].ravel()
+    if 'is_boundary' in edge_rows.columns:
+        edge_rows['is_boundary'] = False
+
+    vert_rows = vert_df.loc[vert_a].set_axis(pd.Index(centres, name=vert_df.index.name))
+    vert_rows[sheet.coords] = c0
+    if 'is_boundary' in vert_rows.columns:
+        vert_rows['is_boundary'] = False
+    face_rows = face_df.loc[mothers].set_axis(pd.Index(daughters, name=face_df.index.name))
+
+    edge_df.loc[to_daughter[:, 0], 'face'] = to_daughter[:, 1]
+    sheet.edge_df = pd.concat([edge_df, edge_rows])
+    patch_adjacency(sheet, np.concatenate([to_daughter[:, 0], new_edges.ravel()]))
+    sheet.vert_df = pd.concat([vert_df, vert_rows])
+    sheet.face_df = pd.concat([face_df, face_rows])
+    return daughters
 
 
 def time_step_bot(sheet,dt, max_dist_allowed):
@@ -569,13 +1148,13 @@ def time_step_bot(sheet,dt, max_dist_allowed):
     # Compute the force with opposite of gradient direction.
     dot_r = my_ode(sheet)
     
-    movement = dot_r*dt
-    current_movement = np.linalg.norm(movement, axis=1)
-    while max(current_movement, default=0) > max_dist_allowed:
+    speed = np.linalg.norm(dot_r, axis=1).max(initial=0)
+    if speed*dt > max_dist_allowed:
+        # Number of halvings needed, computed at once (see integrators.py
+        # for a time step that adapts from step to step).
+        dt /= 2**math.ceil(math.log2(speed*dt/max_dist_allowed))
         print('dt adjusted')
-        dt /=2
-        movement = dot_r *dt
-        current_movement = np.linalg.norm(movement, axis=1)
+    movement = dot_r*dt
     return dt, movement
 
 
@@ -584,12 +1163,8 @@ def boundary_nodes(sheet):
     This returns a list of the vertex index that are boundary nodes.
 
     """
-    boundary = set()
-    for i in sheet.edge_df.index:
-        if sheet.edge_df.loc[i,'opposite'] == -1:
-            boundary.add(sheet.edge_df.loc[i,'srce'])
-            boundary.add(sheet.edge_df.loc[i,'trgt'])
-    boudnary_vert = sheet.vert_df.loc[list(boundary), ['x','y']]
+    boundary_vert, boundary_edge = find_boundary(sheet)
+    boudnary_vert = sheet.vert_df.loc[sorted(boundary_vert), ['x','y']]
     return boudnary_vert
 
 def T3_detection(sheet, edge_index, d_min):
@@ -604,38 +1179,16 @@ def T3_detection(sheet, edge_index, d_min):
     # Compute the radius of the detection zones
     radius = (1/4 * sheet.edge_df.loc[edge_index, 'length']**2 + d_min**2)**0.5
     
-    # Get the coordinates of node1 and node2
-    node1_coords = np.array(sheet.vert_df.loc[node1, ['x', 'y']])
-    node2_coords = np.array(sheet.vert_df.loc[node2, ['x', 'y']])
-    
-    # Define the zones as dictionaries
-    node1_zone = {
-        'center': node1_coords,
-        'radius': radius
-    }
-    node2_zone = {
-        'center': node2_coords,
-        'radius': radius
-    }
+    # Get the coordinates of node1 and node2 as the zone centres.
+    centres = sheet.vert_df.loc[[node1, node2], ['x', 'y']].to_numpy(dtype=float)
     
-    # Logic to check collision for both zones
-    for idx, vertex in boundary_nodes(sheet).iterrows():
-        if idx == node1 or idx == node2:
-            continue  # Skip the nodes of the edge itself
-        
-        vertex_coords = np.array(vertex[['x', 'y']])
-        
-        # Check if the vertex is within node1's zone
-        distance_to_node1 = np.linalg.norm(vertex_coords - node1_zone['center'])
-        if distance_to_node1 < node1_zone['radius']:
-            return True  # Collision detected in node1's zone
-        
-        # Check if the vertex is within node2's zone
-        distance_to_node2 = np.linalg.norm(vertex_coords - node2_zone['center'])
-        if distance_to_node2 < node2_zone['radius']:
-            return True  # Collision detected in node2's zone
-
-    return False  # No collision detected in either zone
+    # Check all the boundary nodes against both zones at once,
+    # skipping the nodes of the edge itself.
+    boundary = boundary_nodes(sheet)
+    boundary = boundary[~boundary.index.isin([node1, node2])]
+    vertex_coords = boundary[['x', 'y']].to_numpy(dtype=float)
+    distances = np.linalg.norm(vertex_coords[:, None, :] - centres[None, :, :], axis=-1)
+    return bool((distances < radius).any())
 
 def pnt2line(pnt, start, end):
     """
@@ -644,18 +1197,10 @@ def pnt2line(pnt, start, end):
     distance from pnt to the line and the coordinates of the 
     nearest point on the line.
     
-    1  Convert the line segment to a vector ('line_vec').
-    2  Create a vector connecting start to pnt ('pnt_vec').
-    3  Find the length of the line vector ('line_len').
-    4  Convert line_vec to a unit vector ('line_unitvec').
-    5  Scale pnt_vec by line_len ('pnt_vec_scaled').
-    6  Get the dot product of line_unitvec and pnt_vec_scaled ('t').
-    7  Ensure t is in the range 0 to 1.
-    8  Use t to get the nearest location on the line to the end
-        of vector pnt_vec_scaled ('nearest').
-    9  Calculate the distance from nearest to pnt_vec_scaled.
-    10 Translate nearest back to the start/end line. 
-    Malcolm Kesson 16 Dec 2012
+    This is the single pair version of point_segment_distance(): the point
+    is projected onto the line, the projection parameter 't' is clamped to
+    the range 0 to 1, and the distance is taken to the clamped point.
+    Originally after Malcolm Kesson 16 Dec 2012
 
     Parameters
     ----------
@@ -671,20 +1216,8 @@ def pnt2line(pnt, start, end):
     nearest : tuple of coordinates in floats of the nearest point on the line
 
     """
-    line_vec = vector(start, end)
-    pnt_vec = vector(start, pnt)
-    line_len = length(line_vec)
-    line_unitvec = unit(line_vec)
-    pnt_vec_scaled = scale(pnt_vec, 1.0/line_len)
-    t = dot(line_unitvec, pnt_vec_scaled)    
-    if t < 0.0:
-        t = 0.0
-    elif t > 1.0:
-        t = 1.0
-    nearest = scale(line_vec, t)
-    dist = distance(nearest, pnt_vec)
-    nearest = add(nearest, start)
-    return dist, nearest
+    dist, t, nearest = point_segment_distance(start, end, pnt)
+    return float(dist), tuple(nearest)
 
 def edge_extension(sheet, edge_id, total_extension):
     """
@@ -729,13 +1262,8 @@ def adjacency_check(sheet, vert1, vert2):
     """
     Returns True if vert1 and vert2 are connected by an edge. Otherwise False
     """
-    
-    exists = sheet.edge_df[
-        ((sheet.edge_df['srce'] == vert1) & (sheet.edge_df['trgt'] == vert2)) |
-        ((sheet.edge_df['srce'] == vert2) & (sheet.edge_df['trgt'] == vert1))
-    ].any().any()  # Checks if any rows satisfy the condition
-
-    return exists  # Return True if such a row exists, False otherwise
+    # Looked up in the adjacency index, see adjacency_index.py
+    return edge_between(sheet, vert1, vert2) is not None
 
 def adjacent_vert(sheet, v, srce_id, trgt_id):
         
@@ -748,29 +1276,98 @@ def adjacent_vert(sheet, v, srce_id, trgt_id):
             
 def are_vertices_in_same_face(sheet, vert1, vert2):
     # Find the faces where each vertex appears as either 'srce' or 'trgt'
-    faces_vert1 = set(sheet.edge_df[sheet.edge_df['srce'] == vert1]['face']).union(
-        sheet.edge_df[sheet.edge_df['trgt'] == vert1]['face']
-    )
-    faces_vert2 = set(sheet.edge_df[sheet.edge_df['srce'] == vert2]['face']).union(
-        sheet.edge_df[sheet.edge_df['trgt'] == vert2]['face']
-    )
+    faces_vert1 = vert_faces(sheet, vert1)
+    faces_vert2 = vert_faces(sheet, vert2)
     
     # Check if there is any intersection between the faces of the two vertices
     return bool(faces_vert1.intersection(faces_vert2))
 
 
 def find_boundary(sheet):
-    """Find boundary vertices and edges."""
-    boundary_vert = set()
-    boundary_edge = set()
-    for i in sheet.edge_df.index:
-        if sheet.edge_df.loc[i, 'opposite'] == -1:
-            boundary_vert.add(sheet.edge_df.loc[i, 'srce'])
-            boundary_vert.add(sheet.edge_df.loc[i, 'trgt'])
-            boundary_edge.add(i)
+    """Find boundary vertices and edges.
+
+    If the boundary is tracked (see reset_boundary), the 'is_boundary'
+    columns are read directly, otherwise the 'opposite' column is used.
+    """
+    if 'is_boundary' in sheet.edge_df.columns:
+        edge_mask = sheet.edge_df['is_boundary'].to_numpy(dtype=bool)
+        boundary_edge = set(sheet.edge_df.index[edge_mask])
+        boundary_vert = set(sheet.vert_df.index[sheet.vert_df['is_boundary'].to_numpy(dtype=bool)])
+        return boundary_vert, boundary_edge
+    boundary = sheet.edge_df[sheet.edge_df['opposite'] == -1]
+    boundary_vert = set(boundary['srce']).union(boundary['trgt'])
+    boundary_edge = set(boundary.index)
     return boundary_vert, boundary_edge
 
-    
+
+def reset_boundary(sheet):
+    """
+    Starts (or restarts) the boundary tracking of the sheet.
+
+    The 'opposite' column is recomputed, then the boolean columns
+    edge_df['is_boundary'] and vert_df['is_boundary'] are created. From then
+    on, put_vert, collapse_edge, T3_swap, division_mt, lateral_split,
+    edge_remover and delete_face keep them up to date, only around the
+    vertices they change. T1_sweep and T2_sweep return the vertices they
+    changed, to pass to update_boundary.
+    Other topology changes (e.g. tyssue's type1_transition or remove_face)
+    are not tracked, so this should be called again after them.
+    """
+    sheet.edge_df['opposite'] = _opposite_edges(sheet.edge_df)
+    sheet.edge_df['is_boundary'] = sheet.edge_df['opposite'].to_numpy() == -1
+    boundary = sheet.edge_df[sheet.edge_df['is_boundary']]
+    sheet.vert_df['is_boundary'] = sheet.vert_df.index.isin(
+        np.union1d(boundary['srce'], boundary['trgt']))
+
+
+def update_boundary(sheet, verts):
+    """
+    Updates the 'opposite' and 'is_boundary' columns for the edges that are
+    connected to the vertices in verts, and the 'is_boundary' flag of the
+    vertices at their ends.
+
+    The opposite of an edge connected to a vertex is connected to the same
+    vertex, so only these edges are searched, and they are found in the
+    adjacency index: the cost grows with len(verts), not with the sheet.
+    Does nothing if the boundary is not tracked (see reset_boundary).
+    """
+    verts = np.unique(np.asarray(verts, dtype=int))
+    if 'is_boundary' not in sheet.edge_df.columns or not verts.size:
+        return
+    edge_df = sheet.edge_df
+    local = edge_df.loc[_edges_at(sheet, verts)]
+    opposite = _opposite_edges(local)
+    edge_df.loc[local.index, 'opposite'] = opposite
+    edge_df.loc[local.index, 'is_boundary'] = opposite == -1
+
+    # A vertex is on the boundary if any of its edges is, a vertex left
+    # without edges is not.
+    ends = np.union1d(np.union1d(local['srce'], local['trgt']), verts)
+    around = edge_df.loc[_edges_at(sheet, ends)]
+    around = around[around['is_boundary'].to_numpy(dtype=bool)]
+    ends = ends[np.isin(ends, sheet.vert_df.index)]
+    sheet.vert_df.loc[ends, 'is_boundary'] = np.isin(
+        ends, np.union1d(around['srce'], around['trgt']))
+
+
+def _edges_at(sheet, verts):
+    """ Returns the sorted ids of the edges that start or end at verts. """
+    edges = set()
+    for vert in verts.tolist():
+        edges |= vert_edges(sheet, vert)
+    return sorted(edges)
+
+
+def _opposite_edges(edges):
+    """
+    Returns the index of the opposite of each edge in edges, searched within
+    edges only, or -1 if there is none.
+    """
+    by_pair = pd.Series(edges.index, index=pd.MultiIndex.from_arrays([edges['srce'], edges['trgt']]))
+    by_pair = by_pair[~by_pair.index.duplicated()]
+    flipped = pd.MultiIndex.from_arrays([edges['trgt'], edges['srce']])
+    return by_pair.reindex(flipped).fillna(-1).to_numpy(dtype=int)
+
 def T3_transition(sheet, edge_id, vert_id, d_min, d_sep, nearest):
     # Extract source and target vertex IDs
     srce_id, trgt_id = sheet.edge_df.loc[edge_id, ['srce', 'trgt']]
@@ -815,13 +1412,14 @@ def T3_transition(sheet, edge_id, vert_id, d_min, d_sep, nearest):
         # If rank is > 2, then we need to compute more.
         if sorted_rows_id: 
             # Store the starting point as the nearest, then compute the unit vector.
-            last_coord = nearest
             a = vector(nearest , sheet.vert_df.loc[v_adj, ['x', 'y']].values)
             a_hat = a / round(np.linalg.norm(a),4)
+            # The new vertices are d_sep apart from nearest, all put at once.
+            steps = np.arange(1, len(sorted_rows_id) + 1)[:, None]
+            new_vert_ids = put_verts(sheet, [edge_id]*len(sorted_rows_id),
+                                     np.asarray(nearest, dtype=float) + steps*d_sep*a_hat)[0]
             
-            for i in sorted_rows_id:
-                last_coord += a_hat*d_sep
-                new_vert_id = put_vert(sheet, edge_id, last_coord)[0]
+            for i, new_vert_id in zip(sorted_rows_id, new_vert_ids):
                 sheet.edge_df.loc[sheet.edge_df['srce']==i,'srce'] = new_vert_id
                 sheet.edge_df.loc[sheet.edge_df['trgt']==i,'trgt'] = new_vert_id
                 
@@ -834,9 +1432,7 @@ def T3_transition(sheet, edge_id, vert_id, d_min, d_sep, nearest):
         if rank == 2:
             coord1 = nearest - 0.5*d_sep*a_hat
             coord2 = nearest + 0.5*d_sep*a_hat
-            new_id_1 = put_vert(sheet, edge_id, coord1)[0]
-            new_id_2 = put_vert(sheet, edge_id, coord2)[0]
-            new_vert_id = [new_id_1, new_id_2]
+            new_vert_id = list(put_verts(sheet, [edge_id]*2, [coord1, coord2])[0])
             
             # Now, the x-value sorting is based on the distance 
             # between the point to the srce_id.
@@ -854,10 +1450,7 @@ def T3_transition(sheet, edge_id, vert_id, d_min, d_sep, nearest):
             coord1 = nearest - 0.5*d_sep*a_hat
             coord2 = nearest
             coord3 = nearest + 0.5*d_sep*a_hat
-            new_id_1 = put_vert(sheet, edge_id, coord1)[0]
-            new_id_2 = put_vert(sheet, edge_id, coord2)[0]
-            new_id_3 = put_vert(sheet, edge_id, coord3)[0]
-            new_vert_id = [new_id_1, new_id_2, new_id_3]
+            new_vert_id = list(put_verts(sheet, [edge_id]*3, [coord1, coord2, coord3])[0])
             
             # Now, the x-value sorting is based on the distance 
             # between the point to the srce_id.
@@ -871,6 +1464,8 @@ def T3_transition(sheet, edge_id, vert_id, d_min, d_sep, nearest):
                 for j in list(range(len(new_vert_id))):
                     sheet.edge_df.loc[sheet.edge_df['srce']==i,'srce'] = new_vert_id[j]
                     sheet.edge_df.loc[sheet.edge_df['trgt']==i,'trgt'] = new_vert_id[j]
+    # The edges are rewired with masks, build the adjacency index again.
+    invalidate_adjacency(sheet)
 
 def division_2(sheet, rng, cent_data, cell_id):
     """The cells keep growing, when the area exceeds a critical area, then
@@ -892,52 +1487,35 @@ def division_2(sheet, rng, cent_data, cell_id):
     # We need to randomly choose one of the edges in cell 2.
     chosen_index = rng.choice(list(edge_in_cell.index))
     # Extract and store the centroid coordinate.
-    c0x = float(cent_data.loc[cent_data['face']==cell_id, ['fx']].values[0])
-    c0y = float(cent_data.loc[cent_data['face']==cell_id, ['fy']].values[0])
+    c0x = float(cent_data.loc[cent_data['face']==cell_id, 'fx'].values[0])
+    c0y = float(cent_data.loc[cent_data['face']==cell_id, 'fy'].values[0])
     c0 = [c0x, c0y]
 
-    # Add a vertex in the middle of the chosen edge.
-    new_mid_index = add_vert(sheet, edge = chosen_index)[0]
-    # Extract for source vertex coordinates of the newly added vertex.
-    p0x = sheet.vert_df.loc[new_mid_index,'x']
-    p0y = sheet.vert_df.loc[new_mid_index,'y']
-    p0 = [p0x, p0y]
-
-    # Compute the directional vector from new_mid_point to centroid.
-    rx = c0x - p0x
-    ry = c0y - p0y
-    r  = [rx, ry]   # use the line in opposite direction.
-    # We need to use iterrows to iterate over rows in pandas df
-    # The iteration has the form of (index, series)
-    # The series can be sliced.
-    for index, row in edge_in_cell.iterrows():
-        s0x = row['sx']
-        s0y = row['sy']
-        t0x = row['tx']
-        t0y = row['ty']
-        v1 = [s0x-p0x,s0y-p0y]
-        v2 = [t0x-p0x,t0y-p0y]
-        # if the xprod_2d returns negative, then line intersects the line segment.
-        if xprod_2d(r, v1)*xprod_2d(r, v2) < 0 and index !=chosen_index :
-            dx = row['dx']
-            dy = row['dy']
-            c1 = dx*ry-dy*rx
-            c2 = s0y*rx-p0y*rx - s0x*ry + p0x*ry
-            k=c2/c1
-            intersection = [s0x+k*dx, s0y+k*dy]
-            oppo_index = put_vert(sheet, index, intersection)[0]
-            # Split the cell with a line.
-            new_face_index = face_division(sheet, mother = cell_id, vert_a = new_mid_index , vert_b = oppo_index )
-            # Put a vertex at the centroid, on the newly formed edge (last row in df).
-            cent_index = put_vert(sheet, edge = sheet.edge_df.index[-1], coord_put = c0)[0]
-            random_int_1 = rng.integers(10000, 15000) / 1000
-            random_int_2 = rng.integers(10000, 15000) / 1000
-            sheet.face_df.loc[cell_id,'T_cycle'] = np.array(random_int_1, dtype=np.float64)
-            sheet.face_df.loc[new_face_index,'T_cycle'] = np.array(random_int_2, dtype=np.float64)
-            sheet.face_df.loc[cell_id, 'prefered_area'] = 1
-            sheet.face_df.loc[new_face_index,'prefered_area'] = 1
-            print(f'cell {cell_id} is divided, dauther cell {new_face_index} is created.')
-            return new_face_index
+    # The division line goes from the middle of the chosen edge through the
+    # centroid, find the edge it crosses on the other side.
+    p0 = sheet.vert_df.loc[sheet.edge_df.loc[chosen_index, ['srce', 'trgt']], ['x', 'y']].mean().to_numpy()
+    cuts = division_cuts(sheet, [cell_id], [p0], [c0], skip_edges=[chosen_index])
+    if cell_id not in cuts.index:
+        return None
+
+    # Add a vertex in the middle of the chosen edge, and one where the line
+    # crosses the other side, with one put_verts.
+    intersection = cuts.loc[cell_id, ['x', 'y']].to_numpy(dtype=float)
+    new_mid_index, oppo_index = put_verts(sheet, [chosen_index, cuts.loc[cell_id, 'edge']],
+                                          [p0, intersection])[0]
+    # Split the cell with a line.
+    new_face_index = face_division(sheet, mother = cell_id, vert_a = new_mid_index , vert_b = oppo_index )
+    # face_division is tyssue's.
+    invalidate_adjacency(sheet)
+    # Put a vertex at the centroid, on the newly formed edge (last row in df).
+    cent_index = put_vert(sheet, edge = sheet.edge_df.index[-1], coord_put = c0)[0]
+    durations = draw_cycle_durations(rng, 2)
+    sheet.face_df.loc[cell_id,'T_cycle'] = durations[0]
+    sheet.face_df.loc[new_face_index,'T_cycle'] = durations[1]
+    sheet.face_df.loc[cell_id, 'prefered_area'] = 1
+    sheet.face_df.loc[new_face_index,'prefered_area'] = 1
+    print(f'cell {cell_id} is divided, dauther cell {new_face_index} is created.')
+    return new_face_index
 
 
 
@@ -954,18 +1532,16 @@ def neighbour_edge(sheet, face1, face2):
      Returns:
          The index of the shared neighboring edge if it exists, otherwise None.
      """
-     # Get the edges associated with face1 and face2
+     # Get the edges associated with face1, and the faces on their other side.
      face1_edges = sheet.edge_df[sheet.edge_df["face"] == face1]
-     face2_edges = sheet.edge_df[sheet.edge_df["face"] == face2]
-     
-     # Check for common edges by matching the 'opposite' relationship
-     for edge_id in face1_edges.index:
-         opposite_edge = sheet.edge_df.loc[edge_id, "opposite"]
-         if opposite_edge in face2_edges.index:
-             return edge_id  # Return the edge from face1
-     
+     opposite = _lookup_opposites(sheet.edge_df, face1_edges)
+     other_face = sheet.edge_df["face"].reindex(opposite).to_numpy()
+     shared = face1_edges.index[other_face == face2]
+     if len(shared):
+         return shared[0]  # Return the edge from face1
+
      # If no common edge is found
-     return None       
+     return None
 
 
 def edge_remover(sheet, edge_id):
@@ -976,6 +1552,9 @@ def edge_remover(sheet, edge_id):
     Args:
         sheet: The cell sheet containing edge and vertex information.
         edge_id: The ID of the edge to be removed.
+
+    Returns:
+        The ID of the remaining face.
     """
     # Get the opposite edge
     oppo = sheet.edge_df.loc[edge_id, 'opposite']
@@ -995,39 +1574,233 @@ def edge_remover(sheet, edge_id):
     else:
         new_face_id = min(face1, face2)  # Default to the smaller ID if neither is 'ST'
     
-    # Update the face column for both edges
-    for e in [edge_id, oppo]:
-        face_id = sheet.edge_df.loc[e, 'face']
-        sheet.edge_df.loc[sheet.edge_df['face'] == face_id, 'face'] = new_face_id
-    
+    # Update the face column for both faces, in one pass.
+    face = sheet.edge_df['face'].to_numpy()
+    relabelled = (face == face1) | (face == face2)
+    sheet.edge_df['face'] = np.where(relabelled, new_face_id, face)
+    # The edge and its opposite are among them.
+    changed = sheet.edge_df.index[relabelled]
+
     # Drop the edge and its opposite
+    ends = sheet.edge_df.loc[edge_id, ['srce', 'trgt']].tolist()
     sheet.edge_df.drop([edge_id, oppo], inplace=True)
+    patch_adjacency(sheet, changed)
+    update_boundary(sheet, ends)
 
-    # Assign 'ST' to the new face and update associated edges
+    # Assign 'ST' to the new face, its edges read it with face_to_edge.
     sheet.face_df.loc[new_face_id, "cell_type"] = 'ST'
-    
-    # Find the edges associated with the new face ID
-    edges_to_update = sheet.edge_df[sheet.edge_df['face'] == new_face_id].index
-
-    # Update the 'cell type' property for these edges
-    sheet.edge_df.loc[edges_to_update, 'cell type'] = 'ST'
-
+    return new_face_id
 
 
 def update_cell_type(sheet, face_id, new_type='ST'):
     """
-    Updates the 'cell type' of all edges associated with a given face ID to a new type.
+    Updates the 'cell_type' of a face. The cell type of its edges is not
+    stored, it is read from the faces with face_to_edge.
 
     Args:
         sheet: The cell sheet containing edge and vertex information.
-        face_id: The ID of the face whose edges' 'cell type' should be updated.
-        new_type: The new cell type to assign to the edges (default is 'ST').
+        face_id: The ID of the face whose 'cell_type' should be updated.
+        new_type: The new cell type to assign (default is 'ST').
+    """
+    sheet.face_df.loc[face_id, 'cell_type'] = new_type
+
+
+def face_to_edge(sheet, column):
+    """
+    Returns the values of a face_df column for every edge (the value of the
+    face of the edge), as a Series indexed like edge_df, e.g.
+    face_to_edge(sheet, 'cell_type') == 'ST' for the ST edges.
+
+    The positions of the edges' faces in face_df are cached on the sheet
+    together with the face column they come from, and looked up again only
+    when the topology changed, so this is one gather per call. Unlike
+    sheet.upcast_face, the face indices don't need to be contiguous.
     """
-    # Find the edges associated with the given face ID
-    edges_to_update = sheet.edge_df[sheet.edge_df['face'] == face_id].index
+    face = sheet.edge_df['face'].to_numpy()
+    faces = sheet.face_df.index.to_numpy()
+    cache = getattr(sheet, '_face_to_edge', None)
+    if cache is None or not (np.array_equal(cache['face'], face)
+                             and np.array_equal(cache['faces'], faces)):
+        cache = {'face': face.copy(), 'faces': faces.copy(),
+                 'pos': sheet.face_df.index.get_indexer(face)}
+        sheet._face_to_edge = cache
+    return pd.Series(sheet.face_df[column].to_numpy()[cache['pos']],
+                     index=sheet.edge_df.index, name=column)
+
+
+def fuse_cells(sheet, pairs):
+    """
+    Fuses CT cells into ST cells, all the pairs in one rewrite of the edge
+    table: the edges of every CT face are relabelled with its ST face, the
+    half-edges that end up with the same face on both sides are dropped (with
+    the vertices left without edges), and the CT faces are removed. The
+    merged faces get cell_type 'ST', their edges are put
+    in the order of their boundary cycle, and their geometry is updated
+    locally. As in delete_face, indices are not reset, call
+    sheet.reset_index() before the tyssue functions that need them contiguous
+    (e.g. geom.update_all).
 
-    # Update the 'cell type' property for these edges
-    sheet.edge_df.loc[edges_to_update, 'cell type'] = new_type
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    pairs : list of (CT face, ST face)
+        several CT cells can fuse into the same ST cell, and an ST cell can
+        itself be fused into another one, e.g. [(1, 2), (2, 5)] fuses 1 and 2
+        into 5.
+
+    Returns
+    -------
+    A dictionary {CT face: the face it is now part of}.
+    """
+    relabel = {}
+    for ct, st in pairs:
+        if ct == st or relabel.get(ct, st) != st:
+            raise ValueError(f'Cell {ct} can only be fused into one other cell.')
+        relabel[ct] = st
+    # Follow the chains of fusions to the face that remains.
+    for ct in relabel:
+        st, seen = relabel[ct], {ct}
+        while st in relabel:
+            if st in seen:
+                raise ValueError(f'Fusions of cell {ct} form a cycle.')
+            seen.add(st)
+            st = relabel[st]
+        relabel[ct] = st
+    fused = np.fromiter(relabel.keys(), dtype=int)
+    merged = np.unique(np.fromiter(relabel.values(), dtype=int))
+
+    edge_df = sheet.edge_df
+    face = edge_df['face'].to_numpy()
+    pos = pd.Index(fused).get_indexer(face)
+    new_face = np.where(pos >= 0, np.fromiter(relabel.values(), dtype=int)[pos], face)
+
+    # Internal edges: both sides now in the same face, one of them relabelled.
+    touched = np.flatnonzero(np.isin(new_face, merged))
+    opposite = _lookup_opposites(edge_df, edge_df.iloc[touched])
+    has_opp = opposite >= 0
+    internal = np.zeros(touched.size, dtype=bool)
+    internal[has_opp] = new_face[edge_df.index.get_indexer(opposite[has_opp])] == new_face[touched[has_opp]]
+    dropped = edge_df.iloc[touched[internal]]
+    ends = np.union1d(dropped['srce'], dropped['trgt'])
+
+    # The relabelled edges, and the internal ones, which are dropped.
+    changed = pos >= 0
+    changed[touched[internal]] = True
+    changed = edge_df.index[changed]
+    keep = np.ones(face.size, dtype=bool)
+    keep[touched[internal]] = False
+    edge_df = edge_df[keep].copy()
+    edge_df['face'] = new_face[keep]
+    in_merged = np.isin(edge_df['face'].to_numpy(), merged)
+    sheet.edge_df = edge_df
+    left = np.setdiff1d(ends, np.union1d(edge_df['srce'], edge_df['trgt']))
+    sheet.vert_df = sheet.vert_df.drop(left)
+    sheet.face_df = sheet.face_df.drop(fused)
+    sheet.face_df.loc[merged, 'cell_type'] = 'ST'
+    sheet.face_df.loc[merged, 'num_sides'] = edge_df.loc[in_merged, 'face'].value_counts().reindex(merged).to_numpy()
+    # The merged faces' edges go last, in cycle order.
+    cycle_order = _cycle_order(edge_df[in_merged], sheet.vert_df)
+    sheet.edge_df = pd.concat([edge_df[~in_merged], edge_df[in_merged].iloc[cycle_order]])
+    patch_adjacency(sheet, changed)
+    update_boundary(sheet, ends)
+    update_geometry_local(sheet, merged)
+    sheet.reset_topo()
+    return relabel
+
+
+def _cycle_order(edges, vert_df):
+    """
+    Returns the positions of edges sorted by face, then along each boundary
+    cycle of the face, e.g. a face with a hole has two cycles.
+
+    The next edge of each edge is found with one index lookup, then the cycles
+    and the position of each edge in its cycle are computed by pointer
+    jumping, log2(len(edges)) array operations. Where the boundary of a face
+    visits a vertex twice (e.g. two fused cells that touch at one vertex),
+    the vertex has two edges going out, the next edge of each edge coming in
+    is then chosen from the positions in vert_df.
+    """
+    n = len(edges)
+    face = edges['face'].to_numpy()
+    srce = edges['srce'].to_numpy()
+    trgt = edges['trgt'].to_numpy()
+    by_srce = pd.MultiIndex.from_arrays([face, srce])
+    by_trgt = pd.MultiIndex.from_arrays([face, trgt])
+    twice = by_srce.duplicated(keep=False)
+    single = np.flatnonzero(~twice)
+    nxt = by_srce[single].get_indexer(by_trgt)
+    nxt = np.where(nxt >= 0, single[nxt], -1)
+
+    pinch = np.flatnonzero(by_trgt.isin(by_srce[twice]))
+    if pinch.size:
+        going_out = {}
+        for i in np.flatnonzero(twice).tolist():
+            going_out.setdefault((face[i], srce[i]), []).append(i)
+        xy = vert_df[['x', 'y']]
+        for e in pinch.tolist():
+            candidates = np.array(going_out[(face[e], trgt[e])])
+            centre = xy.loc[trgt[e]].to_numpy(dtype=float)
+            back = xy.loc[srce[e]].to_numpy(dtype=float) - centre
+            ahead = xy.loc[trgt[candidates]].to_numpy(dtype=float) - centre
+            # The face is on the left of its edges, so the next edge is the
+            # first one met turning clockwise from the way back.
+            turn = np.mod(np.arctan2(back[1], back[0])
+                          - np.arctan2(ahead[:, 1], ahead[:, 0]), 2*np.pi)
+            turn[turn == 0] = 2*np.pi
+            nxt[e] = candidates[np.argmin(turn)]
+    if (nxt < 0).any() or np.unique(nxt).size != n:
+        raise ValueError('The boundary of a face is not closed.')
+    rounds = max(n - 1, 1).bit_length()
+
+    # Each cycle is labelled by its smallest position.
+    cycle, jump = np.arange(n), nxt.copy()
+    for _ in range(rounds):
+        cycle = np.minimum(cycle, cycle[jump])
+        jump = jump[jump]
+
+    # Cut every cycle before its label, then count the steps to the cut.
+    # Position n is the end, it points to itself.
+    nxt = np.append(nxt, n)
+    nxt[:-1][nxt[:-1] == cycle] = n
+    to_end = np.append(np.ones(n, dtype=int), 0)
+    to_end[nxt == n] = 0
+    to_end[n] = 0
+    jump = nxt
+    for _ in range(rounds):
+        to_end = to_end + to_end[jump]
+        jump = jump[jump]
+    return np.lexsort((-to_end[:-1], cycle, face))
+
+
+def dissolve_syncytium(sheet, faces):
+    """
+    Dissolves all the internal edges between the given faces: every group
+    of these faces connected by shared edges becomes one face, with the
+    smallest id of the group (see fuse_cells). E.g. all the ST faces of a
+    sheet: dissolve_syncytium(sheet, sheet.face_df.index[sheet.face_df['cell_type'] == 'ST'])
+
+    Returns
+    -------
+    A dictionary {dissolved face: the face it is now part of}.
+    """
+    faces = np.unique(np.asarray(faces, dtype=int))
+    edge_df = sheet.edge_df
+    edges = edge_df[edge_df['face'].isin(faces)]
+    opposite = _lookup_opposites(edge_df, edges)
+    other = edge_df['face'].reindex(opposite).to_numpy()
+    shared = np.isin(other, faces)
+    rows = np.searchsorted(faces, edges['face'].to_numpy()[shared])
+    cols = np.searchsorted(faces, other[shared].astype(int))
+    graph = sparse.csr_matrix((np.ones(rows.size), (rows, cols)), shape=(faces.size, faces.size))
+    _, group = connected_components(graph, directed=False)
+    # faces is sorted, so the first face of each group is its smallest.
+    first = np.full(group.max(initial=-1) + 1, -1)
+    first[group[::-1]] = faces[::-1]
+    keep = first[group]
+    pairs = [(f, k) for f, k in zip(faces.tolist(), keep.tolist()) if f != k]
+    if not pairs:
+        return {}
+    return fuse_cells(sheet, pairs)
 
 
 
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Quasistatic energy minimization with a truncated Newton method, in place of
+QSSolver().find_energy_min after a division or a growth step.
+
+QSSolver runs L-BFGS-B, which starts every call without curvature
+information and has to build it again from gradient evaluations, even when
+only one cell divided since the previous equilibrium. Here the curvature is
+exact: the Newton steps are solved by conjugate gradients with the Hessian
+vector products of planar_hessian.py (scipy's Newton-CG), from the current
+vertex positions, i.e. the previous equilibrium plus the event. Near an
+equilibrium this converges in a few Newton iterations.
+
+The energy is the one of planar_gradient.py (LineTension, FaceContractility,
+FaceAreaElasticity and PerimeterElasticity). The model passed in is only
+checked against these effectors, a model with another one is refused
+instead of being minimized with the wrong energy.
+"""
+import time
+
+import numpy as np
+from scipy.optimize import minimize
+
+from planar_gradient import planar_energy, planar_gradient
+from planar_hessian import planar_hessian_product
+
+
+def newton_energy_min(sheet, geom, model=None, log=None, **options):
+    """
+    Moves the active vertices of the sheet to the energy minimum and updates
+    the geometry, like QSSolver().find_energy_min(sheet, geom, model).
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    geom : the geometry class, e.g. PlanarGeometry
+    model : optional, checked to have no effector other than the ones of
+        planar_gradient.py, ValueError otherwise
+    log : list, optional
+        a dict with the iterations, the energy, gradient and Hessian product
+        evaluations, and the time of the call is appended to it.
+    **options : passed to the Newton-CG options of scipy.optimize.minimize,
+        e.g. xtol (default 1e-8) or maxiter, except gtol (default 1e-6): the
+        minimization succeeded if no component of the gradient at the end is
+        larger than gtol. Newton-CG stops on xtol, which a shrinking step can
+        reach far from a minimum.
+
+    Returns
+    -------
+    res : scipy.optimize.OptimizeResult, with the time of the call in
+        res.time (seconds) and the largest gradient component in res.gtol
+    """
+    if model is not None:
+        _check_model(model)
+    gtol = options.pop('gtol', 1e-6)
+    start = time.perf_counter()
+    valid_active_verts = sheet.active_verts[sheet.active_verts.isin(sheet.vert_df.index)]
+    res = _newton_min(sheet, valid_active_verts, options)
+    sheet.vert_df.loc[valid_active_verts, ['x', 'y']] = res.x.reshape(-1, 2)
+    geom.update_all(sheet)
+    _finish(res, start, log, gtol)
+    return res
+
+
+def _check_model(model):
+    """ Raises ValueError if model has an effector planar_energy doesn't have. """
+    from tyssue.dynamics.effectors import (FaceAreaElasticity, FaceContractility,
+                                           LineTension, PerimeterElasticity)
+    supported = {e.label for e in (LineTension, FaceContractility,
+                                   FaceAreaElasticity, PerimeterElasticity)}
+    unsupported = [label for label in model.labels if label not in supported]
+    if unsupported:
+        raise ValueError(f'newton_energy_min does not compute the effectors {unsupported}')
+
+
+def _newton_min(sheet, verts, options):
+    """
+    Runs Newton-CG on the positions of verts, the other vertices of the
+    sheet stay where they are. The sheet is not changed.
+    """
+    rows = sheet.vert_df.index.get_indexer(verts)
+    pos = sheet.vert_df[['x', 'y']].to_numpy(dtype=float)
+
+    def positions(x):
+        # Only verts move, the others keep their position.
+        full = pos.copy()
+        full[rows] = x.reshape(-1, 2)
+        return full
+
+    def energy(x):
+        return planar_energy(sheet, positions(x))
+
+    def gradient(x):
+        return planar_gradient(sheet, positions(x))[rows].ravel()
+
+    def hessian_product(x, vec):
+        full = np.zeros_like(pos)
+        full[rows] = vec.reshape(-1, 2)
+        return planar_hessian_product(sheet, full, positions(x))[rows].ravel()
+
+    return minimize(energy, pos[rows].ravel(), method='Newton-CG', jac=gradient,
+                    hessp=hessian_product, options={'xtol': 1e-8, **options})
+
+
+def _finish(res, start, log, gtol):
+    """
+    Decides the success of res from its gradient, writes the time of the
+    call in res, and appends them to log.
+    """
+    res.gtol = np.abs(res.jac).max(initial=0)
+    res.success = bool(res.gtol <= gtol)
+    if not res.success:
+        res.message = f'{res.message} The largest gradient component is {res.gtol:.3g} > gtol={gtol}.'
+    res.time = time.perf_counter() - start
+    if log is not None:
+        log.append({'nit': res.nit, 'nfev': res.nfev, 'njev': res.njev,
+                    'nhev': res.get('nhev', 0), 'energy': res.fun, 'gradient': res.gtol,
+                    'success': res.success, 'time': res.time})
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Gradient of the PlanarModel energy (LineTension + FaceContractility +
+FaceAreaElasticity, and PerimeterElasticity as in 2D migration.py) computed
+in one pass over plain arrays, for my_ode.
+
+PlanarModel.compute_gradient builds several DataFrames per call and reads the
+geometry columns of edge_df. Here the edge vectors, lengths, face areas and
+perimeters are computed from the vertex coordinates inside the kernel, and
+the gradient is written into one output array. The kernel is
+compiled with numba if it is installed, otherwise the same computation is
+done with numpy. planar_energy gives the energy itself, for the minimizers.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _gradient_loops(pos, srce, trgt, face, line_tension, face_params, n_faces, out):
+    """
+    The kernel, with explicit loops (compiled by numba).
+
+    face_params columns: see _face_params.
+    """
+    n_edges = srce.shape[0]
+    area = np.zeros(n_faces)
+    perimeter = np.zeros(n_faces)
+    for e in range(n_edges):
+        s, t, f = srce[e], trgt[e], face[e]
+        dx = pos[t, 0] - pos[s, 0]
+        dy = pos[t, 1] - pos[s, 1]
+        perimeter[f] += np.sqrt(dx * dx + dy * dy)
+        area[f] += 0.5 * (pos[s, 0] * pos[t, 1] - pos[s, 1] * pos[t, 0])
+
+    out[:, :] = 0.0
+    for e in range(n_edges):
+        s, t, f = srce[e], trgt[e], face[e]
+        dx = pos[t, 0] - pos[s, 0]
+        dy = pos[t, 1] - pos[s, 1]
+        length = np.sqrt(dx * dx + dy * dy)
+        # Line tension and the perimeter terms pull along the edge.
+        tension = line_tension[e] + face_params[f, 0] * perimeter[f] - face_params[f, 3]
+        gx = tension * dx / length
+        gy = tension * dy / length
+        out[s, 0] -= gx
+        out[s, 1] -= gy
+        out[t, 0] += gx
+        out[t, 1] += gy
+        # Area elasticity, d(area)/d(srce) and d(area)/d(trgt) for the edge.
+        ka = 0.5 * face_params[f, 1] * (area[f] - face_params[f, 2])
+        out[s, 0] += ka * pos[t, 1]
+        out[s, 1] -= ka * pos[t, 0]
+        out[t, 0] -= ka * pos[s, 1]
+        out[t, 1] += ka * pos[s, 0]
+
+
+def _gradient_numpy(pos, srce, trgt, face, line_tension, face_params, n_faces, out):
+    """
+    The same as _gradient_loops, with numpy arrays.
+    """
+    n_verts = pos.shape[0]
+    s_pos, t_pos = pos[srce], pos[trgt]
+    d_pos = t_pos - s_pos
+    length = np.sqrt((d_pos**2).sum(axis=1))
+    perimeter = np.bincount(face, length, minlength=n_faces)
+    area = np.bincount(face, 0.5 * (s_pos[:, 0] * t_pos[:, 1] - s_pos[:, 1] * t_pos[:, 0]),
+                       minlength=n_faces)
+
+    tension = line_tension + (face_params[:, 0] * perimeter - face_params[:, 3])[face]
+    g = d_pos * (tension / length)[:, None]
+    ka = (0.5 * face_params[:, 1] * (area - face_params[:, 2]))[face]
+    g_srce = -g + ka[:, None] * np.column_stack([t_pos[:, 1], -t_pos[:, 0]])
+    g_trgt = g + ka[:, None] * np.column_stack([-s_pos[:, 1], s_pos[:, 0]])
+    for i in range(2):
+        out[:, i] = (np.bincount(srce, g_srce[:, i], minlength=n_verts)
+                     + np.bincount(trgt, g_trgt[:, i], minlength=n_verts))
+
+
+if njit is not None:
+    _gradient_kernel = njit(cache=True)(_gradient_loops)
+else:
+    _gradient_kernel = _gradient_numpy
+
+
+def _positions(sheet):
+    """
+    Returns the positions in vert_df of srce and trgt and in face_df of face,
+    for every edge. They are cached on the sheet and looked up again only
+    when the topology or the indices changed.
+    """
+    cols = [sheet.edge_df[c].to_numpy() for c in ('srce', 'trgt', 'face')]
+    vert_ids = sheet.vert_df.index.to_numpy()
+    face_ids = sheet.face_df.index.to_numpy()
+    cache = getattr(sheet, '_gradient_positions', None)
+    if (cache is None or not np.array_equal(cache['verts'], vert_ids)
+            or not np.array_equal(cache['faces'], face_ids)
+            or not all(np.array_equal(old, new) for old, new in zip(cache['cols'], cols))):
+        srce, trgt = (sheet.vert_df.index.get_indexer(c) for c in cols[:2])
+        cache = {'cols': [c.copy() for c in cols], 'verts': vert_ids.copy(), 'faces': face_ids.copy(),
+                 'srce': srce, 'trgt': trgt, 'face': sheet.face_df.index.get_indexer(cols[2])}
+        sheet._gradient_positions = cache
+    return cache['srce'], cache['trgt'], cache['face']
+
+
+def _face_params(face_df):
+    """
+    Returns the (Nf, 4) array of the face parameters used by the kernels.
+
+    Contractility (0.5 * contractility * perimeter**2) and perimeter
+    elasticity (0.5 * perimeter_elasticity * (perimeter - prefered_perimeter)**2)
+    add up to one quadratic term of the perimeter, so the columns are:
+    (contractility + perimeter_elasticity) * is_alive,
+    area_elasticity * is_alive, prefered_area, and
+    perimeter_elasticity * prefered_perimeter * is_alive.
+    The parameters that are not in face_df count as zero (is_alive as one).
+    """
+    def column(name, default=0.0):
+        if name not in face_df.columns:
+            return np.full(face_df.shape[0], default)
+        return face_df[name].to_numpy(dtype=float)
+
+    is_alive = column('is_alive', 1.0)
+    perimeter_elasticity = column('perimeter_elasticity') * is_alive
+    return np.column_stack([
+        column('contractility') * is_alive + perimeter_elasticity,
+        column('area_elasticity') * is_alive,
+        column('prefered_area'),
+        perimeter_elasticity * column('prefered_perimeter')])
+
+
+def planar_gradient(sheet, pos=None, out=None):
+    """
+    Returns the gradient of the PlanarModel energy for every vertex, as an
+    (Nv, 2) array in the order of vert_df (the same values as
+    PlanarModel.compute_gradient(sheet), with the geometry taken from the
+    vertex coordinates).
+
+    pos, an (Nv, 2) array in the order of vert_df, gives the gradient at
+    other positions than the ones in vert_df (e.g. the stages of a
+    Runge-Kutta step), without writing them to the sheet.
+
+    out, an (Nv, 2) float array, is filled and returned instead of a new
+    array, e.g. to reuse one array over the steps of a loop.
+    """
+    srce, trgt, face = _positions(sheet)
+    if pos is None:
+        pos = sheet.vert_df[['x', 'y']].to_numpy(dtype=float)
+    pos = np.ascontiguousarray(pos, dtype=float)
+    edge_df, face_df = sheet.edge_df, sheet.face_df
+    line_tension = 0.5 * (edge_df['line_tension'].to_numpy(dtype=float)
+                          * edge_df['is_active'].to_numpy(dtype=float))
+    face_params = _face_params(face_df)
+
+    if out is None:
+        out = np.empty((pos.shape[0], 2))
+    _gradient_kernel(pos, srce, trgt, face, line_tension, face_params, face_df.shape[0], out)
+    out /= sheet.specs.get('settings', {}).get('nrj_norm_factor', 1)
+    return out
+
+
+def planar_energy(sheet, pos=None):
+    """
+    Returns the PlanarModel energy of the sheet (the same value as
+    PlanarModel.compute_energy(sheet)), with the geometry taken from the
+    vertex coordinates, or from pos as in planar_gradient.
+    """
+    srce, trgt, face = _positions(sheet)
+    if pos is None:
+        pos = sheet.vert_df[['x', 'y']].to_numpy(dtype=float)
+    edge_df, face_df = sheet.edge_df, sheet.face_df
+    n_faces = face_df.shape[0]
+    line_tension = 0.5 * (edge_df['line_tension'].to_numpy(dtype=float)
+                          * edge_df['is_active'].to_numpy(dtype=float))
+    face_params = _face_params(face_df)
+
+    s_pos, t_pos = pos[srce], pos[trgt]
+    length = np.sqrt(((t_pos - s_pos)**2).sum(axis=1))
+    perimeter = np.bincount(face, length, minlength=n_faces)
+    area = np.bincount(face, 0.5 * (s_pos[:, 0] * t_pos[:, 1] - s_pos[:, 1] * t_pos[:, 0]),
+                       minlength=n_faces)
+    energy = ((line_tension * length).sum()
+              + (0.5 * face_params[:, 0] * perimeter**2 - face_params[:, 3] * perimeter).sum()
+              + (0.5 * face_params[:, 1] * (area - face_params[:, 2])**2).sum())
+    # The constant part of the perimeter elasticity, so that the value is
+    # the one of the effectors.
+    if 'prefered_perimeter' in face_df.columns:
+        energy += 0.5 * (face_params[:, 3] * face_df['prefered_perimeter'].to_numpy(dtype=float)).sum()
+    return energy / sheet.specs.get('settings', {}).get('nrj_norm_factor', 1)
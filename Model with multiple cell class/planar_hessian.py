@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Hessian of the PlanarModel energy (LineTension + FaceContractility +
+FaceAreaElasticity, and PerimeterElasticity as in 2D migration.py) as a
+sparse matrix, for the semi-implicit solver in integrators.py and for
+Newton-type minimizers.
+
+The rows and columns follow the vertex coordinates in the order of vert_df,
+x0, y0, x1, y1, ... (the same as planar_gradient(sheet).ravel()). The terms
+are written from the edge and face index arrays and assembled at once into a
+CSR matrix:
+
+- every edge with a length term (line tension, and the perimeter terms of its
+  face) gives w * (I - u u^T) / length on the blocks of its srce and trgt,
+- every face gives (contractility + perimeter_elasticity) * grad(P) grad(P)^T
+  and area_elasticity * grad(A) grad(A)^T on the blocks of its vertices,
+- and area_elasticity * (area - prefered_area) times the second derivative
+  of the area, on the srce/trgt blocks of its edges.
+
+planar_hessian_product gives the product of the same Hessian with a vector
+without building the matrix, edge by edge and face by face, for
+Krylov solvers.
+"""
+import numpy as np
+from scipy import sparse
+
+from planar_gradient import _positions, _face_params
+
+
+# d2A/dx_s dy_t = 1/2, d2A/dy_s dx_t = -1/2 for every edge of a face.
+_AREA_ROTATION = 0.5 * np.array([[0.0, 1.0], [-1.0, 0.0]])
+
+
+def _hessian_terms(sheet, pos, positive):
+    """
+    Returns the edge and face quantities that both planar_hessian and
+    planar_hessian_product are written from, in a dict.
+    """
+    srce, trgt, face = _positions(sheet)
+    if pos is None:
+        pos = sheet.vert_df[['x', 'y']].to_numpy(dtype=float)
+    edge_df, face_df = sheet.edge_df, sheet.face_df
+    n_faces = face_df.shape[0]
+    face_params = _face_params(face_df)
+    perimeter_stiffness, area_elasticity = face_params[:, 0], face_params[:, 1]
+    line_tension = 0.5 * (edge_df['line_tension'].to_numpy(dtype=float)
+                          * edge_df['is_active'].to_numpy(dtype=float))
+
+    s_pos, t_pos = pos[srce], pos[trgt]
+    d_pos = t_pos - s_pos
+    length = np.sqrt((d_pos**2).sum(axis=1))
+    u = d_pos / length[:, None]
+    perimeter = np.bincount(face, length, minlength=n_faces)
+    area = np.bincount(face, 0.5 * (s_pos[:, 0] * t_pos[:, 1] - s_pos[:, 1] * t_pos[:, 0]),
+                       minlength=n_faces)
+
+    weight = line_tension + (perimeter_stiffness * perimeter - face_params[:, 3])[face]
+    if positive:
+        weight = np.clip(weight, 0, None)
+    ka = None if positive else (area_elasticity * (area - face_params[:, 2]))[face]
+    # Gradients of the perimeter and of the area of the face of each edge,
+    # on its srce and on its trgt.
+    grad_area_srce = 0.5 * np.column_stack([t_pos[:, 1], -t_pos[:, 0]])
+    grad_area_trgt = 0.5 * np.column_stack([-s_pos[:, 1], s_pos[:, 0]])
+    return {'srce': srce, 'trgt': trgt, 'face': face, 'n_verts': pos.shape[0],
+            'n_faces': n_faces, 'length': length, 'u': u, 'weight': weight, 'ka': ka,
+            'perimeter_stiffness': perimeter_stiffness, 'area_elasticity': area_elasticity,
+            'grad_area_srce': grad_area_srce, 'grad_area_trgt': grad_area_trgt,
+            'norm': sheet.specs.get('settings', {}).get('nrj_norm_factor', 1)}
+
+
+def planar_hessian(sheet, pos=None, positive=False):
+    """
+    Returns the Hessian of the PlanarModel energy of the sheet.
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    pos : (Nv, 2) array in the order of vert_df, optional
+        the Hessian at these positions instead of the ones in vert_df.
+    positive : bool, optional
+        if True, the terms that can make the Hessian indefinite are left out
+        (the second derivative of the area, and the length terms with a
+        negative tension), so that the matrix is positive semi-definite.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix, shape (2*Nv, 2*Nv)
+    """
+    terms = _hessian_terms(sheet, pos, positive)
+    srce, trgt, face, u = terms['srce'], terms['trgt'], terms['face'], terms['u']
+    n_verts, n_faces = terms['n_verts'], terms['n_faces']
+
+    rows, cols, vals = [], [], []
+
+    def add_blocks(v_i, v_j, blocks):
+        # blocks[k] is the 2x2 block between the vertices v_i[k] and v_j[k].
+        for a in range(2):
+            for b in range(2):
+                rows.append(2 * v_i + a)
+                cols.append(2 * v_j + b)
+                vals.append(blocks[:, a, b])
+
+    # Length terms.
+    projector = ((np.eye(2)[None] - u[:, :, None] * u[:, None, :])
+                 * (terms['weight'] / terms['length'])[:, None, None])
+    add_blocks(srce, srce, projector)
+    add_blocks(trgt, trgt, projector)
+    add_blocks(srce, trgt, -projector)
+    add_blocks(trgt, srce, -projector)
+
+    # Second derivative of the area.
+    if terms['ka'] is not None:
+        ka = terms['ka'][:, None, None]
+        add_blocks(srce, trgt, ka * _AREA_ROTATION)
+        add_blocks(trgt, srce, ka * _AREA_ROTATION.T)
+
+    # Outer products of the face gradients, over all the pairs of vertices of
+    # the face. The gradient on a vertex sums the edges it is the srce and
+    # the trgt of.
+    grad_perimeter = np.concatenate([-u, u])
+    grad_area = np.concatenate([terms['grad_area_srce'], terms['grad_area_trgt']])
+    face_verts = np.concatenate([face, face]) * n_verts + np.concatenate([srce, trgt])
+    face_verts, inverse = np.unique(face_verts, return_inverse=True)
+    fv_face, fv_vert = np.divmod(face_verts, n_verts)
+    grad_perimeter, grad_area = (
+        np.column_stack([np.bincount(inverse, g[:, i], minlength=face_verts.size) for i in range(2)])
+        for g in (grad_perimeter, grad_area))
+
+    # face_verts is sorted by face, the pairs (i, j) of each face are i and
+    # every j between the first and the last vertex of its face.
+    per_face = np.bincount(fv_face, minlength=n_faces)
+    first = np.concatenate([[0], np.cumsum(per_face)[:-1]])
+    n_pairs = per_face[fv_face]
+    i = np.repeat(np.arange(face_verts.size), n_pairs)
+    offsets = np.arange(i.size) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+    j = first[fv_face[i]] + offsets
+    f = fv_face[i]
+    outer = (terms['perimeter_stiffness'][f, None, None]
+             * grad_perimeter[i, :, None] * grad_perimeter[j, None, :]
+             + terms['area_elasticity'][f, None, None]
+             * grad_area[i, :, None] * grad_area[j, None, :])
+    add_blocks(fv_vert[i], fv_vert[j], outer)
+
+    hessian = sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                                shape=(2 * n_verts, 2 * n_verts))
+    return hessian / terms['norm']
+
+
+def planar_hessian_product(sheet, vec, pos=None, positive=False):
+    """
+    Returns the product of the Hessian of the PlanarModel energy with vec,
+    without building the matrix (the same values as
+    planar_hessian(sheet, pos, positive) @ vec.ravel()).
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object
+    vec : (Nv, 2) array, or (2*Nv,) array, in the order of vert_df
+    pos, positive : see planar_hessian
+
+    Returns
+    -------
+    ndarray with the shape of vec
+    """
+    terms = _hessian_terms(sheet, pos, positive)
+    srce, trgt, face, u = terms['srce'], terms['trgt'], terms['face'], terms['u']
+    n_verts, n_faces = terms['n_verts'], terms['n_faces']
+    v = np.asarray(vec, dtype=float).reshape(n_verts, 2)
+    v_srce, v_trgt = v[srce], v[trgt]
+
+    # Length terms: the part of the relative displacement across the edge.
+    d_v = v_trgt - v_srce
+    along = d_v - u * (u * d_v).sum(axis=1)[:, None]
+    g = along * (terms['weight'] / terms['length'])[:, None]
+    g_srce, g_trgt = -g, g.copy()
+
+    # Second derivative of the area.
+    if terms['ka'] is not None:
+        ka = terms['ka'][:, None]
+        g_srce += ka * (v_trgt @ _AREA_ROTATION.T)
+        g_trgt += ka * (v_srce @ _AREA_ROTATION)
+
+    # Outer products of the face gradients: the change of the perimeter and
+    # of the area of every face along vec, sent back along their gradients.
+    d_perimeter = np.bincount(face, (u * d_v).sum(axis=1), minlength=n_faces)
+    d_area = np.bincount(face, (terms['grad_area_srce'] * v_srce).sum(axis=1)
+                         + (terms['grad_area_trgt'] * v_trgt).sum(axis=1), minlength=n_faces)
+    kp = (terms['perimeter_stiffness'] * d_perimeter)[face][:, None]
+    kA = (terms['area_elasticity'] * d_area)[face][:, None]
+    g_srce += -kp * u + kA * terms['grad_area_srce']
+    g_trgt += kp * u + kA * terms['grad_area_trgt']
+
+    out = np.column_stack([np.bincount(srce, g_srce[:, i], minlength=n_verts)
+                           + np.bincount(trgt, g_trgt[:, i], minlength=n_verts)
+                           for i in range(2)])
+    return (out / terms['norm']).reshape(np.shape(vec))
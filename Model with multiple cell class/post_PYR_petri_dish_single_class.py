@@ -14,7 +14,6 @@ warnings.simplefilter(action='ignore', category=FutureWarning)
 
 import numpy as np
 import pandas as pd
-from decimal import Decimal
 
 import os
 import json
@@ -46,6 +45,10 @@ from tyssue.config.draw import sheet_spec
 # import my own functions
 from my_headers import *
 from T3_function import *
+from cell_cycle import start_cell_cycle, advance_cell_cycle
+from sim_clock import clock_ticks, to_ticks, ticks_to_expiry
+from integrators import make_integrator, adaptive_step
+from incremental_geometry import update_geometry
 
 # Set up the random number generator (RNG)
 rng = np.random.default_rng(70)
@@ -62,7 +65,7 @@ sheet.reset_index(order=True)   #continuous indices in all df, vertices clockwis
 sheet_view(sheet)
 sheet.get_extra_indices()
 # We need to creata a new colum to store the cell cycle time, default a 0, then minus.
-sheet.face_df['T_cycle'] = 0
+start_cell_cycle(sheet)
 sheet.face_df['T_age'] = 0
 # Visualize the sheet.
 fig, ax = sheet_view(sheet, edge = {'head_width':0.1})
@@ -94,13 +97,13 @@ sheet.vert_df['viscosity'] = 1.0
 # Update the specs (adds / changes the values in the dataframes' columns)
 sheet.update_specs(specs, reset = True)
 geom.update_all(sheet)
+# Start the boundary tracking, the topology functions keep it up to date.
+reset_boundary(sheet)
 
-# Adjust for cell-boundary adhesion force.
-for i in sheet.edge_df.index:
-    if sheet.edge_df.loc[i, 'opposite'] == -1:
-        sheet.edge_df.loc[i, 'line_tension'] *=2
-    else:
-        continue
+# Adjust for cell-boundary adhesion force: the boundary edges have twice the
+# line tension. The rules are applied again after each topology change below.
+sheet.settings['param_rules'] = [{'column': 'line_tension', 'factor': 2, 'where': 'boundary'}]
+apply_param_rules(sheet)
 geom.update_all(sheet)
 
 fig, ax = plot_forces(sheet, geom, smodel, ['x', 'y'], scaling=0.1)
@@ -119,88 +122,57 @@ area_intotal = []
 cell_ave_intime = []
 
 # Now assume we want to go from t = 0 to t= 0.2, dt = 0.1
-t = Decimal("0")
+# Time is counted in integer ticks, dt_max is split into 2**10 ticks and the
+# time steps are whole numbers of ticks.
+dt_max = 0.001
+tick, max_ticks = clock_ticks(dt_max, levels=10)
+# The time step is adapted from step to step (semi-implicit steps, no vertex
+# moves more than max_movement), in whole ticks.
+integrator = make_integrator('semi_implicit', max_dist=max_movement, dt_max=dt_max, tick=tick)
+t = 0
 
-dt = Decimal("0.001")
-
-
-t_end = Decimal("100")
+t_end = to_ticks(100, tick)
 
 
 while t <= t_end:
-    dt = 0.001
-    #print(f'start at t= {round(t, 5)}')
+    #print(f'start at t= {round(t*tick, 5)}')
 
     # Mesh restructure check
     # T1 transition, edge rearrangment check
-    while True:
-    # Check for any edge below the threshold, starting from index 0 upwards
-        edge_to_process = None
-        for index in sheet.edge_df.index:
-            if sheet.edge_df.loc[index, 'length'] < t1_threshold:
-                edge_to_process = index
-                edge_length = sheet.edge_df.loc[edge_to_process,'length']
-                print(f'Edge {edge_to_process} is too short: {edge_length}')
-                # Process the identified edge with T1 transition
-                type1_transition(sheet, edge_to_process,remove_tri_faces=False, multiplier=1.5)
-                break  
-        # Exit the loop if no edges are below the threshold
-        if edge_to_process is None:
-            break
-    geom.update_all(sheet)
-
-    # T2 transition check.
-    tri_faces = sheet.face_df[(sheet.face_df["num_sides"] < 4) & 
-                          (sheet.face_df["area"] < t2_threshold)].index
-    while len(tri_faces):
-        remove_face(sheet, tri_faces[0])
-        # Recompute the list of triangular faces below the area threshold after each removal
-        tri_faces = sheet.face_df[(sheet.face_df["num_sides"] < 4) & 
-                                  (sheet.face_df["area"] < t2_threshold)].index
-    sheet.reset_index(order = True)
-    geom.update_all(sheet)
+    # All the short edges that do not share a face are transitioned together.
+    _, touched = T1_sweep(sheet, t1_threshold, multiplier=1.5)
+    update_boundary(sheet, touched)
+    apply_param_rules(sheet, touched)
+
+    # T2 transition check, all the small triangular faces are removed
+    # together, with one reindex.
+    _, touched = T2_sweep(sheet, t2_threshold)
+    # Only the boundary (and the line tension) around the changed vertices
+    # is updated.
+    update_boundary(sheet, touched)
+    apply_param_rules(sheet, touched)
     
     # T3 transition.
-    while True:
-        T3_todo = None
-        print('computing boundary indices.')
-        boundary_vert, boundary_edge = find_boundary(sheet)
-        
-        for edge_e in boundary_edge:
-            # Extract source and target vertex IDs
-            srce_id, trgt_id = sheet.edge_df.loc[edge_e, ['srce', 'trgt']]
-            for vertex_v in boundary_vert:
-                if vertex_v == srce_id or vertex_v == trgt_id:
-                    continue
-                
-                distance, nearest = dist_computer(sheet, edge_e, vertex_v, d_sep)
-                if distance < d_min:
-                    T3_todo = vertex_v
-                    print(f'Found incoming vertex: {vertex_v} and colliding edge: {edge_e}')
-                    T3_swap(sheet, edge_e, vertex_v, nearest, d_sep)
-                    sheet.reset_index(order=False)
-                    geom.update_all(sheet)
-                    sheet.get_extra_indices()
-                    fig, ax = sheet_view(sheet, edge = {'head_width':0.1})
-                    for face, data in sheet.vert_df.iterrows():
-                        ax.text(data.x, data.y, face)
-                    break
-            
-            if T3_todo is not None:
-                break  # Exit outer loop to restart with updated boundary
-    
-                
-        if T3_todo is None:
-            break
+    # All the collisions are found in one KD-tree query, then only the
+    # neighbourhood of each swap is checked again.
+    T3_swaps, touched = T3_sweep(sheet, d_min, d_sep)
+    if T3_swaps:
+        apply_param_rules(sheet, touched)
+        fig, ax = sheet_view(sheet, edge = {'head_width':0.1})
+        for face, data in sheet.vert_df.iterrows():
+            ax.text(data.x, data.y, face)
 
     # Cell division.
     # Store the centroid before iteration of cells.
     unique_edges_df = sheet.edge_df.drop_duplicates(subset='face')
     centre_data = unique_edges_df.loc[:,['face','fx','fy']]    
     # only the cells that have large enough area and completed its mitosis cycle should be divided.
+    # They are all divided together, then reindexed once below.
     cells_can_divide = sheet.face_df[(sheet.face_df['area'] >= division_threshold) & (sheet.face_df['T_cycle'] == 0)]
-    for index, series in cells_can_divide.iterrows():
-        daughter_index = division_mt(sheet,rng=rng, cent_data= centre_data, cell_id = index)
+    daughters = divide_cells(sheet, rng, centre_data, cells_can_divide.index)
+    if daughters:
+        divided = sheet.edge_df['face'].isin([*daughters.keys(), *daughters.values()])
+        apply_param_rules(sheet, sheet.edge_df.loc[divided, 'srce'])
 # =============================================================================
 #     I commented out this part of the code since I don't think we need T_age anymore.
 #
@@ -211,56 +183,54 @@ while t <= t_end:
 # =============================================================================
     
     sheet.reset_index(order = True)
-    geom.update_all(sheet)
+    update_geometry(sheet)
     
     
     # Force computing and updating positions.
     valid_active_verts = sheet.active_verts[sheet.active_verts.isin(sheet.vert_df.index)]
     pos = sheet.vert_df.loc[valid_active_verts, sheet.coords].values
-    # get the movement of position based on dynamical dt.
-    dt, movement = time_step_bot(sheet, dt, max_dist_allowed = max_movement )
+    # get the movement of position based on dynamical dt, the step does not
+    # go past the end of the next cell cycle.
+    step_limit = min(max_ticks, ticks_to_expiry(sheet, tick) or max_ticks)
+    dt, movement = adaptive_step(sheet, integrator, dt_limit = step_limit*tick)
+    dt_ticks = to_ticks(dt, tick)
     new_pos = pos + movement
-    dt = Decimal(dt)
     # Save the new positions back to `vert_df`
     sheet.vert_df.loc[valid_active_verts , sheet.coords] = new_pos
-    geom.update_all(sheet)
+    update_geometry(sheet)
     
-    # We loop over every cell in the system.
+    # Update the cell cycle of every cell in the system.
     # If T_cycle of the cell is zero, then do nothing.
-    # If T_cycle of the cell is smaller than zero, then correct it to be zero.
-    # If T_cycle of the cell is larger than zero, then minus it by dt.
-    for cell in sheet.face_df.index:
-        if sheet.face_df.loc[cell, 'T_cycle' ] < 0:
-            sheet.face_df.loc[cell,'T_cycle'] = 0
-        if sheet.face_df.loc[cell, 'T_cycle'] > 0:
-            sheet.face_df.loc[cell,'T_cycle'] -= dt
+    # If T_cycle of the cell is larger than zero, then minus it by dt,
+    # the cells that go down to zero (or below) are set to zero. The timers
+    # are counted in ticks.
+    advance_cell_cycle(sheet, dt_ticks, tick)
 
         
-    geom.update_all(sheet)
+    update_geometry(sheet)
     
     # Add trackers for quantify.
     cell_num_count = len(sheet.face_df)
     mean_area = sheet.face_df.loc[:,'area'].mean()
     total_area = sheet.face_df.loc[:,'area'].sum()
     
-    time_stamp.append(t)
+    time_stamp.append(t*tick)
     cell_counter.append(cell_num_count)
     cell_ave_intime.append(mean_area)
     area_intotal.append(total_area)
 
-    print(f'At time {t}, there are {cell_num_count} cells, total_area: {total_area}\n')
+    print(f'At time {t*tick:.4f}, there are {cell_num_count} cells, total_area: {total_area}\n')
 
     # if t in time_point[::10]:
     #     fig, ax = sheet_view(sheet)
-    #     ax.title.set_text(f'time = {round(t, 5)}')
+    #     ax.title.set_text(f'time = {round(t*tick, 5)}')
     
     # Update time_point
-    t += dt
-    t = t.quantize(Decimal("0.0001"))  # Keeps t rounded to 5 decimal places
+    t += dt_ticks
 
 
 fig, ax = sheet_view(sheet)
-ax.title.set_text(f'time = {round(t, 5)}')
+ax.title.set_text(f'time = {round(t*tick, 5)}')
 
 
 
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+The simulation clock: time is counted in integer ticks instead of Decimal.
+
+The largest time step dt_max is split into 2**levels ticks, and the time
+steps of the adaptive integrator (see integrators.py) are whole numbers of
+ticks, down to one tick. Sums of integers don't drift, so long runs land
+exactly on t_end and on the end of the cell cycles.
+"""
+from cell_cycle import cycle_ticks
+
+
+def clock_ticks(dt_max, levels=10):
+    """
+    Returns the length of one tick and the largest time step in ticks.
+
+    Parameters
+    ----------
+    dt_max : float
+        the largest time step
+    levels : int, optional
+        how many times the time step can be halved, default 10.
+    """
+    max_ticks = 2**levels
+    return dt_max / max_ticks, max_ticks
+
+
+def to_ticks(time, tick):
+    """
+    Converts a time to the nearest number of ticks.
+    """
+    return int(round(time / tick))
+
+
+def ticks_to_expiry(sheet, tick):
+    """
+    Returns the number of ticks until the first running cell cycle (T_cycle
+    > 0) completes, or None if no cell is running.
+    """
+    ticks = cycle_ticks(sheet, tick)
+    ticks = ticks[ticks > 0]
+    if not ticks.size:
+        return None
+    return int(ticks.min())
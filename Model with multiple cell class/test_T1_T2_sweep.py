@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of T1_sweep and T2_sweep against the one at a time loops they
+replace: the same transitions must give the same faces, whatever the
+order and the ids of the vertices.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('tyssue')
+from tyssue import PlanarGeometry as geom
+from tyssue.topology.base_topology import remove_face
+from tyssue.topology.sheet_topology import type1_transition
+
+from conftest import as_tyssue, plain_sheet
+from my_headers import T1_sweep, T2_sweep
+
+THRESHOLD = 0.1
+
+
+def _faces(sheet):
+    # Every face as the set of the positions of its vertices.
+    xy = sheet.vert_df[['x', 'y']].round(8)
+    corners = xy.loc[sheet.edge_df['srce']].to_numpy()
+    faces = {}
+    for face, corner in zip(sheet.edge_df['face'], map(tuple, corners)):
+        faces.setdefault(face, set()).add(corner)
+    return sorted(sorted(c) for c in faces.values())
+
+
+def _shorten(sheet, edges, lengths):
+    # Moves the ends of each edge towards its middle.
+    for edge, length in zip(edges, lengths):
+        ends = sheet.edge_df.loc[edge, ['srce', 'trgt']].tolist()
+        xy = sheet.vert_df.loc[ends, ['x', 'y']].to_numpy()
+        middle, half = xy.mean(axis=0), (xy[1] - xy[0]) / np.linalg.norm(xy[1] - xy[0]) * length / 2
+        sheet.vert_df.loc[ends, ['x', 'y']] = [middle - half, middle + half]
+    geom.update_all(sheet)
+
+
+def _edge(sheet, a, b):
+    # The edge from the vertex nearest to a to the vertex nearest to b.
+    xy = sheet.vert_df[['x', 'y']].to_numpy()
+    srce, trgt = (sheet.vert_df.index[np.argmin(np.hypot(*(xy - p).T))] for p in (a, b))
+    return sheet.edge_df.index[(sheet.edge_df['srce'] == srce) & (sheet.edge_df['trgt'] == trgt)][0]
+
+
+def test_T1_sweep_matches_one_at_a_time():
+    sheet = as_tyssue(plain_sheet(6))
+    sheet.settings['threshold_length'] = THRESHOLD
+    # Two edges far apart, and two sides of the same face, so that the sweep
+    # needs a second round.
+    edges = [_edge(sheet, a, b) for a, b in
+             [((1, 1), (1, 2)), ((4, 4), (5, 4)), ((2, 4), (3, 4)), ((2, 5), (3, 5))]]
+    _shorten(sheet, edges, [0.01, 0.012, 0.014, 0.016])
+    reference = sheet.copy()
+
+    report, touched = T1_sweep(sheet, THRESHOLD)
+    assert len(report) == 4 and report['round'].max() == 2
+
+    # The transition depends on which of the two half-edges is passed, so
+    # the ties are broken the same way, by the order of edge_df, which the
+    # reindexing keeps.
+    while (reference.edge_df['length'] < THRESHOLD).any():
+        edge = reference.edge_df['length'].sort_values(kind='stable').index[0]
+        type1_transition(reference, edge, remove_tri_faces=False, multiplier=1.5)
+        geom.update_all(reference)
+
+    assert _faces(sheet) == _faces(reference)
+    assert (sheet.edge_df['length'] >= THRESHOLD).all()
+    # The new edges have the length set by the multiplier, and their ends
+    # are the touched vertices.
+    new = sheet.edge_df[np.isclose(sheet.edge_df['length'], 1.5 * THRESHOLD)]
+    assert len(new) == 8
+    assert set(touched) == set(new['srce']) | set(new['trgt'])
+
+
+def test_T2_sweep_matches_one_at_a_time():
+    sheet = as_tyssue(plain_sheet(6))
+    # Collapsing an edge between two squares makes two triangles that share
+    # a vertex, so that the sweep needs more than one round.
+    for a, b in [((2, 1), (2, 2)), ((5, 5), (5, 4)), ((3, 3), (3, 4)), ((3, 4), (3, 5))]:
+        edge = _edge(sheet, a, b)
+        srce, trgt = sheet.edge_df.loc[edge, ['srce', 'trgt']]
+        sheet.edge_df.replace({'srce': trgt, 'trgt': trgt}, srce, inplace=True)
+        sheet.edge_df.drop(sheet.edge_df.index[sheet.edge_df['srce'] == sheet.edge_df['trgt']],
+                           inplace=True)
+        sheet.vert_df.drop(trgt, inplace=True)
+    sheet.reset_index()
+    sheet.reset_topo()
+    geom.update_all(sheet)
+    threshold = 0.7
+    small = (sheet.face_df['num_sides'] < 4) & (sheet.face_df['area'] < threshold)
+    assert small.sum() == 7
+    reference = sheet.copy()
+
+    removed, touched = T2_sweep(sheet, threshold)
+    assert len(removed) == 6
+    # The touched vertices are the new ones, at the centres of the removed
+    # faces.
+    old = set(map(tuple, reference.vert_df[['x', 'y']].round(8).to_numpy()))
+    new = {v for v, xy in zip(sheet.vert_df.index, map(tuple, sheet.vert_df[['x', 'y']].round(8).to_numpy()))
+           if xy not in old}
+    assert set(touched) == new
+
+    small = reference.face_df[(reference.face_df['num_sides'] < 4)
+                              & (reference.face_df['area'] < threshold)]
+    while len(small):
+        remove_face(reference, small['area'].idxmin())
+        geom.update_all(reference)
+        small = reference.face_df[(reference.face_df['num_sides'] < 4)
+                                  & (reference.face_df['area'] < threshold)]
+
+    assert _faces(sheet) == _faces(reference)
+    expected = sheet.copy()
+    geom.update_all(expected)
+    for df, ref in [(sheet.edge_df, expected.edge_df), (sheet.face_df, expected.face_df)]:
+        columns = [c for c in ('length', 'area', 'perimeter', 'num_sides') if c in df.columns]
+        np.testing.assert_allclose(df[columns], ref[columns])
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the T3 collision detection and sweep, against a brute force check
+of every boundary edge / boundary vertex pair.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('tyssue')
+from tyssue import PlanarGeometry as geom
+
+from adjacency_index import adjacency, edge_between, invalidate_adjacency
+from conftest import as_tyssue, drop_faces, plain_sheet
+from my_headers import point_segment_distance, reset_boundary
+from T3_function import boundary_tree, find_T3_collisions, T3_sweep
+
+D_MIN, D_SEP = 0.008, 0.011
+
+
+def _notched_sheet():
+    # A 3 x 3 grid without the two upper middle squares: the two walls of
+    # the notch, at x = 1 and x = 2, are boundary edges facing each other.
+    sheet = as_tyssue(drop_faces(plain_sheet(3), [104, 105]))
+    reset_boundary(sheet)
+    return sheet
+
+
+def _vert_at(sheet, x, y):
+    xy = sheet.vert_df[['x', 'y']].to_numpy()
+    return sheet.vert_df.index[np.argmin(np.hypot(xy[:, 0] - x, xy[:, 1] - y))]
+
+
+def _brute_force(sheet, d_min):
+    edge_df, xy = sheet.edge_df, sheet.vert_df[['x', 'y']]
+    boundary = edge_df[edge_df['opposite'] == -1]
+    verts = np.union1d(boundary['srce'], boundary['trgt'])
+    pairs = set()
+    for edge, (srce, trgt) in boundary[['srce', 'trgt']].iterrows():
+        for vert in verts:
+            if vert in (srce, trgt):
+                continue
+            distance = point_segment_distance(xy.loc[srce], xy.loc[trgt], xy.loc[vert])[0]
+            if distance < d_min:
+                pairs.add((edge, vert))
+    return pairs
+
+
+def _pairs(collisions):
+    return set(zip(collisions['edge'], collisions['vert']))
+
+
+def test_collisions_match_brute_force():
+    sheet = _notched_sheet()
+    # Move the middle of the left wall close to the right wall.
+    vert, wall = _vert_at(sheet, 1, 2), [_vert_at(sheet, 2, 1), _vert_at(sheet, 2, 2)]
+    middle = sheet.vert_df.loc[wall, ['x', 'y']].mean().to_numpy()
+    sheet.vert_df.loc[vert, ['x', 'y']] = middle - [0.005, 0]
+    collisions = find_T3_collisions(sheet, D_MIN, D_SEP)
+    assert len(collisions)
+    assert _pairs(collisions) == _brute_force(sheet, D_MIN)
+    assert collisions['distance'].is_monotonic_increasing
+
+
+def test_local_search_matches_the_global_one():
+    sheet = _notched_sheet()
+    tree = boundary_tree(sheet)
+    # The tree is built, then two vertices of the left wall move close to
+    # the edges of the right wall.
+    moved = [_vert_at(sheet, 1, 2), _vert_at(sheet, 1, 3)]
+    for vert, y in zip(moved, (1, 2)):
+        wall = [_vert_at(sheet, 2, y), _vert_at(sheet, 2, y + 1)]
+        sheet.vert_df.loc[vert, ['x', 'y']] = sheet.vert_df.loc[wall, ['x', 'y']].mean().to_numpy() - [0.005, 0]
+    for verts in ([moved[1]], moved, [_vert_at(sheet, 2, 2)]):
+        local = find_T3_collisions(sheet, D_MIN, D_SEP, verts=verts, tree=tree, stale=moved)
+        expected = {(edge, vert) for edge, vert in _brute_force(sheet, D_MIN)
+                    if vert in verts or {*sheet.edge_df.loc[edge, ['srce', 'trgt']]} & set(verts)}
+        assert expected
+        assert _pairs(local) == expected
+
+
+def test_sweep_resolves_all_collisions():
+    sheet = _notched_sheet()
+    vert, wall = _vert_at(sheet, 1, 2), [_vert_at(sheet, 2, 1), _vert_at(sheet, 2, 2)]
+    middle = sheet.vert_df.loc[wall, ['x', 'y']].mean().to_numpy()
+    sheet.vert_df.loc[vert, ['x', 'y']] = middle - [0.005, 0]
+    geom.update_all(sheet)
+    edge = edge_between(sheet, *wall)
+
+    swaps, touched = T3_sweep(sheet, D_MIN, D_SEP)
+    assert swaps == [(edge, vert)]
+    assert len(touched)
+    assert not len(find_T3_collisions(sheet, D_MIN, D_SEP))
+    # Reindexed once, with the vertex left alone by the swap dropped.
+    assert (sheet.vert_df.index == np.arange(len(sheet.vert_df))).all()
+    assert np.isin(sheet.vert_df.index, sheet.edge_df[['srce', 'trgt']]).all()
+
+    # The local geometry updates give the same geometry as update_all.
+    columns = ['length', 'dx', 'dy', 'fx', 'fy']
+    local_edges, local_faces = sheet.edge_df[columns].copy(), sheet.face_df[['area', 'perimeter']].copy()
+    geom.update_all(sheet)
+    assert np.allclose(local_edges, sheet.edge_df[columns])
+    assert np.allclose(local_faces, sheet.face_df[['area', 'perimeter']])
+
+    # The boundary and the adjacency index are up to date.
+    flags = sheet.edge_df['is_boundary'].copy(), sheet.vert_df['is_boundary'].copy()
+    reset_boundary(sheet)
+    assert (flags[0] == sheet.edge_df['is_boundary']).all()
+    assert (flags[1] == sheet.vert_df['is_boundary']).all()
+    patched = {key: dict(adjacency(sheet)[key]) for key in ('pair', 'vert', 'face', 'edge')}
+    invalidate_adjacency(sheet)
+    assert patched == {key: dict(adjacency(sheet)[key]) for key in ('pair', 'vert', 'face', 'edge')}
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the adjacency index: after a topology change made by the functions
+of this repo, the index answers the same as the boolean masks over edge_df.
+"""
+import pytest
+
+pytest.importorskip('tyssue')
+
+from adjacency_index import adjacency, edge_between, invalidate_adjacency, vert_faces
+from conftest import as_tyssue, plain_sheet
+from my_headers import delete_face, put_vert
+
+
+def _sheet():
+    return as_tyssue(plain_sheet(4))
+
+
+def _edge_by_mask(sheet, vert1, vert2):
+    edge_df = sheet.edge_df
+    for srce, trgt in ((vert1, vert2), (vert2, vert1)):
+        edges = edge_df.index[(edge_df['srce'] == srce) & (edge_df['trgt'] == trgt)]
+        if len(edges):
+            return edges[0]
+    return None
+
+
+def _faces_by_mask(sheet, vert):
+    edge_df = sheet.edge_df
+    return set(edge_df.loc[(edge_df['srce'] == vert) | (edge_df['trgt'] == vert), 'face'])
+
+
+def test_put_vert_updates_the_index():
+    sheet = _sheet()
+    # Built before the split, so the split has to patch it.
+    adjacency(sheet)
+    edge = sheet.edge_df.index[sheet.edge_df['opposite'] >= 0][0]
+    srce, trgt = sheet.edge_df.loc[edge, ['srce', 'trgt']]
+    middle = sheet.vert_df.loc[[srce, trgt], ['x', 'y']].mean().to_numpy()
+    new_vert = put_vert(sheet, edge, middle)[0]
+
+    for vert1, vert2 in ((srce, new_vert), (new_vert, trgt), (trgt, new_vert), (srce, trgt)):
+        assert edge_between(sheet, vert1, vert2) == _edge_by_mask(sheet, vert1, vert2)
+    for vert in (srce, trgt, new_vert):
+        assert vert_faces(sheet, vert) == _faces_by_mask(sheet, vert)
+
+    # The patched index is the same as one built from scratch.
+    patched = adjacency(sheet)
+    invalidate_adjacency(sheet)
+    rebuilt = adjacency(sheet)
+    for key in ('pair', 'vert', 'face', 'edge'):
+        assert patched[key] == rebuilt[key]
+
+
+def test_replaced_tables_rebuild_the_index():
+    sheet = as_tyssue(plain_sheet(4))
+    adjacency(sheet)
+    delete_face(sheet, 5)
+    patched = dict(adjacency(sheet)['edge'])
+    # reset_index renumbers the edges and vertices without a patch.
+    sheet.reset_index(order=True)
+    rebuilt = adjacency(sheet)
+    assert rebuilt['edge'] != patched
+    for vert in sheet.vert_df.index:
+        assert vert_faces(sheet, vert) == _faces_by_mask(sheet, vert)
+    assert rebuilt is adjacency(sheet)
+
+    # So does an edge_df replaced by a copy with other rows.
+    sheet.edge_df = sheet.edge_df[sheet.edge_df['face'] != sheet.edge_df['face'].iloc[0]].copy()
+    for vert in sheet.vert_df.index:
+        assert vert_faces(sheet, vert) == _faces_by_mask(sheet, vert)
+
+    # A change in place is seen only through invalidate_adjacency.
+    sheet.edge_df['face'] = sheet.edge_df['face'].max()
+    assert adjacency(sheet)['face'] != {sheet.edge_df['face'].max(): set(sheet.edge_df.index)}
+    invalidate_adjacency(sheet)
+    assert adjacency(sheet)['face'] == {sheet.edge_df['face'].max(): set(sheet.edge_df.index)}
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the boundary tracking: after each topology change, the columns
+kept up to date around the changed vertices are the ones reset_boundary
+computes from the whole sheet.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('tyssue')
+
+from conftest import as_tyssue, plain_sheet
+from my_headers import (collapse_edge, delete_face, edge_remover, find_boundary, put_vert,
+                        reset_boundary)
+
+
+def _assert_tracked(sheet):
+    edge_df, vert_df = sheet.edge_df.copy(), sheet.vert_df.copy()
+    reset_boundary(sheet)
+    np.testing.assert_array_equal(edge_df['opposite'], sheet.edge_df['opposite'])
+    np.testing.assert_array_equal(edge_df['is_boundary'], sheet.edge_df['is_boundary'])
+    np.testing.assert_array_equal(vert_df['is_boundary'], sheet.vert_df['is_boundary'])
+
+
+def _interior_edge(sheet):
+    return sheet.edge_df.index[sheet.edge_df['opposite'].to_numpy() >= 0][0]
+
+
+def test_topology_changes_keep_the_boundary():
+    sheet = as_tyssue(plain_sheet(4))
+    sheet.face_df['cell_type'] = 'CT'
+    reset_boundary(sheet)
+    assert sheet.vert_df['is_boundary'].sum() == 16
+
+    # A corner face, then a face in the middle, which opens a hole.
+    delete_face(sheet, 0)
+    _assert_tracked(sheet)
+    delete_face(sheet, 5)
+    _assert_tracked(sheet)
+    assert sheet.vert_df['is_boundary'].sum() == 19
+
+    boundary_edge = sheet.edge_df.index[sheet.edge_df['is_boundary'].to_numpy(dtype=bool)][0]
+    xy = sheet.vert_df.loc[sheet.edge_df.loc[boundary_edge, ['srce', 'trgt']], ['x', 'y']].mean()
+    put_vert(sheet, boundary_edge, xy.tolist())
+    _assert_tracked(sheet)
+    edge = _interior_edge(sheet)
+    xy = sheet.vert_df.loc[sheet.edge_df.loc[edge, ['srce', 'trgt']], ['x', 'y']].mean()
+    new_vert, _, _ = put_vert(sheet, edge, xy.tolist())
+    _assert_tracked(sheet)
+    assert not sheet.vert_df.loc[new_vert, 'is_boundary']
+
+    collapse_edge(sheet, sheet.edge_df.index[sheet.edge_df['srce'] == new_vert][0], reindex=False)
+    _assert_tracked(sheet)
+
+    # Two faces merge: the edges between them go, the boundary stays.
+    face = 10
+    edge = sheet.edge_df.index[(sheet.edge_df['face'] == face)
+                               & (sheet.edge_df['opposite'] >= 0)][0]
+    edge_remover(sheet, edge)
+    _assert_tracked(sheet)
+
+
+def test_find_boundary_reads_the_tracked_columns():
+    sheet = as_tyssue(plain_sheet(3))
+    delete_face(sheet, 4)
+    sheet.get_opposite()
+    untracked = find_boundary(sheet)
+    reset_boundary(sheet)
+    assert find_boundary(sheet) == untracked
+    assert len(untracked[1]) == 16
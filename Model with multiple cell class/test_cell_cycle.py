@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the cell cycle clock against the per cell loop in Decimal it
+replaces.
+"""
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from cell_cycle import (advance_cell_cycle, cycle_completed, draw_cycle_durations,
+                        start_cell_cycle)
+from sim_clock import clock_ticks
+
+
+def _cells(n):
+    face_df = pd.DataFrame(index=pd.Index(100 + np.arange(n), name='face'))
+    return SimpleNamespace(face_df=face_df, Nf=n)
+
+
+def _on_tick(time, tick):
+    return round(Decimal(str(time)) / Decimal(str(tick))) * Decimal(str(tick))
+
+
+def test_timers_match_a_decimal_loop():
+    rng = np.random.default_rng(4)
+    sheet = _cells(40)
+    durations = draw_cycle_durations(rng, 40)
+    durations[:5] = 0
+    start_cell_cycle(sheet, durations)
+    assert sheet.face_df['T_cycle'].dtype == np.float64
+
+    tick, max_ticks = clock_ticks(0.5, levels=4)
+    # The timers start at the nearest tick.
+    timers = {cell: _on_tick(d, tick) for cell, d in zip(sheet.face_df.index, durations)}
+
+    for step in range(120):
+        dt_ticks = int(rng.integers(1, max_ticks + 1))
+        dt = Decimal(dt_ticks) * Decimal(str(tick))
+        if step == 30:
+            # A division draws new durations for a few cells.
+            cells = sheet.face_df.index[[3, 10, 20]]
+            new = draw_cycle_durations(rng, 3)
+            sheet.face_df.loc[cells, 'T_cycle'] = new
+            timers.update({cell: _on_tick(d, tick) for cell, d in zip(cells, new)})
+
+        expired = advance_cell_cycle(sheet, dt_ticks, tick)
+        expected = []
+        for cell, timer in timers.items():
+            if timer > 0:
+                timer -= dt
+                if timer <= 0:
+                    timer = Decimal(0)
+                    expected.append(cell)
+            timers[cell] = timer
+        assert expired.tolist() == expected
+        np.testing.assert_allclose(sheet.face_df['T_cycle'], [float(t) for t in timers.values()],
+                                   atol=1e-12)
+        assert cycle_completed(sheet).tolist() == [c for c, t in timers.items() if t == 0]
+    assert (sheet.face_df['T_cycle'] == 0).all()
+
+
+def test_draw_cycle_durations():
+    rng = np.random.default_rng(5)
+    durations = draw_cycle_durations(rng, (1000, 2))
+    assert durations.shape == (1000, 2) and durations.dtype == np.float64
+    assert durations.min() >= 10 and durations.max() < 15
+    np.testing.assert_allclose(durations * 1000, np.rint(durations * 1000))
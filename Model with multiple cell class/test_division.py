@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the division geometry: division_cuts against the crossing of each
+edge solved one at a time, and lateral_split.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('tyssue')
+from tyssue import Sheet, config, PlanarGeometry as geom
+
+from adjacency_index import adjacency, invalidate_adjacency
+from conftest import as_tyssue, plain_sheet
+from my_headers import divide_cells, division_cuts, division_mt, lateral_split, reset_boundary
+
+
+def _crossing(p0, c0, a, b):
+    # The point where the line through p0 and c0 crosses the segment ab, or
+    # None if it doesn't cross it strictly inside.
+    s, u = np.linalg.solve(np.column_stack([c0 - p0, a - b]), a - p0)
+    if 0 < u < 1:
+        return a + u * (b - a)
+    return None
+
+
+def test_division_cuts_matches_one_edge_at_a_time():
+    sheet = as_tyssue(plain_sheet(4))
+    rng = np.random.default_rng(3)
+    mothers = sheet.face_df.index[[0, 5, 6, 10, 15]]
+    xy = sheet.vert_df[['x', 'y']]
+    centroids = sheet.face_df.loc[mothers, ['x', 'y']].to_numpy()
+    starts = centroids + rng.normal(0, 0.2, centroids.shape)
+
+    cuts = division_cuts(sheet, mothers, starts, centroids)
+    for mother, p0, c0 in zip(mothers, starts, centroids):
+        edges = sheet.edge_df[sheet.edge_df['face'] == mother]
+        expected = [(edge, point) for edge, srce, trgt in zip(edges.index, edges['srce'], edges['trgt'])
+                    for point in [_crossing(p0, c0, xy.loc[srce].to_numpy(), xy.loc[trgt].to_numpy())]
+                    if point is not None]
+        # The line goes through the inside of the cell: it crosses two edges,
+        # the first in edge_df is kept.
+        assert len(expected) == 2
+        assert cuts.loc[mother, 'edge'] == expected[0][0]
+        np.testing.assert_allclose(cuts.loc[mother, ['x', 'y']].to_numpy(dtype=float), expected[0][1])
+
+    skipped = division_cuts(sheet, mothers, starts, centroids, skip_edges=cuts['edge'])
+    assert not np.isin(skipped['edge'], cuts['edge']).any()
+    assert len(skipped) == len(mothers)
+
+
+def test_lateral_split_divides_a_boundary_cell():
+    sheet = as_tyssue(plain_sheet(3))
+    reset_boundary(sheet)
+    adjacency(sheet)
+    mother = sheet.face_df.index[1]
+    area = sheet.face_df.loc[mother, 'area']
+    np.random.seed(0)
+
+    daughter = lateral_split(sheet, mother)
+    assert daughter is not None
+    geom.update_all(sheet)
+    assert sheet.face_df.loc[[mother, daughter], 'area'].sum() == pytest.approx(area)
+    assert (sheet.face_df.loc[[mother, daughter], 'area'] > 0).all()
+    for face in (mother, daughter):
+        edges = sheet.edge_df[sheet.edge_df['face'] == face]
+        assert sorted(edges['srce']) == sorted(edges['trgt'])
+
+    patched = {key: dict(adjacency(sheet)[key]) for key in ('pair', 'vert', 'face', 'edge')}
+    tracked = sheet.edge_df[['opposite', 'is_boundary']].copy(), sheet.vert_df['is_boundary'].copy()
+    invalidate_adjacency(sheet)
+    reset_boundary(sheet)
+    assert patched == {key: dict(adjacency(sheet)[key]) for key in ('pair', 'vert', 'face', 'edge')}
+    np.testing.assert_array_equal(tracked[0], sheet.edge_df[['opposite', 'is_boundary']])
+    np.testing.assert_array_equal(tracked[1], sheet.vert_df['is_boundary'])
+
+
+def test_lateral_split_without_a_cut(monkeypatch):
+    # A pentagon whose top vertex is on the line from the middle of the
+    # bottom edge through the centre: the line crosses no edge strictly.
+    vert_df = pd.DataFrame({'x': [0., 1, 1, 0.5, 0], 'y': [0., 0, 1, 1.2, 1]},
+                           index=pd.Index(range(5), name='vert'))
+    edge_df = pd.DataFrame([(i, (i + 1) % 5, 0) for i in range(5)], columns=['srce', 'trgt', 'face'],
+                           index=pd.Index(range(5), name='edge'))
+    face_df = pd.DataFrame({'x': [0.5], 'y': [0.5]}, index=pd.Index([0], name='face'))
+    sheet = Sheet('pentagon', {'vert': vert_df, 'edge': edge_df, 'face': face_df},
+                  config.geometry.planar_spec(), coords=['x', 'y'])
+    sheet.get_opposite()
+    geom.update_all(sheet)
+    before = sheet.vert_df[['x', 'y']].copy(), sheet.edge_df[['srce', 'trgt', 'face']].copy()
+
+    # The bottom edge, the first one, is taken as the basal edge.
+    monkeypatch.setattr(np.random, 'randint', lambda low, high: 0)
+    assert lateral_split(sheet, 0) is None
+    pd.testing.assert_frame_equal(sheet.vert_df[['x', 'y']], before[0])
+    pd.testing.assert_frame_equal(sheet.edge_df[['srce', 'trgt', 'face']], before[1])
+
+
+class _FirstEdge:
+    """ A random generator that always takes the first edge, and 12 as the cycle duration. """
+
+    def choice(self, edges):
+        return list(edges)[0]
+
+    def integers(self, low, high, size):
+        return np.full(size, 12000)
+
+
+def _faces(sheet):
+    # Every face as the set of the positions of its vertices.
+    xy = sheet.vert_df[['x', 'y']].round(8)
+    corners = xy.loc[sheet.edge_df['srce']].to_numpy()
+    faces = {}
+    for face, corner in zip(sheet.edge_df['face'], map(tuple, corners)):
+        faces.setdefault(face, set()).add(corner)
+    return sorted(sorted(c) for c in faces.values())
+
+
+def test_divide_cells_matches_division_mt():
+    sheet = as_tyssue(plain_sheet(4))
+    reset_boundary(sheet)
+    sheet.face_df['T_cycle'] = 0.
+    cent_data = sheet.face_df[['x', 'y']].rename(columns={'x': 'fx', 'y': 'fy'})
+    cent_data = cent_data.rename_axis('face').reset_index()
+    # Neighbours, some of which split the same edges and wait for a second
+    # round.
+    mothers = sheet.face_df.index[[0, 1, 4, 5, 6, 10, 15]]
+    reference = sheet.copy()
+
+    daughters = divide_cells(sheet, _FirstEdge(), cent_data, mothers)
+    assert sorted(daughters) == sorted(mothers)
+    assert (sheet.face_df['T_cycle'].loc[list(daughters) + list(daughters.values())] == 12).all()
+
+    # One cell at a time, in the order divide_cells divided them, with the
+    # geometry updated in between.
+    for mother in daughters:
+        geom.update_all(reference)
+        assert division_mt(reference, _FirstEdge(), cent_data, mother) is not None
+    assert _faces(sheet) == _faces(reference)
+
+    patched = {key: dict(adjacency(sheet)[key]) for key in ('pair', 'vert', 'face', 'edge')}
+    tracked = sheet.edge_df[['opposite', 'is_boundary']].copy(), sheet.vert_df['is_boundary'].copy()
+    invalidate_adjacency(sheet)
+    reset_boundary(sheet)
+    assert patched == {key: dict(adjacency(sheet)[key]) for key in ('pair', 'vert', 'face', 'edge')}
+    np.testing.assert_array_equal(tracked[0], sheet.edge_df[['opposite', 'is_boundary']])
+    np.testing.assert_array_equal(tracked[1], sheet.vert_df['is_boundary'])
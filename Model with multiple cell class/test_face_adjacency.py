@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the face adjacency matrix: after each topology change, the patched
+matrix is the one found by comparing the edges of every pair of faces.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('tyssue')
+
+from adjacency_index import adjacency
+from conftest import as_tyssue, plain_sheet
+from face_adjacency import face_adjacency, face_neighbours, neighbour_count
+from my_headers import (collapse_edge, delete_face, divide_cells, edge_remover, fuse_cells,
+                        put_vert, reset_boundary)
+
+
+def _brute_force(sheet):
+    faces = sheet.face_df.index.tolist()
+    edges = {face: set() for face in faces}
+    for srce, trgt, face in zip(sheet.edge_df['srce'], sheet.edge_df['trgt'], sheet.edge_df['face']):
+        if face in edges:
+            edges[face].add((srce, trgt))
+    flipped = {face: {(t, s) for s, t in pairs} for face, pairs in edges.items()}
+    return np.array([[int(bool(edges[f] & flipped[g])) for g in faces] for f in faces])
+
+
+def _assert_patched(sheet):
+    # The matrix is patched, not built again, while the index is the same.
+    cache = sheet._face_adjacency
+    assert cache['index'] is adjacency(sheet)
+    matrix = face_adjacency(sheet)
+    assert sheet._face_adjacency['matrix'] is not cache['matrix']
+    expected = _brute_force(sheet)
+    np.testing.assert_array_equal(matrix.toarray(), expected)
+    np.testing.assert_array_equal(neighbour_count(sheet), expected.sum(axis=1))
+    for pos in (0, len(expected) // 2, len(expected) - 1):
+        face = sheet.face_df.index[pos]
+        assert face_neighbours(sheet, face).tolist() == sheet.face_df.index[expected[pos] > 0].tolist()
+
+
+def _inner_edge(sheet, face):
+    edges = sheet.edge_df[(sheet.edge_df['face'] == face) & (sheet.edge_df['opposite'] >= 0)]
+    return edges.index[0]
+
+
+def test_patched_matrix_matches_brute_force():
+    sheet = as_tyssue(plain_sheet(6))
+    sheet.face_df['cell_type'] = 'CT'
+    reset_boundary(sheet)
+    cent_data = sheet.face_df[['x', 'y']].rename(columns={'x': 'fx', 'y': 'fy'})
+    cent_data = cent_data.rename_axis('face').reset_index()
+    np.testing.assert_array_equal(face_adjacency(sheet).toarray(), _brute_force(sheet))
+    # Nothing changed, the same matrix.
+    assert face_adjacency(sheet) is sheet._face_adjacency['matrix']
+
+    edge = _inner_edge(sheet, 8)
+    put_vert(sheet, edge, sheet.vert_df.loc[sheet.edge_df.loc[edge, ['srce', 'trgt']], ['x', 'y']].mean())
+    _assert_patched(sheet)
+    delete_face(sheet, 14)
+    _assert_patched(sheet)
+    divide_cells(sheet, np.random.default_rng(11), cent_data, [0, 21, 27])
+    _assert_patched(sheet)
+    fuse_cells(sheet, [(2, 3), (9, 3)])
+    _assert_patched(sheet)
+    edge_remover(sheet, _inner_edge(sheet, 30))
+    _assert_patched(sheet)
+    collapse_edge(sheet, _inner_edge(sheet, 33), reindex=False)
+    _assert_patched(sheet)
+
+    # After reset_index the index is built again, and so is the matrix.
+    sheet.reset_index()
+    np.testing.assert_array_equal(face_adjacency(sheet).toarray(), _brute_force(sheet))
+    assert sheet._face_adjacency['index'] is adjacency(sheet)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of face_to_edge against a lookup of the face of every edge.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('tyssue')
+
+from conftest import drop_faces, plain_sheet
+from my_headers import face_to_edge
+
+
+def _assert_lookup(sheet, column):
+    values = face_to_edge(sheet, column)
+    assert values.index.equals(sheet.edge_df.index)
+    assert values.tolist() == [sheet.face_df.loc[face, column] for face in sheet.edge_df['face']]
+
+
+def test_face_to_edge_follows_the_tables():
+    sheet = plain_sheet(4)
+    rng = np.random.default_rng(12)
+    sheet.face_df['cell_type'] = rng.choice(['CT', 'ST'], len(sheet.face_df))
+    _assert_lookup(sheet, 'cell_type')
+    _assert_lookup(sheet, 'prefered_area')
+
+    # New values, with the same topology.
+    sheet.face_df['cell_type'] = 'ST'
+    _assert_lookup(sheet, 'cell_type')
+
+    # Faces dropped, face_df in another order, edges moved to other faces.
+    sheet = drop_faces(sheet, [101, 106])
+    sheet.face_df = sheet.face_df.iloc[::-1]
+    sheet.face_df['cell_type'] = rng.choice(['CT', 'ST'], len(sheet.face_df))
+    _assert_lookup(sheet, 'cell_type')
+    sheet.edge_df.loc[sheet.edge_df['face'] == 102, 'face'] = 103
+    _assert_lookup(sheet, 'cell_type')
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of fuse_cells on a syncytium whose boundary visits a vertex twice.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('tyssue')
+from tyssue import Sheet, config, PlanarGeometry as geom
+
+from my_headers import fuse_cells
+
+
+def _pinched_sheet():
+    # Two unit squares, 0 and 1, that touch at the vertex 2 only.
+    vert_df = pd.DataFrame({'x': [0., 1, 1, 0, 2, 2, 1], 'y': [0., 0, 1, 1, 1, 2, 2]},
+                           index=pd.Index(range(7), name='vert'))
+    edges = [(0, 1, 0), (1, 2, 0), (2, 3, 0), (3, 0, 0),
+             (2, 4, 1), (4, 5, 1), (5, 6, 1), (6, 2, 1)]
+    edge_df = pd.DataFrame(edges, columns=['srce', 'trgt', 'face'],
+                           index=pd.Index(range(8), name='edge'))
+    face_df = pd.DataFrame({'x': [0.5, 1.5], 'y': [0.5, 1.5]},
+                           index=pd.Index(range(2), name='face'))
+    sheet = Sheet('pinched', {'vert': vert_df, 'edge': edge_df, 'face': face_df},
+                  config.geometry.planar_spec(), coords=['x', 'y'])
+    sheet.face_df['cell_type'] = 'CT'
+    sheet.get_opposite()
+    geom.update_all(sheet)
+    return sheet
+
+
+def test_fuse_cells_touching_at_one_vertex():
+    sheet = _pinched_sheet()
+    assert fuse_cells(sheet, [(0, 1)]) == {0: 1}
+
+    edges = sheet.edge_df[sheet.edge_df['face'] == 1]
+    assert len(edges) == 8
+    assert sheet.face_df.loc[1, 'cell_type'] == 'ST'
+    assert sheet.face_df.loc[1, 'num_sides'] == 8
+    assert np.isclose(sheet.face_df.loc[1, 'area'], 2)
+    # The edges are in the order of the two cycles, each of them closed.
+    srce, trgt = edges['srce'].to_numpy(), edges['trgt'].to_numpy()
+    for cycle in (slice(0, 4), slice(4, 8)):
+        assert np.array_equal(np.roll(srce[cycle], -1), trgt[cycle])
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of update_geometry against geom.update_all on a copy of the sheet.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('tyssue')
+from tyssue import PlanarGeometry as geom
+
+from conftest import as_tyssue, plain_sheet
+from incremental_geometry import update_geometry
+from my_headers import delete_face, put_vert
+
+
+def _assert_up_to_date(sheet):
+    expected = sheet.copy()
+    geom.update_all(expected)
+    geom.update_ucoords(expected)
+    for df, ref in [(sheet.edge_df, expected.edge_df), (sheet.face_df, expected.face_df)]:
+        columns = [c for c in ref.columns if ref[c].dtype == float]
+        np.testing.assert_allclose(df.loc[ref.index, columns], ref[columns], atol=1e-12)
+
+
+def test_update_geometry_matches_update_all():
+    sheet = as_tyssue(plain_sheet(6))
+    n_faces = len(sheet.face_df)
+    rng = np.random.default_rng(13)
+    assert update_geometry(sheet) == n_faces
+    _assert_up_to_date(sheet)
+    assert update_geometry(sheet) == 0
+
+    # A few vertices move: only the faces around them are updated.
+    moved = sheet.vert_df.index[[8, 20]]
+    sheet.vert_df.loc[moved, ['x', 'y']] += rng.normal(0, 0.05, (2, 2))
+    assert 0 < update_geometry(sheet) <= 8
+    _assert_up_to_date(sheet)
+
+    # An edge split adds a vertex and edges at the end of the tables.
+    edge = sheet.edge_df.index[(sheet.edge_df['face'] == 14) & (sheet.edge_df['opposite'] >= 0)][0]
+    xy = sheet.vert_df.loc[sheet.edge_df.loc[edge, ['srce', 'trgt']], ['x', 'y']].mean().to_numpy()
+    put_vert(sheet, edge, xy + 0.05)
+    assert update_geometry(sheet) == 2
+    _assert_up_to_date(sheet)
+
+    # More than full_fraction of the faces changed: update_all.
+    sheet.vert_df[['x', 'y']] *= 1.1
+    assert update_geometry(sheet) == n_faces
+    _assert_up_to_date(sheet)
+
+    # Rows dropped and renumbered: update_all.
+    delete_face(sheet, 20)
+    sheet.reset_index()
+    sheet.vert_df.loc[sheet.vert_df.index[3], 'x'] += 0.05
+    assert update_geometry(sheet) == n_faces - 1
+    _assert_up_to_date(sheet)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the adaptive integrators on a small planar sheet.
+"""
+import numpy as np
+import pytest
+
+from integrators import METHODS, adaptive_step, make_integrator
+from planar_gradient import planar_gradient
+from planar_hessian import planar_hessian
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        make_integrator('backward_euler')
+
+
+@pytest.mark.parametrize('method', list(METHODS))
+def test_step_is_capped_and_in_ticks(planar_sheet, method):
+    tick = 1e-4 / 2**10
+    integrator = make_integrator(method, max_dist=0.002, dt_max=1e-1, tick=tick)
+    pos = planar_sheet.vert_df[['x', 'y']].to_numpy().copy()
+    dt, movement = adaptive_step(planar_sheet, integrator)
+    assert np.linalg.norm(movement, axis=1).max() <= 0.002
+    assert np.isclose(dt / tick, round(dt / tick))
+    # The sheet is not moved, and the next step can't be more than twice longer.
+    assert np.array_equal(planar_sheet.vert_df[['x', 'y']].to_numpy(), pos)
+    assert integrator['dt'] <= 2 * dt
+
+
+@pytest.mark.parametrize('method', ['euler', 'heun', 'rk23'])
+def test_small_step_follows_the_velocity(planar_sheet, method):
+    integrator = make_integrator(method, max_dist=1.0, dt_max=1e-6)
+    velocity = -planar_gradient(planar_sheet) / planar_sheet.vert_df[['viscosity']].to_numpy()
+    dt, movement = adaptive_step(planar_sheet, integrator)
+    assert dt == 1e-6
+    assert np.allclose(movement / dt, velocity, rtol=1e-4, atol=1e-8)
+
+
+def test_dt_limit(planar_sheet):
+    integrator = make_integrator('heun', max_dist=1.0, dt_max=1e-3)
+    dt, _ = adaptive_step(planar_sheet, integrator, dt_limit=2.5e-4)
+    assert dt == 2.5e-4
+    assert integrator['dt'] == 1e-3
+
+
+def test_semi_implicit_solves_the_linear_system(planar_sheet):
+    integrator = make_integrator('semi_implicit', max_dist=1.0, dt_max=1e-2)
+    dt, movement = adaptive_step(planar_sheet, integrator)
+    viscosity = np.repeat(planar_sheet.vert_df['viscosity'].to_numpy(), 2)
+    matrix = np.diag(viscosity / dt) + planar_hessian(planar_sheet).toarray()
+    expected = np.linalg.solve(matrix, -planar_gradient(planar_sheet).ravel())
+    assert np.allclose(movement.ravel(), expected, rtol=0, atol=1e-12)
+
+
+def test_semi_implicit_tends_to_explicit_euler(planar_sheet):
+    # The two steps differ by O(dt**2), O(dt) relative to the step: a step
+    # ten times shorter is ten times closer to the explicit one.
+    gaps = []
+    for dt_max in (1e-4, 1e-5):
+        steps = [adaptive_step(planar_sheet, make_integrator(method, max_dist=1.0, dt_max=dt_max))
+                 for method in ('euler', 'semi_implicit')]
+        (dt_euler, euler), (dt_implicit, implicit) = steps
+        assert dt_euler == dt_implicit == dt_max
+        gaps.append(np.abs(implicit - euler).max() / np.abs(euler).max())
+    assert gaps[0] < 1e-2
+    assert gaps[1] == pytest.approx(gaps[0] / 10, rel=0.1)
+
+
+def test_inactive_vertices_dont_move(planar_sheet):
+    planar_sheet.vert_df.loc[planar_sheet.vert_df.index[:5], 'is_active'] = 0
+    integrator = make_integrator('rk23', max_dist=0.01)
+    _, movement = adaptive_step(planar_sheet, integrator)
+    assert movement.shape == (planar_sheet.vert_df.shape[0] - 5, 2)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the energy relaxation around an event.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('tyssue')
+
+from local_relax import event_patch, local_relax
+from planar_gradient import planar_energy, planar_gradient
+
+
+def test_event_patch_rings(planar_sheet):
+    # Face 105 is the second square of the second row of the 4 x 4 grid.
+    assert list(event_patch(planar_sheet, faces=[105], rings=0)) == [105]
+    assert list(event_patch(planar_sheet, faces=[105], rings=1)) == [101, 104, 105, 106, 109]
+    # The vertex 16 is a corner of the faces 100, 101, 104 and 105.
+    assert list(event_patch(planar_sheet, verts=[16], rings=0)) == [100, 101, 104, 105]
+
+
+def test_only_the_inside_of_the_patch_moves(planar_sheet):
+    pos = planar_sheet.vert_df[['x', 'y']].to_numpy().copy()
+    energy = planar_energy(planar_sheet)
+    res = local_relax(planar_sheet, None, faces=[105], rings=2, xtol=1e-10)
+    assert res.success
+
+    edge_df = planar_sheet.edge_df
+    in_patch = edge_df['face'].isin(res.patch)
+    inside = set(edge_df.loc[in_patch, 'srce']) - set(edge_df.loc[~in_patch, 'srce'])
+    moving = planar_sheet.vert_df.index.isin(list(inside))
+    new_pos = planar_sheet.vert_df[['x', 'y']].to_numpy()
+    assert moving.any()
+    assert np.array_equal(new_pos[~moving], pos[~moving])
+    assert not np.allclose(new_pos[moving], pos[moving])
+
+    assert np.abs(planar_gradient(planar_sheet)[moving]).max() < 1e-7
+    assert planar_energy(planar_sheet) < energy
+    # The geometry of the patch follows the new positions.
+    srce = planar_sheet.vert_df.loc[edge_df.loc[in_patch, 'srce'], ['x', 'y']].to_numpy()
+    trgt = planar_sheet.vert_df.loc[edge_df.loc[in_patch, 'trgt'], ['x', 'y']].to_numpy()
+    assert np.allclose(edge_df.loc[in_patch, 'length'], np.linalg.norm(trgt - srce, axis=1))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the Newton-CG energy minimization.
+"""
+import numpy as np
+import pytest
+
+from conftest import as_tyssue, plain_sheet
+from newton_solver import _newton_min, newton_energy_min
+from planar_gradient import planar_energy, planar_gradient
+
+
+def test_newton_min_finds_a_minimum(planar_sheet):
+    planar_sheet.vert_df.loc[planar_sheet.vert_df.index[:3], 'is_active'] = 0
+    pos = planar_sheet.vert_df[['x', 'y']].to_numpy().copy()
+    verts = planar_sheet.active_verts
+    res = _newton_min(planar_sheet, verts, {'xtol': 1e-10})
+    assert res.success
+    # The sheet is not changed, the inactive vertices are not in res.x.
+    assert np.array_equal(planar_sheet.vert_df[['x', 'y']].to_numpy(), pos)
+    assert res.x.size == 2 * len(verts)
+
+    moved = pos.copy()
+    rows = planar_sheet.vert_df.index.get_indexer(verts)
+    moved[rows] = res.x.reshape(-1, 2)
+    assert np.abs(planar_gradient(planar_sheet, moved)[rows]).max() < 1e-7
+    assert np.isclose(res.fun, planar_energy(planar_sheet, moved))
+    assert res.fun < planar_energy(planar_sheet)
+
+
+def test_newton_energy_min_on_a_sheet():
+    pytest.importorskip('tyssue')
+    from tyssue import PlanarGeometry as geom
+    from tyssue.dynamics import effectors, model_factory
+    from tyssue.dynamics.planar_vertex_model import PlanarModel
+
+    # The boundary vertices don't move, so the sheet can't collapse.
+    sheet = as_tyssue(plain_sheet(6, seed=3))
+    boundary = sheet.edge_df.loc[sheet.edge_df['opposite'] < 0, 'srce']
+    sheet.vert_df['is_active'] = (~sheet.vert_df.index.isin(boundary)).astype(int)
+    sheet.reset_topo()
+    start = planar_energy(sheet)
+    frozen = sheet.vert_df.loc[boundary, ['x', 'y']].to_numpy()
+
+    log = []
+    res = newton_energy_min(sheet, geom, PlanarModel, log=log, gtol=1e-8)
+    assert res.success
+    assert log[0]['nit'] == res.nit and log[0]['gradient'] == res.gtol <= 1e-8
+    gradient = planar_gradient(sheet)[sheet.vert_df.index.get_indexer(sheet.active_verts)]
+    assert np.abs(gradient).max() <= 1e-8
+    assert planar_energy(sheet) < start
+    assert np.array_equal(sheet.vert_df.loc[boundary, ['x', 'y']].to_numpy(), frozen)
+    # The geometry was updated with the new positions.
+    srce = sheet.vert_df.loc[sheet.edge_df['srce'], ['x', 'y']].to_numpy()
+    trgt = sheet.vert_df.loc[sheet.edge_df['trgt'], ['x', 'y']].to_numpy()
+    assert np.allclose(sheet.edge_df['length'], np.linalg.norm(trgt - srce, axis=1))
+
+    # Stopped before the minimum: not a success.
+    sheet.vert_df.loc[sheet.active_verts, 'x'] += 0.05
+    res = newton_energy_min(sheet, geom, log=log, maxiter=1, gtol=1e-12)
+    assert not res.success and not log[-1]['success']
+
+    model = model_factory([effectors.LineTension, effectors.BarrierElasticity])
+    with pytest.raises(ValueError):
+        newton_energy_min(sheet, geom, model)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of apply_param_rules against the rules applied one edge at a time.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('tyssue')
+
+from conftest import as_tyssue, plain_sheet
+from my_headers import apply_param_rules, delete_face
+
+RULES = [{'column': 'line_tension', 'factor': 2, 'where': 'boundary'},
+         {'column': 'line_tension', 'factor': 3, 'where': ('cell_type', 'ST')},
+         {'column': 'contractility', 'factor': 0.5, 'where': ('cell_type', 'ST')}]
+
+
+def _expected(sheet, edge):
+    # The value of every ruled column for one edge.
+    srce, trgt, face = sheet.edge_df.loc[edge, ['srce', 'trgt', 'face']]
+    on_boundary = not ((sheet.edge_df['srce'] == trgt) & (sheet.edge_df['trgt'] == srce)).any()
+    values = {}
+    for rule in RULES:
+        value = values.get(rule['column'], sheet.specs['edge'][rule['column']])
+        if rule['where'] == 'boundary':
+            match = on_boundary
+        else:
+            match = sheet.face_df.loc[face, rule['where'][0]] == rule['where'][1]
+        values[rule['column']] = value * rule['factor'] if match else value
+    return values
+
+
+def _sheet():
+    sheet = as_tyssue(plain_sheet(4))
+    sheet.specs['edge'] = {'line_tension': 0.1, 'contractility': 0.04}
+    sheet.specs['settings'] = {'param_rules': RULES}
+    sheet.face_df['cell_type'] = np.where(np.arange(len(sheet.face_df)) % 3, 'CT', 'ST')
+    sheet.edge_df['contractility'] = 0.0
+    return sheet
+
+
+def test_rules_match_one_edge_at_a_time():
+    sheet = _sheet()
+    apply_param_rules(sheet)
+    for edge in sheet.edge_df.index:
+        for column, value in _expected(sheet, edge).items():
+            assert sheet.edge_df.loc[edge, column] == pytest.approx(value)
+
+
+def test_local_update_after_a_topology_change():
+    sheet = _sheet()
+    apply_param_rules(sheet)
+    # A value changed by hand, far from the change, is kept.
+    far = sheet.edge_df.index[sheet.edge_df['face'] == 15][0]
+    sheet.edge_df.loc[far, 'line_tension'] = 7.0
+
+    face = 5
+    verts = sheet.edge_df.loc[sheet.edge_df['face'] == face, 'srce'].to_numpy()
+    delete_face(sheet, face)
+    apply_param_rules(sheet, verts)
+    for edge in sheet.edge_df.index:
+        expected = _expected(sheet, edge)
+        if edge == far:
+            expected['line_tension'] = 7.0
+        for column, value in expected.items():
+            assert sheet.edge_df.loc[edge, column] == pytest.approx(value)
+
+
+def test_rule_without_a_value_in_the_specs():
+    sheet = _sheet()
+    del sheet.specs['edge']['contractility']
+    with pytest.raises(ValueError):
+        apply_param_rules(sheet)
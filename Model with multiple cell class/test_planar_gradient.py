@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the PlanarModel gradient against finite differences of the energy.
+"""
+import numpy as np
+
+from planar_gradient import (_face_params, _gradient_loops, _gradient_numpy, _positions,
+                             planar_energy, planar_gradient)
+
+
+def _finite_gradient(sheet, pos, h=1e-6):
+    gradient = np.zeros_like(pos)
+    for i in range(pos.shape[0]):
+        for k in range(2):
+            shifted = pos.copy()
+            shifted[i, k] += h
+            plus = planar_energy(sheet, shifted)
+            shifted[i, k] -= 2 * h
+            gradient[i, k] = (plus - planar_energy(sheet, shifted)) / (2 * h)
+    return gradient
+
+
+def test_gradient_matches_finite_differences(planar_sheet):
+    pos = planar_sheet.vert_df[['x', 'y']].to_numpy()
+    gradient = planar_gradient(planar_sheet)
+    assert np.abs(gradient - _finite_gradient(planar_sheet, pos)).max() < 1e-9
+
+
+def test_gradient_at_other_positions(planar_sheet):
+    pos = planar_sheet.vert_df[['x', 'y']].to_numpy()
+    moved = pos + np.random.default_rng(1).normal(0, 0.05, pos.shape)
+    gradient = planar_gradient(planar_sheet, moved)
+    assert np.abs(gradient - _finite_gradient(planar_sheet, moved)).max() < 1e-9
+    # The sheet itself is not moved.
+    assert np.array_equal(planar_sheet.vert_df[['x', 'y']].to_numpy(), pos)
+
+
+def test_loops_and_numpy_kernels_agree(planar_sheet):
+    pos = planar_sheet.vert_df[['x', 'y']].to_numpy()
+    srce, trgt, face = _positions(planar_sheet)
+    edge_df = planar_sheet.edge_df
+    line_tension = 0.5 * edge_df['line_tension'].to_numpy() * edge_df['is_active'].to_numpy()
+    args = (pos, srce, trgt, face, line_tension, _face_params(planar_sheet.face_df),
+            planar_sheet.face_df.shape[0])
+    loops, vectorized = np.empty_like(pos), np.empty_like(pos)
+    _gradient_loops(*args, loops)
+    _gradient_numpy(*args, vectorized)
+    assert np.allclose(loops, vectorized, rtol=0, atol=1e-14)
+
+
+def test_results_are_not_shared(planar_sheet):
+    first = planar_gradient(planar_sheet)
+    kept = first.copy()
+    pos = planar_sheet.vert_df[['x', 'y']].to_numpy()
+    pos = pos + np.random.default_rng(1).normal(0, 0.05, pos.shape)
+    second = planar_gradient(planar_sheet, pos)
+    assert second is not first
+    assert np.array_equal(first, kept)
+
+    # With out, that array is filled and returned.
+    out = np.empty_like(pos)
+    assert planar_gradient(planar_sheet, pos, out=out) is out
+    assert np.array_equal(out, second)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the PlanarModel Hessian against finite differences of the gradient,
+and of the Hessian vector product against the matrix.
+"""
+import numpy as np
+
+from planar_gradient import planar_gradient
+from planar_hessian import planar_hessian, planar_hessian_product
+
+
+def _finite_hessian(sheet, pos, h=1e-6):
+    hessian = np.zeros((pos.size, pos.size))
+    for i in range(pos.shape[0]):
+        for k in range(2):
+            shifted = pos.copy()
+            shifted[i, k] += h
+            plus = planar_gradient(sheet, shifted).ravel().copy()
+            shifted[i, k] -= 2 * h
+            hessian[:, 2 * i + k] = (plus - planar_gradient(sheet, shifted).ravel()) / (2 * h)
+    return hessian
+
+
+def test_hessian_matches_finite_differences(planar_sheet):
+    pos = planar_sheet.vert_df[['x', 'y']].to_numpy()
+    hessian = planar_hessian(planar_sheet).toarray()
+    assert np.abs(hessian - _finite_hessian(planar_sheet, pos)).max() < 4e-10
+    assert np.abs(hessian - hessian.T).max() < 1e-14
+
+
+def test_hessian_product_matches_matrix(planar_sheet):
+    pos = planar_sheet.vert_df[['x', 'y']].to_numpy()
+    vec = np.random.default_rng(1).normal(size=pos.shape)
+    for positive in (False, True):
+        hessian = planar_hessian(planar_sheet, positive=positive)
+        product = planar_hessian_product(planar_sheet, vec, positive=positive)
+        assert product.shape == vec.shape
+        assert np.abs(product.ravel() - hessian @ vec.ravel()).max() < 4e-10
+
+
+def test_positive_hessian_is_semi_definite(planar_sheet):
+    hessian = planar_hessian(planar_sheet, positive=True).toarray()
+    assert np.linalg.eigvalsh(hessian).min() > -1e-12
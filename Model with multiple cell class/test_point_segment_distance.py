@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the point to segment distance kernel and of its single pair
+wrappers, against the nearest of many points sampled along each segment.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('tyssue')
+
+from conftest import as_tyssue, plain_sheet
+from my_headers import point_segment_distance, pnt2line, T3_detection
+from T3_function import dist_computer
+
+SAMPLES = np.linspace(0, 1, 20001)
+
+
+def _sampled(start, end, point):
+    # The distance to the nearest sample, and the parameter of the sample.
+    along = start + SAMPLES[:, None] * (end - start)
+    dist = np.hypot(*(point - along).T)
+    return dist.min(), SAMPLES[np.argmin(dist)]
+
+
+def test_pairs_match_sampling():
+    rng = np.random.default_rng(1)
+    start, end, point = rng.uniform(-1, 1, (3, 200, 2))
+    # Points in front of the ends, and on the segment itself.
+    point[:20] = start[:20] - 0.3 * (end[:20] - start[:20])
+    point[20:40] = end[20:40] + 0.3 * (end[20:40] - start[20:40])
+    point[40:60] = start[40:60] + 0.25 * (end[40:60] - start[40:60])
+
+    dist, t, nearest = point_segment_distance(start, end, point)
+    assert dist.shape == t.shape == (200,) and nearest.shape == (200, 2)
+    for i in range(200):
+        expected, t_expected = _sampled(start[i], end[i], point[i])
+        assert dist[i] == pytest.approx(expected, abs=1e-6)
+        assert dist[i] <= expected + 1e-12
+        assert t[i] == pytest.approx(t_expected, abs=1e-4)
+    np.testing.assert_allclose(np.hypot(*(point - nearest).T), dist)
+    assert (t[:20] == 0).all() and (t[20:40] == 1).all()
+    np.testing.assert_allclose(dist[40:60], 0, atol=1e-12)
+
+
+def test_broadcast_gives_every_pair():
+    rng = np.random.default_rng(2)
+    start, end = rng.uniform(-1, 1, (2, 7, 2))
+    point = rng.uniform(-1, 1, (5, 2))
+    dist, t, nearest = point_segment_distance(start[:, None], end[:, None], point)
+    assert dist.shape == (7, 5) and nearest.shape == (7, 5, 2)
+    for i in range(7):
+        for j in range(5):
+            assert dist[i, j] == pytest.approx(_sampled(start[i], end[i], point[j])[0], abs=1e-6)
+
+
+def test_zero_length_segment_is_its_start():
+    dist, t, nearest = point_segment_distance([1., 1], [1., 1], [4., 5])
+    assert dist == 5 and t == 0
+    np.testing.assert_array_equal(nearest, [1, 1])
+
+
+def test_single_pair_wrappers():
+    start, end, point = np.array([0., 0]), np.array([2., 0]), np.array([0.5, 1])
+    dist, nearest = pnt2line(point, start, end)
+    assert dist == 1 and nearest == (0.5, 0)
+
+    sheet = as_tyssue(plain_sheet(2))
+    edge = sheet.edge_df.index[0]
+    srce, trgt = sheet.edge_df.loc[edge, ['srce', 'trgt']]
+    a, b = sheet.vert_df.loc[[srce, trgt], ['x', 'y']].to_numpy()
+    d_sep = 0.1
+    unit = (b - a) / np.linalg.norm(b - a)
+    normal = np.array([-unit[1], unit[0]])
+    vert = sheet.vert_df.index.difference([srce, trgt])[0]
+
+    # In front of the segment: the nearest point is on it.
+    sheet.vert_df.loc[vert, ['x', 'y']] = 0.6 * a + 0.4 * b + 0.2 * normal
+    dist, nearest = dist_computer(sheet, edge, vert, d_sep)
+    assert dist == pytest.approx(0.2)
+    np.testing.assert_allclose(nearest, 0.6 * a + 0.4 * b)
+
+    # Beyond an end: the distance is to the end, and the nearest point is
+    # moved d_sep inside the edge.
+    sheet.vert_df.loc[vert, ['x', 'y']] = b + 0.3 * unit
+    dist, nearest = dist_computer(sheet, edge, vert, d_sep)
+    assert dist == pytest.approx(0.3)
+    np.testing.assert_allclose(nearest, b - d_sep * unit)
+    sheet.vert_df.loc[vert, ['x', 'y']] = a - 0.3 * unit
+    dist, nearest = dist_computer(sheet, edge, vert, d_sep)
+    np.testing.assert_allclose(nearest, a + d_sep * unit)
+
+
+def test_T3_detection_matches_a_loop():
+    sheet = as_tyssue(plain_sheet(3))
+    boundary = sheet.edge_df[sheet.edge_df['opposite'] == -1]
+    boundary_verts = set(boundary['srce']) | set(boundary['trgt'])
+    for d_min in (0.05, 0.5, 0.8):
+        for edge in sheet.edge_df.index:
+            srce, trgt, length = sheet.edge_df.loc[edge, ['srce', 'trgt', 'length']]
+            radius = (length**2 / 4 + d_min**2)**0.5
+            expected = any(
+                np.hypot(*(sheet.vert_df.loc[v, ['x', 'y']].to_numpy(dtype=float)
+                           - sheet.vert_df.loc[end, ['x', 'y']].to_numpy(dtype=float))) < radius
+                for v in boundary_verts - {srce, trgt} for end in (srce, trgt))
+            assert T3_detection(sheet, edge, d_min) == expected
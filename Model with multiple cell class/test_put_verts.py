@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of put_verts against tyssue's add_vert, one point at a time.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('tyssue')
+from tyssue.topology.base_topology import add_vert
+
+from adjacency_index import adjacency, invalidate_adjacency
+from conftest import as_tyssue, plain_sheet
+from my_headers import put_verts, reset_boundary
+
+
+def _faces(sheet):
+    # Every face as the cycle of the positions of its vertices, from the
+    # lowest one.
+    xy = sheet.vert_df[['x', 'y']].round(8)
+    faces = {}
+    for face, edges in sheet.edge_df.groupby('face'):
+        after = dict(zip(edges['srce'], edges['trgt']))
+        cycle = [min(after)]
+        while after[cycle[-1]] != cycle[0]:
+            cycle.append(after[cycle[-1]])
+        corners = [tuple(xy.loc[v]) for v in cycle]
+        first = corners.index(min(corners))
+        faces[face] = corners[first:] + corners[:first]
+    return faces
+
+
+def test_put_verts_matches_add_vert():
+    sheet = as_tyssue(plain_sheet(3))
+    reset_boundary(sheet)
+    reference = sheet.copy()
+    # An inner edge, a boundary edge, and two points on the same edge.
+    inner = sheet.edge_df.index[sheet.edge_df['opposite'] >= 0][0]
+    outer = sheet.edge_df.index[sheet.edge_df['opposite'] < 0][0]
+    other = sheet.edge_df.index[(sheet.edge_df['opposite'] >= 0)
+                                & ~sheet.edge_df.index.isin([inner, sheet.edge_df.loc[inner, 'opposite']])][-1]
+    edges = [inner, outer, other, other]
+    ends = [sheet.vert_df.loc[sheet.edge_df.loc[e, ['srce', 'trgt']], ['x', 'y']].to_numpy()
+            for e in edges]
+    coords = [a + t * (b - a) for (a, b), t in zip(ends, [0.5, 0.3, 0.7, 0.2])]
+
+    new_verts, new_edges, new_opp_edges = put_verts(sheet, edges, coords)
+
+    # The same points, one at a time: the second point on 'other' is put on
+    # the part of it left before the first one.
+    for edge, xy in zip(edges[:3], coords[:3]):
+        vert, _, _ = add_vert(reference, edge)
+        reference.vert_df.loc[vert, ['x', 'y']] = xy
+    vert, _, _ = add_vert(reference, other)
+    reference.vert_df.loc[vert, ['x', 'y']] = coords[3]
+
+    assert _faces(sheet) == _faces(reference)
+    assert len(sheet.vert_df) == len(reference.vert_df)
+    assert len(sheet.edge_df) == len(reference.edge_df)
+    assert (new_opp_edges >= 0).tolist() == [True, False, True, True]
+    np.testing.assert_array_equal(sheet.edge_df.loc[new_edges, 'srce'], new_verts)
+    np.testing.assert_array_equal(sheet.edge_df.loc[new_opp_edges[new_opp_edges >= 0], 'trgt'],
+                                  new_verts[new_opp_edges >= 0])
+
+    # The tracked columns and the patched index are the ones computed again.
+    patched = {key: dict(adjacency(sheet)[key]) for key in ('pair', 'vert', 'face', 'edge')}
+    tracked = sheet.edge_df[['opposite', 'is_boundary']].copy(), sheet.vert_df['is_boundary'].copy()
+    invalidate_adjacency(sheet)
+    reset_boundary(sheet)
+    assert patched == {key: dict(adjacency(sheet)[key]) for key in ('pair', 'vert', 'face', 'edge')}
+    np.testing.assert_array_equal(tracked[0], sheet.edge_df[['opposite', 'is_boundary']])
+    np.testing.assert_array_equal(tracked[1], sheet.vert_df['is_boundary'])
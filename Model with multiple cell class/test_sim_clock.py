@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the integer tick clock.
+"""
+from fractions import Fraction
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from cell_cycle import start_cell_cycle
+from sim_clock import clock_ticks, ticks_to_expiry, to_ticks
+
+
+def test_clock_ticks_and_to_ticks():
+    tick, max_ticks = clock_ticks(0.01, levels=6)
+    assert max_ticks == 64 and tick * max_ticks == 0.01
+    rng = np.random.default_rng(6)
+    for time in rng.uniform(0, 100, 200):
+        # The nearest tick, computed exactly.
+        expected = round(Fraction(time) / Fraction(tick))
+        assert to_ticks(time, tick) == expected
+        assert abs(to_ticks(time, tick) * tick - time) <= tick / 2 * (1 + 1e-9)
+
+
+def test_whole_ticks_land_on_the_end():
+    tick, max_ticks = clock_ticks(0.1, levels=10)
+    end = to_ticks(100.0, tick)
+    rng = np.random.default_rng(7)
+    now, time = 0, 0.0
+    while now < end:
+        step = min(int(rng.integers(1, max_ticks + 1)), end - now)
+        now += step
+        time += step * tick
+    assert now * tick == 100.0
+    # The float sum of the same steps drifts away from it.
+    assert time != 100.0
+
+
+def test_ticks_to_expiry_is_the_smallest_running_timer():
+    rng = np.random.default_rng(8)
+    tick, _ = clock_ticks(0.5, levels=4)
+    sheet = SimpleNamespace(face_df=pd.DataFrame(index=pd.RangeIndex(30, name='face')), Nf=30)
+    start_cell_cycle(sheet)
+    assert ticks_to_expiry(sheet, tick) is None
+
+    timers = rng.uniform(0, 15, 30)
+    timers[rng.random(30) < 0.5] = 0
+    sheet.face_df['T_cycle'] = timers
+    expected = min(to_ticks(t, tick) for t in timers if to_ticks(t, tick) > 0)
+    assert ticks_to_expiry(sheet, tick) == expected
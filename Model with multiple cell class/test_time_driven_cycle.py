@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of time_driven_cycle_step against the per cell state machine it
+replaces.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cell_cycle import CELL_CLASSES, set_cell_classes, time_driven_cycle_step
+
+DT, P_G2, G2_DURATION, G1_DURATION = 0.05, 0.1, 0.4, 0.11
+
+
+def _divide(sheet, cells):
+    # Divides the cells whose id is not a multiple of 3, the daughters are
+    # copies of their mothers with the next ids.
+    mothers = [cell for cell in cells if cell % 3]
+    daughters = sheet.face_df.index.max() + 1 + np.arange(len(mothers))
+    rows = sheet.face_df.loc[mothers].set_axis(pd.Index(daughters, name='face'))
+    sheet.face_df = pd.concat([sheet.face_df, rows])
+    sheet.Nf = len(sheet.face_df)
+    return dict(zip(mothers, daughters.tolist()))
+
+
+def _reference_step(classes, timers, draws):
+    # One step, one cell at a time.
+    entered = {'G2': [], 'M': [], 'G1': [], 'S': []}
+    S_cells = [cell for cell in classes if classes[cell] == 'S']
+    for cell, draw in zip(S_cells, draws):
+        if draw <= P_G2:
+            classes[cell], timers[cell] = 'G2', G2_DURATION
+            entered['G2'].append(cell)
+    for cell in list(classes):
+        if classes[cell] == 'G2':
+            if timers[cell] < 0:
+                classes[cell] = 'M'
+                entered['M'].append(cell)
+            else:
+                timers[cell] -= DT
+    for cell in [cell for cell in classes if classes[cell] == 'M']:
+        if cell % 3:
+            daughter = max(classes) + 1
+            for c in (cell, daughter):
+                classes[c], timers[c] = 'G1', G1_DURATION
+            entered['G1'] += [cell, daughter]
+        else:
+            classes[cell], timers[cell] = 'G2', G2_DURATION
+    for cell in list(classes):
+        if classes[cell] == 'G1':
+            if timers[cell] < 0:
+                classes[cell] = 'S'
+                entered['S'].append(cell)
+            else:
+                timers[cell] -= DT
+    return entered
+
+
+def test_cycle_step_matches_a_per_cell_loop():
+    face_df = pd.DataFrame(index=pd.Index(np.arange(30) + 1, name='face'))
+    sheet = SimpleNamespace(face_df=face_df, Nf=30)
+    set_cell_classes(sheet, ['S'] * 20 + ['G2'] * 5 + ['G1'] * 5)
+    sheet.face_df.loc[21:25, 'timer'] = np.linspace(-0.1, 0.3, 5)
+    sheet.face_df.loc[26:30, 'timer'] = np.linspace(-0.1, 0.1, 5)
+    classes = dict(zip(sheet.face_df.index, sheet.face_df['cell_class'].astype(str)))
+    timers = dict(zip(sheet.face_df.index, sheet.face_df['timer']))
+
+    rng, draws = np.random.default_rng(9), np.random.default_rng(9)
+    went_back = 0
+    for step in range(100):
+        n_S = sum(c == 'S' for c in classes.values())
+        expected = _reference_step(classes, timers, draws.random(n_S))
+        went_back += sum(cell % 3 == 0 for cell in expected['M'])
+
+        entered = time_driven_cycle_step(sheet, rng, DT, _divide, p_G2=P_G2,
+                                         G2_duration=G2_DURATION, G1_duration=G1_DURATION)
+        for cell_class, cells in expected.items():
+            assert sorted(entered[cell_class]) == sorted(cells)
+        assert sheet.face_df['cell_class'].cat.categories.tolist() == CELL_CLASSES
+        assert sheet.face_df['cell_class'].astype(str).to_dict() == classes
+        assert sheet.face_df['timer'].to_numpy() == pytest.approx(list(timers.values()), nan_ok=True)
+    # Some M cells could not divide and went back to G2.
+    assert went_back > 0
+    assert len(sheet.face_df) > 30
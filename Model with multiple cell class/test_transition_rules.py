@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of apply_rules against the same rules applied one cell at a time.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('tyssue')
+
+from cell_cycle import set_cell_classes
+from conftest import plain_sheet
+from transition_rules import apply_rules, transition_rule
+
+DT = 0.1
+
+
+def _neighbours(sheet):
+    # The faces that share an edge, from the vertex pairs of their edges.
+    face_of = {(s, t): f for s, t, f in zip(sheet.edge_df['srce'], sheet.edge_df['trgt'],
+                                            sheet.edge_df['face'])}
+    neighbours = {face: set() for face in sheet.face_df.index}
+    for (s, t), f in face_of.items():
+        if (t, s) in face_of:
+            neighbours[f].add(face_of[(t, s)])
+    return neighbours
+
+
+def _reference(sheet, rng, rules):
+    # The rules, one cell at a time: the candidates are read from the
+    # classes at the start of the step, the first rule that picks a cell wins.
+    face_df = sheet.face_df
+    start = face_df['cell_class'].astype(str).to_dict()
+    classes, timers = dict(start), face_df['timer'].to_dict()
+    neighbours = _neighbours(sheet)
+    changed, picked_by_rule = set(), []
+    for rule in rules:
+        condition = (rule['condition'](sheet) if rule['condition'] is not None
+                     else np.ones(len(face_df), dtype=bool))
+        candidates = [cell for cell, ok in zip(face_df.index, condition)
+                      if ok and start[cell] == rule['source'] and cell not in changed
+                      and (not rule['expires'] or timers[cell] < 0)
+                      and (rule['touches'] is None
+                           or any(start[n] == rule['touches'] for n in neighbours[cell]))]
+        if rule['probability'] is not None:
+            draws = rng.random(len(candidates))
+            picked = [cell for cell, draw in zip(candidates, draws) if draw <= rule['probability']]
+        elif rule['fraction'] is not None:
+            picked = sorted(rng.choice(candidates, size=int(len(candidates) * rule['fraction']),
+                                       replace=False).tolist())
+        else:
+            picked = candidates
+        for cell in picked:
+            classes[cell] = rule['target']
+            if rule['timer'] is not None:
+                timers[cell] = rule['timer']
+            changed.add(cell)
+        picked_by_rule.append(picked)
+    for cell in timers:
+        if cell not in changed:
+            timers[cell] -= DT
+    return classes, timers, picked_by_rule
+
+
+def test_rules_match_one_cell_at_a_time():
+    sheet = plain_sheet(8)
+    rng = np.random.default_rng(10)
+    set_cell_classes(sheet, rng.choice(['S', 'G1', 'G2', 'STB'], size=64))
+    sheet.face_df['timer'] = rng.uniform(-0.5, 0.5, 64)
+    big = sheet.face_df.index[::3]
+
+    acted = []
+    rules = [
+        transition_rule('S', 'G1', fraction=0.3, timer=1.0,
+                        action=lambda sheet, cells: acted.append(list(cells))),
+        transition_rule('G1', 'G2', expires=True, timer=0.5),
+        transition_rule('G2', 'S', condition=lambda sheet: sheet.face_df.index.isin(big)),
+        transition_rule('S', 'F', probability=0.5, touches='STB'),
+        # The cells already changed by the first rules are not picked again.
+        transition_rule('S', 'STB', probability=0.8),
+    ]
+    total = np.zeros(len(rules), dtype=int)
+    for step in range(5):
+        expected = _reference(sheet, np.random.default_rng(step), rules)
+        picked = apply_rules(sheet, np.random.default_rng(step), rules, dt=DT)
+        assert [p.tolist() for p in picked] == expected[2]
+        assert sheet.face_df['cell_class'].astype(str).to_dict() == expected[0]
+        assert sheet.face_df['timer'].to_dict() == pytest.approx(expected[1])
+        if expected[2][0]:
+            assert acted[-1] == expected[2][0]
+        total += [len(p) for p in picked]
+    # Every rule changed some cells.
+    assert total.all()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Declarative transitions between the cell classes.
+
+Each transition is a rule (see transition_rule) that says which class the
+cell leaves, which class it enters, and when: with a probability per cell,
+for a fraction of the candidates, at the end of its timer, under a condition
+on the face data, and/or only if it touches a cell of a given class.
+apply_rules evaluates a whole table of rules on all the cells at once, with
+array operations on the class codes, and the neighbour conditions are
+sparse products with the face adjacency matrix (see face_adjacency.py).
+"""
+import numpy as np
+import pandas as pd
+
+from cell_cycle import CELL_CLASSES
+from face_adjacency import neighbour_count
+
+
+def transition_rule(source, target, probability=None, fraction=None,
+                    expires=False, timer=None, condition=None, touches=None,
+                    action=None):
+    """
+    Declares the transition of cells from class source to class target.
+
+    Parameters
+    ----------
+    source, target : str
+        the cell classes, from CELL_CLASSES.
+    probability : float, optional
+        every candidate changes class with this probability.
+    fraction : float, optional
+        int(fraction * number of candidates) of the candidates, picked at
+        random, change class.
+    expires : bool, optional
+        if True, only the cells whose timer is below zero are candidates.
+    timer : float, optional
+        the timer of the cells that enter target is set to this value.
+    condition : function, optional
+        condition(sheet) returns a boolean array over face_df, only the cells
+        where it is True are candidates.
+    touches : str, optional
+        only the cells that share an edge with a cell of this class are
+        candidates.
+    action : function, optional
+        action(sheet, cells) is called with the Index of the cells that
+        changed class, e.g. to change their target area.
+
+    Returns
+    -------
+    dict, the rule.
+    """
+    for cell_class in (source, target, touches):
+        if cell_class is not None and cell_class not in CELL_CLASSES:
+            raise ValueError(f'Unknown cell class "{cell_class}".')
+    if probability is not None and fraction is not None:
+        raise ValueError('A rule takes either a probability or a fraction.')
+    return {'source': source, 'target': target, 'probability': probability,
+            'fraction': fraction, 'expires': expires, 'timer': timer,
+            'condition': condition, 'touches': touches, 'action': action}
+
+
+def apply_rules(sheet, rng, rules, dt=0.0):
+    """
+    Applies one step of the rules to all the cells of the sheet.
+
+    The candidates of every rule are taken from the classes at the start of
+    the step, and a cell changes class at most once per step: the first rule
+    in the table that picks it wins. Then the timers of the cells that did not
+    change class go down by dt.
+
+    Parameters
+    ----------
+    sheet : a :class:`Sheet` object, with the 'cell_class' column from
+        cell_cycle.set_cell_classes
+    rng : numpy random generator
+    rules : list of dict, from transition_rule
+    dt : float, optional
+        the time step, default 0.
+
+    Returns
+    -------
+    A list with, for every rule, the Index of the cells it changed.
+    """
+    face_df = sheet.face_df
+    start = face_df['cell_class'].cat.codes.to_numpy()
+    codes = start.copy()
+    if 'timer' in face_df:
+        timer = face_df['timer'].to_numpy(dtype=float).copy()
+    else:
+        timer = np.full(codes.size, np.nan)
+    changed = np.zeros(codes.size, dtype=bool)
+    picked_by_rule = []
+    for rule in rules:
+        candidates = (start == CELL_CLASSES.index(rule['source'])) & ~changed
+        if rule['expires']:
+            candidates &= timer < 0
+        if rule['condition'] is not None:
+            candidates &= np.asarray(rule['condition'](sheet), dtype=bool)
+        if rule['touches'] is not None:
+            touches = start == CELL_CLASSES.index(rule['touches'])
+            candidates &= neighbour_count(sheet, touches) > 0
+        picked = np.flatnonzero(candidates)
+        if rule['probability'] is not None:
+            picked = picked[rng.random(picked.size) <= rule['probability']]
+        elif rule['fraction'] is not None:
+            number_to_change = int(picked.size * rule['fraction'])
+            picked = np.sort(rng.choice(picked, size=number_to_change, replace=False))
+        codes[picked] = CELL_CLASSES.index(rule['target'])
+        if rule['timer'] is not None:
+            timer[picked] = rule['timer']
+        changed[picked] = True
+        picked_by_rule.append(face_df.index[picked])
+
+    timer[~changed] -= dt
+    face_df['cell_class'] = pd.Categorical.from_codes(codes, categories=CELL_CLASSES)
+    face_df['timer'] = timer
+    for rule, cells in zip(rules, picked_by_rule):
+        if rule['action'] is not None and len(cells):
+            rule['action'](sheet, cells)
+    return picked_by_rule